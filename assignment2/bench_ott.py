@@ -0,0 +1,100 @@
+"""
+Benchmarks for the OTT protocol in ott.py.
+Run with: python bench_ott.py [N]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+from ott import blood_type_encoding, ott_protocol, batch_ott
+from ott_compiler import compile_function, ott_deal, ott_eval
+from ott_store import ALICE, BOB, write_store, OTTStore, store_ott, TABLE_BYTES
+
+blood_types = list(blood_type_encoding.keys())
+
+
+def random_pairs(N: int) -> list[tuple[str, str]]:
+    # (alice/recipient, bob/donor) pairs
+    return [(random.choice(blood_types), random.choice(blood_types)) for _ in range(N)]
+
+
+def bench_per_pair(pairs: list[tuple[str, str]]) -> float:
+    start = time.perf_counter()
+    for alice, bob in pairs:
+        ott_protocol(alice, bob)
+    return time.perf_counter() - start
+
+
+def bench_batch(pairs: list[tuple[str, str]]) -> float:
+    start = time.perf_counter()
+    x = bytes([blood_type_encoding[alice] for alice, _ in pairs])
+    y = bytes([blood_type_encoding[bob] for _, bob in pairs])
+    batch_ott(x, y)
+    return time.perf_counter() - start
+
+
+def bench_store(pairs: list[tuple[str, str]]) -> tuple[float, float, int]:
+    # offline: write the stores, online: run all pairs from them. Returns (offline s, online s, bytes on disk)
+    x = bytes([blood_type_encoding[alice] for alice, _ in pairs])
+    y = bytes([blood_type_encoding[bob] for _, bob in pairs])
+    with tempfile.TemporaryDirectory() as d:
+        alice_path, bob_path = os.path.join(d, 'alice.ott'), os.path.join(d, 'bob.ott')
+        start = time.perf_counter()
+        write_store(alice_path, bob_path, len(pairs))
+        offline = time.perf_counter() - start
+
+        alice, bob = OTTStore(alice_path, ALICE), OTTStore(bob_path, BOB)
+        start = time.perf_counter()
+        store_ott(x, y, alice, bob)
+        online = time.perf_counter() - start
+        size = os.path.getsize(alice_path) + os.path.getsize(bob_path)
+        alice.close()
+        bob.close()
+    return offline, online, size
+
+
+def bench_compiler(max_bits: int, evals: int = 20):
+    # x, y in n bits, f(x, y) = [x <= y]; memory is one party's masked tables
+    print(f"{'n':>3} {'table':>9} {'memory/party':>13} {'compile':>10} {'deal':>11} {'eval':>11}")
+    for bits in range(3, max_bits + 1):
+        start = time.perf_counter()
+        table = compile_function(lambda x, y: int(x <= y), bits, bits)
+        t_compile = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(evals):
+            ott_deal(table)
+        t_deal = (time.perf_counter() - start) / evals
+
+        start = time.perf_counter()
+        for _ in range(evals):
+            ott_eval(table, 1, 2)
+        t_eval = (time.perf_counter() - start) / evals
+
+        print(f"{bits:>3} {2**bits:>4}x{2**bits:<4} {table.table_bytes():>12}B "
+              f"{t_compile * 1e3:>8.2f}ms {t_deal * 1e3:>9.3f}ms {t_eval * 1e3:>9.3f}ms")
+
+
+def report(name: str, N: int, seconds: float):
+    print(f"{name:<12} N={N:<8} {seconds:8.4f}s  {N / seconds:12.0f} pairs/s")
+
+
+if __name__ == "__main__":
+    N = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    pairs = random_pairs(N)
+
+    t_single = bench_per_pair(pairs)
+    t_batch = bench_batch(pairs)
+    report("per-pair", N, t_single)
+    report("batched", N, t_batch)
+    print(f"speedup: {t_single / t_batch:.1f}x")
+
+    t_offline, t_online, size = bench_store(pairs)
+    report("store write", N, t_offline)
+    report("store online", N, t_online)
+    print(f"store size: {size} bytes for both parties ({TABLE_BYTES} bytes per table + 1 offset byte each)")
+
+    print()
+    bench_compiler(max_bits=10)
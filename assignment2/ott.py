@@ -1,5 +1,7 @@
 import random
 import pprint
+import secrets
+import functools
 
 #defining
 n=3
@@ -69,13 +71,89 @@ def xor_tperm_rm(t_perm:list[list[int]], M_b:list[list[int]])-> list[list[int]]:
 
 
 #===============
-#write main function
+# Batched OTT: run the protocol for N (x, y) pairs at once
+#
+# Dealer material for N instances lives in flat byte strings instead of lists
+# of lists: r[k] and s[k] are single bytes, and table k of M_a / M_b is the
+# slice [k*TABLE_SIZE, (k+1)*TABLE_SIZE) with entry (i, j) at offset i*2^n + j.
+# All per-byte work is done on the whole buffer at once via int.from_bytes.
 
-if __name__ == "__main__":
+TABLE_SIZE = 2**n * 2**n
 
-    alice_blood_type = 'b-' # Alice's blood type ( reciever type)
-    bob_blood_type = 'a+' # Bob's blood type (donor type)
 
+def byte_mask(value: int, N: int) -> int:
+    # int with all N bytes set to value, used to mask every byte of a buffer at once
+    return int.from_bytes(bytes([value]) * N, 'big')
+
+
+@functools.cache
+def permuted_tables() -> list[bytes]:
+    # all 2^n * 2^n permutations of truth_table, flattened, indexed by r*2^n + s
+    return [bytes(sum(permute_truth_table(truth_table, r, s), []))
+            for r in range(2**n) for s in range(2**n)]
+
+
+def batch_dealer(N: int) -> tuple[bytes, bytes, bytes, bytes]:
+    """Dealer material (r, s, M_a, M_b) for N OTT instances, in the flat layout above."""
+    low_bits = byte_mask(2**n - 1, N)
+    r = (int.from_bytes(secrets.token_bytes(N), 'big') & low_bits).to_bytes(N, 'big')
+    s = (int.from_bytes(secrets.token_bytes(N), 'big') & low_bits).to_bytes(N, 'big')
+
+    size = N * TABLE_SIZE
+    M_b = int.from_bytes(secrets.token_bytes(size), 'big') & byte_mask(1, size)
+
+    tables = permuted_tables()
+    T_perm = b''.join([tables[(r_k << n) | s_k] for r_k, s_k in zip(r, s)])
+    M_a = int.from_bytes(T_perm, 'big') ^ M_b
+
+    return r, s, M_a.to_bytes(size, 'big'), M_b.to_bytes(size, 'big')
+
+
+def batch_shift(x: bytes, r: bytes) -> bytes:
+    # (x_k + r_k) mod 2^n for every k; a byte sum is at most 2*(2^n - 1) so it never carries into the next byte
+    N = len(x)
+    total = int.from_bytes(x, 'big') + int.from_bytes(r, 'big')
+    return (total & byte_mask(2**n - 1, N)).to_bytes(N, 'big')
+
+
+def batch_lookup(M: bytes, u: bytes, v: bytes) -> bytes:
+    # M_k[u_k][v_k] for every instance k
+    return bytes([M[k * TABLE_SIZE + (u_k << n) + v_k] for k, (u_k, v_k) in enumerate(zip(u, v))])
+
+
+def batch_ott(x: bytes, y: bytes) -> bytes:
+    """
+    Run the OTT protocol for N pairs, x[k] is Alice's (recipient) input and
+    y[k] Bob's (donor) input of pair k. Returns z with z[k] = T[x[k]][y[k]].
+    """
+    if len(x) != len(y):
+        raise ValueError(f"x and y must have the same length, got {len(x)} and {len(y)}")
+    N = len(x)
+
+    # Dealer: Alice receives (r, M_a) and Bob receives (s, M_b)
+    r, s, M_a, M_b = batch_dealer(N)
+
+    # Alice: send u to Bob
+    u = batch_shift(x, r)
+
+    # Bob: send v and z_b to Alice
+    v = batch_shift(y, s)
+    z_b = batch_lookup(M_b, u, v)
+
+    # Alice:
+    z_a = batch_lookup(M_a, u, v)
+    return (int.from_bytes(z_a, 'big') ^ int.from_bytes(z_b, 'big')).to_bytes(N, 'big')
+
+
+def batch_can_donate(donors: list[str], recipients: list[str]) -> list[int]:
+    """batch_ott on blood type strings, result k is 1 if donors[k] can donate to recipients[k]."""
+    x = bytes([blood_type_encoding[t] for t in recipients])
+    y = bytes([blood_type_encoding[t] for t in donors])
+    return list(batch_ott(x, y))
+
+
+def ott_protocol(alice_blood_type: str, bob_blood_type: str) -> int:
+    """One run of the OTT protocol, returns z = 1 if Bob can donate to Alice."""
     # Dealar:
     r = random.randint(0, 2**n - 1) # 1. (r)_2 in {0,1}^n OR (r)_10 in {0,...,2^n-1}
     s = random.randint(0, 2**n - 1) # 1. (s)_2 in {0,1}^n OR (s)_10 in {0,...,2^n-1}
@@ -87,20 +165,32 @@ if __name__ == "__main__":
     # Alice recieves (r, M_a) and Bob recieves (s, M_b)
 
     # Alice:
-    x_string = alice_blood_type # Alice's blood type ( reciever type)
-    x = blood_type_encoding[x_string] # Alice's blood type
+    x = blood_type_encoding[alice_blood_type] # Alice's blood type
     u = (x + r) % 2**n
     # send u to Bob
 
     # Bob:
-    y_string = bob_blood_type # Bob's blood type (donor type)
-    y = blood_type_encoding[y_string] # Bob's blood type
+    y = blood_type_encoding[bob_blood_type] # Bob's blood type
     v = (y + s) % 2**n
     z_b = M_b[u][v]
     # send v and z_b to Alice
 
     # Alice:
-    z = M_a[u][v] ^ z_b
+    return M_a[u][v] ^ z_b
+
+
+
+#===============
+#write main function
+
+if __name__ == "__main__":
+
+    alice_blood_type = 'b-' # Alice's blood type ( reciever type)
+    bob_blood_type = 'a+' # Bob's blood type (donor type)
+
+    x_string = alice_blood_type # Alice's blood type ( reciever type)
+    y_string = bob_blood_type # Bob's blood type (donor type)
+    z = ott_protocol(x_string, y_string)
 
 
      
@@ -0,0 +1,107 @@
+"""
+Generic one-time truth table (OTT) for any f(x, y), not just the blood type table in ott.py.
+
+x has x_bits bits (Alice), y has y_bits bits (Bob) and f(x, y) has out_bits bits.
+The table is kept as one bit-plane per output bit, each plane is a list of
+2^x_bits rows and row x is a 2^y_bits-bit int with bit y = that bit of f(x, y).
+
+Permuting by (r, s) is then a cyclic shift of the row list by r and a cyclic
+bit rotation of every row by s, and masking is one XOR per row, so dealing costs
+O(2^x_bits * 2^y_bits / wordsize) instead of one Python operation per entry.
+"""
+import secrets
+from typing import Callable
+
+
+class OTTable:
+    def __init__(self, x_bits: int, y_bits: int, out_bits: int, planes: list[list[int]]):
+        self.x_bits = x_bits
+        self.y_bits = y_bits
+        self.out_bits = out_bits
+        self.planes = planes  # planes[p][x] bit y = bit p of f(x, y)
+
+    def __repr__(self):
+        return f"OTTable(x_bits={self.x_bits}, y_bits={self.y_bits}, out_bits={self.out_bits})"
+
+    def lookup(self, x: int, y: int) -> int:
+        # plain (insecure) table lookup of f(x, y)
+        return lookup_planes(self.planes, x, y)
+
+    def table_bytes(self) -> int:
+        # size of one party's masked tables, (2^x_bits * 2^y_bits * out_bits) bits
+        return (2**self.x_bits * 2**self.y_bits * self.out_bits + 7) // 8
+
+
+def compile_function(f: Callable[[int, int], int], x_bits: int, y_bits: int, out_bits: int = 1) -> OTTable:
+    """Tabulate f(x, y) for x in [0, 2^x_bits), y in [0, 2^y_bits), keeping out_bits bits of the output."""
+    planes = [[0] * 2**x_bits for _ in range(out_bits)]
+    for x in range(2**x_bits):
+        rows = [0] * out_bits
+        for y in range(2**y_bits):
+            z = f(x, y)
+            for p in range(out_bits):
+                rows[p] |= ((z >> p) & 1) << y
+        for p in range(out_bits):
+            planes[p][x] = rows[p]
+    return OTTable(x_bits, y_bits, out_bits, planes)
+
+
+def compile_table(table: list[list[int]], x_bits: int, y_bits: int) -> OTTable:
+    """Use a truth table given as table[x][y] (e.g. ott.truth_table, x = recipient, y = donor)."""
+    if len(table) != 2**x_bits or any(len(row) != 2**y_bits for row in table):
+        raise ValueError(f"table must be 2^{x_bits} x 2^{y_bits}")
+    out_bits = max(1, max(max(row) for row in table).bit_length())
+    return compile_function(lambda x, y: table[x][y], x_bits, y_bits, out_bits)
+
+
+def rotate_rows(rows: list[int], r: int) -> list[int]:
+    # new row i = rows[(i - r) mod len(rows)]
+    r %= len(rows)
+    return rows[-r:] + rows[:-r] if r else list(rows)
+
+
+def rotate_bits(row: int, s: int, width: int) -> int:
+    # cyclic left rotation of a width-bit row, new bit j = bit (j - s) mod width
+    s %= width
+    return ((row << s) | (row >> (width - s))) & ((1 << width) - 1)
+
+
+def lookup_planes(planes: list[list[int]], u: int, v: int) -> int:
+    z = 0
+    for p, rows in enumerate(planes):
+        z |= ((rows[u] >> v) & 1) << p
+    return z
+
+
+def ott_deal(table: OTTable) -> tuple[tuple[int, list[list[int]]], tuple[int, list[list[int]]]]:
+    """
+    Dealer: returns ((r, M_a), (s, M_b)) with M_a xor M_b = table permuted by (r, s),
+    Alice receives (r, M_a) and Bob receives (s, M_b).
+    """
+    width = 2**table.y_bits
+    r = secrets.randbelow(2**table.x_bits)
+    s = secrets.randbelow(width)
+
+    M_a, M_b = [], []
+    for rows in table.planes:
+        T_perm = [rotate_bits(row, s, width) for row in rotate_rows(rows, r)]
+        mask = [secrets.randbits(width) for _ in T_perm]
+        M_a.append([t ^ m for t, m in zip(T_perm, mask)])
+        M_b.append(mask)
+    return (r, M_a), (s, M_b)
+
+
+def ott_eval(table: OTTable, x: int, y: int) -> int:
+    """One run of the OTT protocol for f(x, y), x is Alice's input and y is Bob's."""
+    # Dealer:
+    (r, M_a), (s, M_b) = ott_deal(table)
+
+    # Alice: send u to Bob
+    u = (x + r) % 2**table.x_bits
+
+    # Bob: send v and z_b to Alice
+    v = (y + s) % 2**table.y_bits
+    z_b = lookup_planes(M_b, u, v)
+
+    # Alice:
+    return lookup_planes(M_a, u, v) ^ z_b
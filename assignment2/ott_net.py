@@ -0,0 +1,62 @@
+import os
+import sys
+import time
+
+from ott import blood_type_encoding, can_donate, batch_dealer, batch_shift, batch_lookup
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import transport
+
+# The batched OTT protocol from ott.py with Alice and Bob talking over a
+# transport.Channel instead of sharing variables. The dealer runs before the
+# protocol starts (offline phase) and hands each party its material.
+#
+# Messages (N pairs):  Alice -> Bob  u          N bytes
+#                      Bob -> Alice  v || z_b   2N bytes
+
+
+def alice(channel: transport.Channel, x: bytes, r: bytes, M_a: bytes) -> bytes:
+    # Alice: send u to Bob
+    u = batch_shift(x, r)
+    channel.send(u)
+
+    # Alice: receive v and z_b, z = M_a[u][v] ^ z_b
+    msg = channel.recv()
+    v, z_b = msg[:len(x)], msg[len(x):]
+    z_a = batch_lookup(M_a, u, v)
+    return (int.from_bytes(z_a, 'big') ^ int.from_bytes(z_b, 'big')).to_bytes(len(x), 'big')
+
+
+def bob(channel: transport.Channel, y: bytes, s: bytes, M_b: bytes):
+    # Bob: receive u, send v and z_b to Alice
+    u = channel.recv()
+    v = batch_shift(y, s)
+    channel.send(v + batch_lookup(M_b, u, v))
+
+
+def run(recipients: list[str], donors: list[str], backend: str = "queue") -> tuple[list[int], transport.ChannelStats, transport.ChannelStats]:
+    """OTT over the given transport backend, result k is 1 if donors[k] can donate to recipients[k]."""
+    x = bytes([blood_type_encoding[t] for t in recipients])
+    y = bytes([blood_type_encoding[t] for t in donors])
+
+    # Dealer: Alice receives (r, M_a) and Bob receives (s, M_b)
+    r, s, M_a, M_b = batch_dealer(len(x))
+
+    z, _, stats_a, stats_b = transport.run_parties(
+        lambda channel: alice(channel, x, r, M_a),
+        lambda channel: bob(channel, y, s, M_b),
+        backend)
+    return list(z), stats_a, stats_b
+
+
+if __name__ == "__main__":
+    blood_types = list(blood_type_encoding.keys())
+    recipients = [r for r in blood_types for _ in blood_types]
+    donors = [d for _ in blood_types for d in blood_types]
+
+    for backend in transport.BACKENDS:
+        start = time.perf_counter()
+        z, stats_a, stats_b = run(recipients, donors, backend)
+        seconds = time.perf_counter() - start
+        assert z == [can_donate(d, r) for r, d in zip(recipients, donors)]
+        transport.report("OTT", backend, stats_a, stats_b, seconds)
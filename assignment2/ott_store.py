@@ -0,0 +1,203 @@
+"""
+Bit-packed preprocessing store for the OTT protocol in ott.py.
+
+The dealer (offline phase) writes one file per party ahead of time, Alice's
+holds (r, M_a) and Bob's holds (s, M_b) for `count` instances. Each table is
+stored bit-packed, row i is byte i and entry (i, j) is bit j of that byte, so
+an 8x8 table takes 8 bytes instead of 64 Python ints.
+
+File layout (structure of arrays, so the dealer can fill it a buffer at a time):
+
+    header   : magic b'OTT2', n, party (0 = Alice, 1 = Bob), dealing id, count, position
+    offsets  : count bytes, r_k (Alice) or s_k (Bob)
+    tables   : count * TABLE_BYTES bytes, M_a_k (Alice) or M_b_k (Bob)
+
+Online parties mmap their file and consume instances sequentially, reading
+offsets and table bits straight out of the mapping. Both parties must consume
+in the same order so that instance k on each side comes from the same dealing.
+
+An instance must never be used twice, so take() writes the new position to the
+header before the instances are handed out and reopening a store continues
+where it stopped. Both files of one write_store call carry the same random
+dealing id, store_ott refuses files from different dealings.
+"""
+import functools
+import mmap
+import secrets
+import struct
+
+from ott import n, byte_mask, permuted_tables, batch_shift
+
+MAGIC = b'OTT2'
+HEADER = struct.Struct('>4sBB16sQQ')  # magic, n, party, dealing id, count, position
+ALICE = 0
+BOB = 1
+
+ROW_BYTES = 2**n // 8
+TABLE_BYTES = 2**n * ROW_BYTES
+
+
+@functools.cache
+def packed_permuted_tables() -> list[bytes]:
+    # permuted_tables() from ott.py, bit-packed to TABLE_BYTES each
+    packed = []
+    for table in permuted_tables():
+        rows = b''
+        for i in range(2**n):
+            row = table[i * 2**n:(i + 1) * 2**n]
+            rows += sum(bit << j for j, bit in enumerate(row)).to_bytes(ROW_BYTES, 'little')
+        packed.append(rows)
+    return packed
+
+
+def _store_size(count: int) -> int:
+    return HEADER.size + count + count * TABLE_BYTES
+
+
+def _create(path: str, party: int, dealing: bytes, count: int) -> mmap.mmap:
+    size = _store_size(count)
+    with open(path, 'w+b') as f:
+        f.truncate(size)
+        mm = mmap.mmap(f.fileno(), size)
+    mm[:HEADER.size] = HEADER.pack(MAGIC, n, party, dealing, count, 0)
+    return mm
+
+
+def write_store(alice_path: str, bob_path: str, count: int, chunk: int = 1 << 16):
+    """
+    Dealer / offline phase: write `count` OTT instances to alice_path and bob_path.
+    Instances are generated `chunk` at a time so memory stays bounded.
+    """
+    dealing = secrets.token_bytes(16)
+    alice = _create(alice_path, ALICE, dealing, count)
+    bob = _create(bob_path, BOB, dealing, count)
+    tables = packed_permuted_tables()
+
+    try:
+        for start in range(0, count, chunk):
+            N = min(chunk, count - start)
+            low_bits = byte_mask(2**n - 1, N)
+            r = (int.from_bytes(secrets.token_bytes(N), 'big') & low_bits).to_bytes(N, 'big')
+            s = (int.from_bytes(secrets.token_bytes(N), 'big') & low_bits).to_bytes(N, 'big')
+
+            size = N * TABLE_BYTES
+            M_b = secrets.token_bytes(size)
+            T_perm = b''.join([tables[(r_k << n) | s_k] for r_k, s_k in zip(r, s)])
+            M_a = (int.from_bytes(T_perm, 'big') ^ int.from_bytes(M_b, 'big')).to_bytes(size, 'big')
+
+            offsets_at = HEADER.size + start
+            tables_at = HEADER.size + count + start * TABLE_BYTES
+            alice[offsets_at:offsets_at + N] = r
+            bob[offsets_at:offsets_at + N] = s
+            alice[tables_at:tables_at + size] = M_a
+            bob[tables_at:tables_at + size] = M_b
+        alice.flush()
+        bob.flush()
+    finally:
+        alice.close()
+        bob.close()
+
+
+class OTTStore:
+    """
+    One party's view of a store written by write_store, consumed sequentially.
+    party is ALICE or BOB, the party the file must have been written for.
+    """
+
+    def __init__(self, path: str, party: int):
+        with open(path, 'r+b') as f:
+            self.mm = mmap.mmap(f.fileno(), 0)
+        if len(self.mm) < HEADER.size:
+            self.mm.close()
+            raise ValueError(f"{path} is not an OTT store")
+        magic, n_file, self.party, self.dealing, self.count, self.position = HEADER.unpack_from(self.mm)
+        try:
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not an OTT store")
+            if n_file != n:
+                raise ValueError(f"{path} holds n={n_file} tables, expected n={n}")
+            if self.party != party:
+                raise ValueError(f"{path} is {'Alice' if self.party == ALICE else 'Bob'}'s store, "
+                                 f"expected {'Alice' if party == ALICE else 'Bob'}'s")
+            if len(self.mm) != _store_size(self.count):
+                raise ValueError(f"{path} has {len(self.mm)} bytes, {self.count} instances need {_store_size(self.count)}")
+            if self.position > self.count:
+                raise ValueError(f"{path} is at position {self.position} of {self.count}")
+        except ValueError:
+            self.mm.close()
+            raise
+        self.offsets_at = HEADER.size
+        self.tables_at = HEADER.size + self.count
+
+    def __repr__(self):
+        return f"OTTStore(party={'Alice' if self.party == ALICE else 'Bob'}, position={self.position}, count={self.count})"
+
+    def close(self):
+        self.mm.close()
+
+    def remaining(self) -> int:
+        return self.count - self.position
+
+    def take(self, N: int = 1) -> int:
+        """Reserve the next N instances, returns the index of the first one."""
+        if N > self.remaining():
+            raise ValueError(f"OTT store exhausted: asked for {N}, {self.remaining()} left")
+        start = self.position
+        self.position += N
+        self._write_position()
+        return start
+
+    def _write_position(self):
+        # only the position field of the header changes, on disk before the instances are used
+        self.mm[HEADER.size - 8:HEADER.size] = struct.pack('>Q', self.position)
+        self.mm.flush()
+
+    def offset(self, k: int) -> int:
+        # r_k for Alice, s_k for Bob
+        return self.mm[self.offsets_at + k]
+
+    def offsets(self, start: int, N: int) -> bytes:
+        return self.mm[self.offsets_at + start:self.offsets_at + start + N]
+
+    def lookup(self, k: int, u: int, v: int) -> int:
+        # entry (u, v) of table k
+        return (self.mm[self.tables_at + k * TABLE_BYTES + u * ROW_BYTES + (v >> 3)] >> (v & 7)) & 1
+
+    def lookup_batch(self, start: int, u: bytes, v: bytes) -> bytes:
+        # entry (u[i], v[i]) of table start + i, for every i
+        mm = self.mm
+        base = self.tables_at + start * TABLE_BYTES
+        return bytes([(mm[base + k * TABLE_BYTES + u_k * ROW_BYTES + (v_k >> 3)] >> (v_k & 7)) & 1
+                      for k, (u_k, v_k) in enumerate(zip(u, v))])
+
+
+def store_ott(x: bytes, y: bytes, alice: OTTStore, bob: OTTStore) -> bytes:
+    """
+    Online phase of batch_ott in ott.py, with dealer material read from the stores.
+    x[k] is Alice's (recipient) input, y[k] Bob's (donor) input.
+    """
+    if len(x) != len(y):
+        raise ValueError(f"x and y must have the same length, got {len(x)} and {len(y)}")
+    N = len(x)
+    if (alice.party, bob.party) != (ALICE, BOB):
+        raise ValueError("store_ott needs Alice's store first and Bob's second")
+    if alice.dealing != bob.dealing:
+        raise ValueError("the stores come from different dealings")
+    # check both stores before either commits to the instances
+    if N > min(alice.remaining(), bob.remaining()):
+        raise ValueError(f"OTT store exhausted: asked for {N}, Alice has {alice.remaining()} left, Bob {bob.remaining()}")
+    if alice.position != bob.position:
+        raise ValueError(f"stores out of sync: Alice is at {alice.position}, Bob at {bob.position}")
+    start_a = alice.take(N)
+    start_b = bob.take(N)
+
+    # Alice: send u to Bob
+    u = batch_shift(x, alice.offsets(start_a, N))
+
+    # Bob: send v and z_b to Alice
+    v = batch_shift(y, bob.offsets(start_b, N))
+    z_b = bob.lookup_batch(start_b, u, v)
+
+    # Alice:
+    z_a = alice.lookup_batch(start_a, u, v)
+    return (int.from_bytes(z_a, 'big') ^ int.from_bytes(z_b, 'big')).to_bytes(N, 'big')
@@ -0,0 +1,158 @@
+"""
+Tests for the batched OTT protocol.
+Run with: pytest test_ott.py
+"""
+import os
+import tempfile
+import unittest
+from ott_compiler import compile_function, compile_table, ott_deal, ott_eval, rotate_bits, rotate_rows
+from ott_store import ALICE, BOB, write_store, OTTStore, store_ott
+from ott import blood_type_encoding, can_donate, batch_dealer, batch_ott, batch_can_donate, permute_truth_table, truth_table, TABLE_SIZE
+
+blood_types = list(blood_type_encoding.keys())
+
+
+class TestBatchOTT(unittest.TestCase):
+
+    def test_all_pairs(self):
+        """Every (donor, recipient) combination matches the truth table."""
+        donors = [d for d in blood_types for _ in blood_types] * 10
+        recipients = [r for _ in blood_types for r in blood_types] * 10
+        z = batch_can_donate(donors, recipients)
+        for donor, recipient, z_k in zip(donors, recipients, z):
+            assert z_k == can_donate(donor, recipient)
+
+    def test_dealer_material(self):
+        """M_a xor M_b is the truth table permuted by (r, s)."""
+        N = 50
+        r, s, M_a, M_b = batch_dealer(N)
+        assert len(r) == len(s) == N
+        assert len(M_a) == len(M_b) == N * TABLE_SIZE
+        for k in range(N):
+            T_perm = sum(permute_truth_table(truth_table, r[k], s[k]), [])
+            table = [M_a[k * TABLE_SIZE + i] ^ M_b[k * TABLE_SIZE + i] for i in range(TABLE_SIZE)]
+            assert table == T_perm
+            assert set(M_b[k * TABLE_SIZE:(k + 1) * TABLE_SIZE]) <= {0, 1}
+
+    def test_empty_and_mismatched(self):
+        assert batch_ott(b'', b'') == b''
+        with self.assertRaises(ValueError):
+            batch_ott(bytes([1, 2]), bytes([1]))
+
+
+class TestOTTStore(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.alice_path = os.path.join(self.dir.name, 'alice.ott')
+        self.bob_path = os.path.join(self.dir.name, 'bob.ott')
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_store_matches_truth_table(self):
+        """All 64 pairs, consumed from the store in three batches."""
+        write_store(self.alice_path, self.bob_path, 3 * 64, chunk=50)
+        alice, bob = OTTStore(self.alice_path, ALICE), OTTStore(self.bob_path, BOB)
+        x = bytes([i for i in range(8) for _ in range(8)])
+        y = bytes([j for _ in range(8) for j in range(8)])
+        for _ in range(3):
+            z = store_ott(x, y, alice, bob)
+            assert list(z) == [truth_table[i][j] for i, j in zip(x, y)]
+        assert alice.remaining() == bob.remaining() == 0
+        with self.assertRaises(ValueError):
+            store_ott(bytes([0]), bytes([0]), alice, bob)
+        alice.close()
+        bob.close()
+
+    def test_one_store_short(self):
+        """Nothing is taken from either store when one of them is exhausted or they are out of sync."""
+        write_store(self.alice_path, self.bob_path, 4)
+        alice, bob = OTTStore(self.alice_path, ALICE), OTTStore(self.bob_path, BOB)
+        bob.take(2)
+        with self.assertRaises(ValueError):
+            store_ott(bytes(3), bytes(3), alice, bob)
+        assert (alice.remaining(), bob.remaining()) == (4, 2)
+        with self.assertRaises(ValueError):
+            store_ott(bytes(1), bytes(1), alice, bob)
+        assert (alice.remaining(), bob.remaining()) == (4, 2)
+        alice.close()
+        bob.close()
+
+    def test_reopen_continues(self):
+        """The position survives reopening, used instances are never handed out again."""
+        write_store(self.alice_path, self.bob_path, 10)
+        alice, bob = OTTStore(self.alice_path, ALICE), OTTStore(self.bob_path, BOB)
+        store_ott(bytes(4), bytes(4), alice, bob)
+        alice.close()
+        bob.close()
+        alice, bob = OTTStore(self.alice_path, ALICE), OTTStore(self.bob_path, BOB)
+        assert alice.position == bob.position == 4
+        assert list(store_ott(bytes([1] * 6), bytes([2] * 6), alice, bob)) == [truth_table[1][2]] * 6
+        alice.close()
+        bob.close()
+
+    def test_wrong_files(self):
+        write_store(self.alice_path, self.bob_path, 4)
+        with self.assertRaises(ValueError):
+            OTTStore(self.bob_path, ALICE)
+        other_alice, other_bob = self.alice_path + '2', self.bob_path + '2'
+        write_store(other_alice, other_bob, 4)
+        alice, bob = OTTStore(self.alice_path, ALICE), OTTStore(other_bob, BOB)
+        with self.assertRaises(ValueError):
+            store_ott(bytes(1), bytes(1), alice, bob)  # different dealings
+        alice.close()
+        bob.close()
+        with open(self.alice_path, 'r+b') as f:
+            f.truncate(os.path.getsize(self.alice_path) - 1)
+        with self.assertRaises(ValueError):
+            OTTStore(self.alice_path, ALICE)
+
+    def test_packed_tables(self):
+        """Single lookups agree with the permuted truth table."""
+        write_store(self.alice_path, self.bob_path, 10)
+        alice, bob = OTTStore(self.alice_path, ALICE), OTTStore(self.bob_path, BOB)
+        for k in range(10):
+            r, s = alice.offset(k), bob.offset(k)
+            T_perm = permute_truth_table(truth_table, r, s)
+            for u in range(8):
+                for v in range(8):
+                    assert alice.lookup(k, u, v) ^ bob.lookup(k, u, v) == T_perm[u][v]
+        alice.close()
+        bob.close()
+
+
+class TestOTTCompiler(unittest.TestCase):
+
+    def test_blood_type_table(self):
+        """The compiled blood type table gives the same answers as ott.py."""
+        table = compile_table(truth_table, 3, 3)
+        for x in range(8):
+            for y in range(8):
+                assert ott_eval(table, x, y) == truth_table[x][y]
+
+    def test_multi_bit_output(self):
+        """f(x, y) = x + y on 4-bit inputs, 5-bit output, unequal bit widths."""
+        table = compile_function(lambda x, y: x + y, 4, 2, out_bits=5)
+        for x in range(16):
+            for y in range(4):
+                assert ott_eval(table, x, y) == x + y
+
+    def test_dealt_tables(self):
+        table = compile_function(lambda x, y: x ^ y, 3, 4, out_bits=4)
+        (r, M_a), (s, M_b) = ott_deal(table)
+        for p in range(4):
+            for x in range(8):
+                for y in range(16):
+                    u, v = (x + r) % 8, (y + s) % 16
+                    assert ((M_a[p][u] ^ M_b[p][u]) >> v) & 1 == ((x ^ y) >> p) & 1
+
+    def test_rotations(self):
+        assert rotate_rows([1, 2, 3, 4], 1) == [4, 1, 2, 3]
+        assert rotate_rows([1, 2, 3, 4], 0) == [1, 2, 3, 4]
+        assert rotate_bits(0b1001, 1, 4) == 0b0011
+        assert rotate_bits(0b1001, 4, 4) == 0b1001
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,267 @@
+from BeDOZa_passitve import blood_type_encoding, reconstruct, xor_const, xor_gate
+from BeDOZa_sliced import ones, share_word, dealer_word, pack_blood_types, unpack_bits
+
+# Circuit representation for BeDOZa.
+#
+# Wires are numbered 0, 1, ...: the n inputs first, then one wire per gate in
+# gate order. A gate is a tuple (op, a, b, out):
+#   ("XOR", a, b, out)        out = a xor b
+#   ("AND", a, b, out)        out = a and b, needs one triple and an opening
+#   ("XOR_CONST", a, c, out)  out = a xor c, c in {0, 1} (c = 1 is NOT)
+#   ("AND_CONST", a, c, out)  out = a and c, c in {0, 1}
+# Gates are listed in topological order.
+#
+# Instead of evaluating gate by gate, schedule() groups the AND gates by
+# multiplicative depth. All AND gates of one layer are independent, so their
+# d and e values are reconstructed in one batched opening, and the number of
+# communication rounds is the AND depth of the circuit, not the number of ANDs.
+# Shares can be single bits (width=1) or bit-sliced words as in BeDOZa_sliced.py.
+
+LINEAR = ("XOR", "XOR_CONST", "AND_CONST")
+
+
+class BeDOZaCircuit:
+    def __init__(self, n: int, gates: list[tuple[str, int, int, int]], outputs: list[int]):
+        self.n = n              # number of input wires
+        self.gates = gates      # (op, a, b, out)
+        self.outputs = outputs  # output wire numbers
+
+    def __repr__(self):
+        return f"BeDOZaCircuit(n={self.n}, gates={len(self.gates)}, and_gates={self.and_count()}, outputs={self.outputs})"
+
+    def and_count(self) -> int:
+        return sum(1 for gate in self.gates if gate[0] == "AND")
+
+
+class CircuitBuilder:
+    """Build a BeDOZaCircuit with function calls, every call returns the output wire."""
+
+    def __init__(self, n: int):
+        self.n = n
+        self.gates = []
+        self.wires = n
+
+    def _gate(self, op: str, a: int, b: int) -> int:
+        out = self.wires
+        self.gates.append((op, a, b, out))
+        self.wires += 1
+        return out
+
+    def xor(self, a: int, b: int) -> int:
+        return self._gate("XOR", a, b)
+
+    def and_(self, a: int, b: int) -> int:
+        return self._gate("AND", a, b)
+
+    def xor_const(self, a: int, c: int) -> int:
+        return self._gate("XOR_CONST", a, c)
+
+    def and_const(self, a: int, c: int) -> int:
+        return self._gate("AND_CONST", a, c)
+
+    def not_(self, a: int) -> int:
+        return self.xor_const(a, 1)
+
+    def or_(self, a: int, b: int) -> int:
+        # Using De Morgan's law: x OR y = NOT(NOT x AND NOT y)
+        return self.not_(self.and_(self.not_(a), self.not_(b)))
+
+    def build(self, outputs: list[int]) -> BeDOZaCircuit:
+        return BeDOZaCircuit(self.n, list(self.gates), outputs)
+
+
+def blood_type_circuit() -> BeDOZaCircuit:
+    # blood_type_compatibility_tester as a circuit, wires 0-2 are the recipient's bits, 3-5 the donor's
+    c = CircuitBuilder(6)
+    recipient, donor = [0, 1, 2], [3, 4, 5]
+
+    # test Rh compatibility
+    Rh_compatibility = c.or_(c.not_(donor[2]), recipient[2])
+
+    # test ABO compatibility
+    # CHECK IF DONOR IS O
+    donor_is_O = c.or_(c.not_(donor[0]), c.not_(donor[1]))
+
+    A_type = c.and_(donor[1], recipient[1])  # donor A and recipient A
+    B_type = c.and_(donor[0], recipient[0])  # donor B and recipient B
+
+    ABO_compatibility = c.or_(donor_is_O, c.or_(A_type, B_type))
+
+    # final compatibility
+    compatibility = c.and_(Rh_compatibility, ABO_compatibility)
+    return c.build([compatibility])
+
+
+def schedule(circuit: BeDOZaCircuit) -> list[tuple[list[tuple], list[tuple]]]:
+    """
+    Split the gates into layers [(and_gates, linear_gates), ...]. Layer L opens the
+    AND gates of multiplicative depth L together, then runs the linear gates of
+    depth L locally. Layer 0 has no AND gates.
+    """
+    depth = [0] * (circuit.n + len(circuit.gates))
+    layers = {}
+    for gate in circuit.gates:
+        op, a, b, out = gate
+        if op == "AND":
+            depth[out] = max(depth[a], depth[b]) + 1
+            layers.setdefault(depth[out], ([], []))[0].append(gate)
+        elif op == "XOR":
+            depth[out] = max(depth[a], depth[b])
+            layers.setdefault(depth[out], ([], []))[1].append(gate)
+        elif op in LINEAR:
+            depth[out] = depth[a]
+            layers.setdefault(depth[out], ([], []))[1].append(gate)
+        else:
+            raise ValueError(f"Unsupported gate {op}")
+    return [layers.get(L, ([], [])) for L in range(max(layers, default=0) + 1)]
+
+
+class LocalOpener:
+    """Reconstructs shares in-process, every call is one communication round."""
+
+    def __init__(self):
+        self.rounds = 0
+        self.opened = 0
+
+    def __repr__(self):
+        return f"LocalOpener(rounds={self.rounds}, opened={self.opened})"
+
+    def __call__(self, shares: list[tuple[int, int]]) -> list[int]:
+        self.rounds += 1
+        self.opened += len(shares)
+        return [reconstruct(share) for share in shares]
+
+
+def evaluate(circuit: BeDOZaCircuit, inputs: list[tuple[int, int]], width: int = 1, dealer_word=dealer_word, opener=None) -> list[tuple[int, int]]:
+    """
+    Evaluate the circuit layer by layer on the input shares, returns the shares of the outputs.
+    dealer_word(width) gives triples (TriplePool.dealer_word works too) and opener(list of
+    shares) reconstructs a batch of values, once per layer.
+    """
+    if len(inputs) != circuit.n:
+        raise ValueError(f"circuit has {circuit.n} inputs, got {len(inputs)} shares")
+    opener = opener if opener is not None else LocalOpener()
+    mask = ones(width)
+    wires = list(inputs) + [None] * len(circuit.gates)
+
+    for and_gates, linear_gates in schedule(circuit):
+        if and_gates:
+            triples = [dealer_word(width) for _ in and_gates]
+            masked = []
+            for (_, a, b, _), (u, v, _) in zip(and_gates, triples):
+                masked.append(xor_gate(wires[a], u))  # d
+                masked.append(xor_gate(wires[b], v))  # e
+
+            # d and e of the whole layer become public
+            opened = opener(masked)
+
+            for i, ((_, a, b, out), (_, _, (w_a, w_b))) in enumerate(zip(and_gates, triples)):
+                d, e = opened[2 * i], opened[2 * i + 1]
+                (x_a, x_b), (y_a, y_b) = wires[a], wires[b]
+                z_a = w_a ^ (e & x_a) ^ (d & y_a) ^ (d & e)
+                z_b = w_b ^ (e & x_b) ^ (d & y_b)
+                wires[out] = (z_a, z_b)
+
+        for op, a, b, out in linear_gates:
+            if op == "XOR":
+                wires[out] = xor_gate(wires[a], wires[b])
+            elif op == "XOR_CONST":
+                wires[out] = xor_const(wires[a], mask if b else 0)
+            else:  # AND_CONST
+                x_a, x_b = wires[a]
+                wires[out] = (x_a & mask, x_b & mask) if b else (0, 0)
+
+    return [wires[out] for out in circuit.outputs]
+
+
+def deal_triples(circuit: BeDOZaCircuit, width: int = 1, dealer_word=dealer_word) -> tuple[list[tuple[int, int, int]], list[tuple[int, int, int]]]:
+    """
+    Dealer: one triple per AND gate, in the order evaluate_party uses them.
+    Returns (Alice's (u_a, v_a, w_a) list, Bob's (u_b, v_b, w_b) list).
+    """
+    alice, bob = [], []
+    for and_gates, _ in schedule(circuit):
+        for _ in and_gates:
+            (u_a, u_b), (v_a, v_b), (w_a, w_b) = dealer_word(width)
+            alice.append((u_a, v_a, w_a))
+            bob.append((u_b, v_b, w_b))
+    return alice, bob
+
+
+def evaluate_party(circuit: BeDOZaCircuit, party: int, inputs: list[int], triples: list[tuple[int, int, int]], open_values, width: int = 1) -> list[int]:
+    """
+    One party's side of evaluate(): party 0 is Alice, 1 is Bob, inputs are this party's
+    halves of the input shares and triples its halves from deal_triples. open_values(list of
+    my d/e halves) must exchange them with the other party and return the opened values.
+    Returns this party's halves of the output shares.
+    """
+    if len(inputs) != circuit.n:
+        raise ValueError(f"circuit has {circuit.n} inputs, got {len(inputs)} shares")
+    mask = ones(width)
+    wires = list(inputs) + [None] * len(circuit.gates)
+    next_triple = 0
+
+    for and_gates, linear_gates in schedule(circuit):
+        if and_gates:
+            layer_triples = triples[next_triple:next_triple + len(and_gates)]
+            next_triple += len(and_gates)
+            masked = []
+            for (_, a, b, _), (u, v, _) in zip(and_gates, layer_triples):
+                masked.append(wires[a] ^ u)  # my half of d
+                masked.append(wires[b] ^ v)  # my half of e
+
+            # d and e of the whole layer become public
+            opened = open_values(masked)
+
+            for i, ((_, a, b, out), (_, _, w)) in enumerate(zip(and_gates, layer_triples)):
+                d, e = opened[2 * i], opened[2 * i + 1]
+                z = w ^ (e & wires[a]) ^ (d & wires[b])
+                if party == 0:
+                    z ^= d & e  # only Alice adds the public d*e
+                wires[out] = z
+
+        for op, a, b, out in linear_gates:
+            if op == "XOR":
+                wires[out] = wires[a] ^ wires[b]
+            elif op == "XOR_CONST":
+                # only Alice adds the constant, as in xor_const
+                wires[out] = wires[a] ^ (mask if b and party == 0 else 0)
+            else:  # AND_CONST
+                wires[out] = wires[a] & mask if b else 0
+
+    return [wires[out] for out in circuit.outputs]
+
+
+def circuit_compatibility(donors: list[str], recipients: list[str], dealer_word=dealer_word, opener=None) -> list[int]:
+    """blood_type_circuit on all (donors[k], recipients[k]) pairs, bit-sliced, 1 if compatible."""
+    if len(donors) != len(recipients):
+        raise ValueError(f"donors and recipients must have the same length, got {len(donors)} and {len(recipients)}")
+    width = len(donors)
+    opener = opener if opener is not None else LocalOpener()
+
+    # Alice and Bob create shares of their input words and send to each other
+    inputs = [share_word(word, width) for word in pack_blood_types(recipients) + pack_blood_types(donors)]
+
+    (compatibility,) = evaluate(blood_type_circuit(), inputs, width, dealer_word, opener)
+    (status,) = opener([compatibility])
+    return unpack_bits(status, width)
+
+
+#===============
+# Write Main Function
+
+if __name__ == "__main__":
+  Alice_Blood_Type = 'ab+' # Alice's blood type (recipient type)
+  Bob_Blood_Type = 'a-' # Bob's blood type (donor type)
+
+  circuit = blood_type_circuit()
+  print(circuit)
+  for L, (and_gates, linear_gates) in enumerate(schedule(circuit)):
+      print(f"layer {L}: {len(and_gates)} AND gates opened together, {len(linear_gates)} local gates")
+
+  opener = LocalOpener()
+  (status,) = circuit_compatibility([Bob_Blood_Type], [Alice_Blood_Type], opener=opener)
+
+  print("Can Bob donate to Alice? (computed through secure MPC)", end=" ")
+  print("Yes" if status == 1 else "No")
+  print(f"{opener.rounds} rounds of openings for {circuit.and_count()} AND gates")
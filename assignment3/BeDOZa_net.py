@@ -0,0 +1,90 @@
+import os
+import sys
+import time
+
+from BeDOZa_passitve import blood_type_encoding
+from BeDOZa_sliced import share_word, pack_blood_types, unpack_bits
+from BeDOZa_circuit import blood_type_circuit, deal_triples, evaluate_party
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import transport
+
+# The BeDOZa blood type circuit with Alice and Bob talking over a
+# transport.Channel. Every party only holds its own half of each share, the
+# dealer's triples are handed out before the protocol starts (offline phase).
+#
+# Messages: input shares, then one exchange of d/e halves per AND layer
+# (see BeDOZa_circuit.schedule), then the output shares. Values are width-bit
+# words sent as fixed-size little-endian byte strings.
+# Alice always sends first and Bob receives first, so no backend deadlocks.
+
+ALICE, BOB = 0, 1
+
+
+def encode_words(words: list[int], width: int) -> bytes:
+    nbytes = (width + 7) // 8
+    return b''.join(word.to_bytes(nbytes, 'little') for word in words)
+
+
+def decode_words(data: bytes, width: int) -> list[int]:
+    nbytes = (width + 7) // 8
+    return [int.from_bytes(data[i:i + nbytes], 'little') for i in range(0, len(data), nbytes)]
+
+
+def exchange(channel: transport.Channel, party: int, mine: list[int], width: int) -> list[int]:
+    # send my words and receive the other party's, in an order that never deadlocks
+    if party == ALICE:
+        channel.send(encode_words(mine, width))
+        return decode_words(channel.recv(), width)
+    theirs = decode_words(channel.recv(), width)
+    channel.send(encode_words(mine, width))
+    return theirs
+
+
+def party(channel: transport.Channel, me: int, my_words: tuple[int, int, int], triples: list[tuple[int, int, int]], width: int) -> int:
+    # Share my input words: keep one half and send the other one
+    shares = [share_word(word, width) for word in my_words]
+    if me == ALICE:
+        mine = [x_a for x_a, _ in shares]
+        theirs = exchange(channel, me, [x_b for _, x_b in shares], width)
+        inputs = mine + theirs  # recipient (Alice) wires first, then donor (Bob)
+    else:
+        mine = [y_b for _, y_b in shares]
+        theirs = exchange(channel, me, [y_a for y_a, _ in shares], width)
+        inputs = theirs + mine
+
+    def open_values(halves: list[int]) -> list[int]:
+        other = exchange(channel, me, halves, width)
+        return [x ^ y for x, y in zip(halves, other)]
+
+    (compatibility,) = evaluate_party(blood_type_circuit(), me, inputs, triples, open_values, width)
+    (status,) = open_values([compatibility])
+    return status
+
+
+def run(recipients: list[str], donors: list[str], backend: str = "queue") -> tuple[list[int], transport.ChannelStats, transport.ChannelStats]:
+    """BeDOZa over the given transport backend, result k is 1 if donors[k] can donate to recipients[k]."""
+    if len(donors) != len(recipients):
+        raise ValueError(f"donors and recipients must have the same length, got {len(donors)} and {len(recipients)}")
+    width = len(donors)
+
+    # Dealer:
+    triples_a, triples_b = deal_triples(blood_type_circuit(), width)
+
+    status, _, stats_a, stats_b = transport.run_parties(
+        lambda channel: party(channel, ALICE, pack_blood_types(recipients), triples_a, width),
+        lambda channel: party(channel, BOB, pack_blood_types(donors), triples_b, width),
+        backend)
+    return unpack_bits(status, width), stats_a, stats_b
+
+
+if __name__ == "__main__":
+    blood_types = list(blood_type_encoding.keys())
+    recipients = [r for r in blood_types for _ in blood_types]
+    donors = [d for _ in blood_types for d in blood_types]
+
+    for backend in transport.BACKENDS:
+        start = time.perf_counter()
+        status, stats_a, stats_b = run(recipients, donors, backend)
+        seconds = time.perf_counter() - start
+        transport.report("BeDOZa", backend, stats_a, stats_b, seconds)
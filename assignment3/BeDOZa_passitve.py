@@ -56,8 +56,8 @@ def dealer() -> tuple[tuple[int, int], tuple[int, int], tuple[int, int]]:
     w = u * v
     return share(u), share(v), share(w)
 
-def and_gate(share1: tuple[int, int], share2: tuple[int, int]) -> tuple[int, int]:
-    # u, v, w are from the dealer
+def and_gate(share1: tuple[int, int], share2: tuple[int, int], dealer=dealer) -> tuple[int, int]:
+    # u, v, w are from the dealer (or any source of triples, e.g. TriplePool.dealer)
     (x_a, x_b), (y_a, y_b) = share1, share2
     (u_a, u_b), (v_a, v_b), (w_a, w_b) = dealer()
 
@@ -72,28 +72,28 @@ def and_gate(share1: tuple[int, int], share2: tuple[int, int]) -> tuple[int, int
     z_b = w_b ^ (e * x_b) ^ (d * y_b)
     return (z_a, z_b)
 
-def or_gate(share1: tuple[int, int], share2: tuple[int, int]) -> tuple[int, int]:
+def or_gate(share1: tuple[int, int], share2: tuple[int, int], dealer=dealer) -> tuple[int, int]:
     # Using De Morgan's law: x OR y = NOT(NOT x AND NOT y)
     not_x = xor_const(share1, 1)
     not_y = xor_const(share2, 1)
-    and_not = and_gate(not_x, not_y)
+    and_not = and_gate(not_x, not_y, dealer)
     return xor_const(and_not, 1)
 
-def blood_type_compatibility_tester(recipient: tuple[tuple[int, int], tuple[int, int], tuple[int, int]], donor: tuple[tuple[int, int], tuple[int, int], tuple[int, int]]) -> int:
+def blood_type_compatibility_tester(recipient: tuple[tuple[int, int], tuple[int, int], tuple[int, int]], donor: tuple[tuple[int, int], tuple[int, int], tuple[int, int]], dealer=dealer) -> int:
     # test Rh compatibility
-    Rh_compatibility = or_gate(xor_const(donor[2], 1), recipient[2])
+    Rh_compatibility = or_gate(xor_const(donor[2], 1), recipient[2], dealer)
 
     # test ABO compatibility
     # CHECK IF DONOR IS O
-    donor_is_O = or_gate(xor_const(donor[0], 1), xor_const(donor[1], 1))
+    donor_is_O = or_gate(xor_const(donor[0], 1), xor_const(donor[1], 1), dealer)
     
-    A_type = and_gate(donor[1], recipient[1])  # donor A and recipient A
-    B_type = and_gate(donor[0], recipient[0])  # donor B and recipient B
+    A_type = and_gate(donor[1], recipient[1], dealer)  # donor A and recipient A
+    B_type = and_gate(donor[0], recipient[0], dealer)  # donor B and recipient B
     
-    ABO_compatibility = or_gate(donor_is_O, or_gate(A_type, B_type))
+    ABO_compatibility = or_gate(donor_is_O, or_gate(A_type, B_type, dealer), dealer)
 
     # final compatibility
-    compatibility = and_gate(Rh_compatibility, ABO_compatibility)
+    compatibility = and_gate(Rh_compatibility, ABO_compatibility, dealer)
 
     return reconstruct(compatibility)  # 1 if compatible, 0 if not
 
@@ -0,0 +1,120 @@
+import secrets
+
+from BeDOZa_passitve import blood_type_encoding, reconstruct, xor_const, xor_gate
+
+# Bit-sliced BeDOZa: a wire holds (x_a, x_b) where x_a and x_b are width-bit
+# words instead of single bits. Bit k of every word belongs to instance k, so one
+# pass through a gate evaluates it for `width` independent inputs at once
+# (width = 64*k gives k machine words per share).
+#
+# XOR gates and XOR with a constant are the same as in BeDOZa_passitve.py, a NOT
+# is xor_const with the all-ones word. Only sharing, the dealer and AND change.
+
+
+def ones(width: int) -> int:
+    # the all-ones word, xor_const(share, ones(width)) is a NOT on every instance
+    return (1 << width) - 1
+
+
+# Making the Shares
+def share_word(secret: int, width: int) -> tuple[int, int]:
+    # Secret share every bit of the word 'secret' between Alice and Bob.
+    x_b = secrets.randbits(width)  # Bob's share
+    x_a = secret ^ x_b             # Alice's share
+    return (x_a, x_b)
+
+
+# Dealer Gates
+def dealer_word(width: int) -> tuple[tuple[int, int], tuple[int, int], tuple[int, int]]:
+    # Dealer provides width triples at once, w = u AND v bitwise
+    u = secrets.randbits(width)
+    v = secrets.randbits(width)
+    w = u & v
+    return share_word(u, width), share_word(v, width), share_word(w, width)
+
+
+def and_gate_word(share1: tuple[int, int], share2: tuple[int, int], width: int, dealer_word=dealer_word) -> tuple[int, int]:
+    # u, v, w are from the dealer (or TriplePool.dealer_word), multiplication of bits is AND of words
+    (x_a, x_b), (y_a, y_b) = share1, share2
+    (u_a, u_b), (v_a, v_b), (w_a, w_b) = dealer_word(width)
+
+    d = xor_gate((x_a, x_b), (u_a, u_b))
+    e = xor_gate((y_a, y_b), (v_a, v_b))
+
+    # d and e become public
+    d = reconstruct(d)
+    e = reconstruct(e)
+
+    z_a = w_a ^ (e & x_a) ^ (d & y_a) ^ (d & e)
+    z_b = w_b ^ (e & x_b) ^ (d & y_b)
+    return (z_a, z_b)
+
+
+def or_gate_word(share1: tuple[int, int], share2: tuple[int, int], width: int, dealer_word=dealer_word) -> tuple[int, int]:
+    # Using De Morgan's law: x OR y = NOT(NOT x AND NOT y)
+    not_x = xor_const(share1, ones(width))
+    not_y = xor_const(share2, ones(width))
+    and_not = and_gate_word(not_x, not_y, width, dealer_word)
+    return xor_const(and_not, ones(width))
+
+
+def blood_type_compatibility_tester_sliced(recipient: tuple[tuple[int, int], tuple[int, int], tuple[int, int]], donor: tuple[tuple[int, int], tuple[int, int], tuple[int, int]], width: int, dealer_word=dealer_word) -> int:
+    # Same formula as blood_type_compatibility_tester, bit k of the result is instance k
+    # test Rh compatibility
+    Rh_compatibility = or_gate_word(xor_const(donor[2], ones(width)), recipient[2], width, dealer_word)
+
+    # test ABO compatibility
+    # CHECK IF DONOR IS O
+    donor_is_O = or_gate_word(xor_const(donor[0], ones(width)), xor_const(donor[1], ones(width)), width, dealer_word)
+
+    A_type = and_gate_word(donor[1], recipient[1], width, dealer_word)  # donor A and recipient A
+    B_type = and_gate_word(donor[0], recipient[0], width, dealer_word)  # donor B and recipient B
+
+    ABO_compatibility = or_gate_word(donor_is_O, or_gate_word(A_type, B_type, width, dealer_word), width, dealer_word)
+
+    # final compatibility
+    compatibility = and_gate_word(Rh_compatibility, ABO_compatibility, width, dealer_word)
+
+    return reconstruct(compatibility)  # bit k is 1 if pair k is compatible
+
+
+# Packing inputs
+def pack_blood_types(blood_types: list[str]) -> tuple[int, int, int]:
+    # bit k of word i is bit i of blood_type_encoding[blood_types[k]]
+    # (built as a binary string, most significant bit = last instance)
+    encoded = [blood_type_encoding[blood_type] for blood_type in reversed(blood_types)]
+    words = [int('0' + ''.join(['1' if bits[i] else '0' for bits in encoded]), 2) for i in range(3)]
+    return words[0], words[1], words[2]
+
+
+def unpack_bits(word: int, width: int) -> list[int]:
+    # inverse of the packing above, [bit 0, bit 1, ..., bit width-1]
+    return [int(c) for c in reversed(format(word, f'0{width}b'))] if width else []
+
+
+def sliced_compatibility(donors: list[str], recipients: list[str], dealer_word=dealer_word) -> list[int]:
+    """Run the protocol for every (donors[k], recipients[k]) pair in one pass, 1 if compatible."""
+    if len(donors) != len(recipients):
+        raise ValueError(f"donors and recipients must have the same length, got {len(donors)} and {len(recipients)}")
+    width = len(donors)
+
+    # Alice and Bob create shares of their input words and send to each other
+    alice_share = tuple(share_word(word, width) for word in pack_blood_types(recipients))
+    bob_share = tuple(share_word(word, width) for word in pack_blood_types(donors))
+
+    status = blood_type_compatibility_tester_sliced(alice_share, bob_share, width, dealer_word)
+    return unpack_bits(status, width)
+
+
+#===============
+# Write Main Function
+
+if __name__ == "__main__":
+  blood_types = list(blood_type_encoding.keys())
+  Alice_Blood_Types = [r for r in blood_types for _ in blood_types]  # recipients
+  Bob_Blood_Types = [d for _ in blood_types for d in blood_types]  # donors
+
+  status = sliced_compatibility(Bob_Blood_Types, Alice_Blood_Types)
+
+  for alice, bob, ok in zip(Alice_Blood_Types, Bob_Blood_Types, status):
+      print(f"Can {bob} donate to {alice}? (computed through secure MPC)", "Yes" if ok == 1 else "No")
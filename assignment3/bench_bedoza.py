@@ -0,0 +1,106 @@
+"""
+Benchmarks for the BeDOZa blood type protocol.
+Run with: python bench_bedoza.py [N]
+"""
+import random
+import sys
+import time
+
+from BeDOZa_passitve import blood_type_encoding, share, blood_type_compatibility_tester
+from BeDOZa_sliced import pack_blood_types, share_word, blood_type_compatibility_tester_sliced
+from triple_pool import TriplePool
+from BeDOZa_circuit import LocalOpener, blood_type_circuit, circuit_compatibility
+
+blood_types = list(blood_type_encoding.keys())
+
+
+def random_pairs(N: int) -> list[tuple[str, str]]:
+    # (alice/recipient, bob/donor) pairs
+    return [(random.choice(blood_types), random.choice(blood_types)) for _ in range(N)]
+
+
+def bench_scalar(pairs: list[tuple[str, str]], **dealer) -> float:
+    start = time.perf_counter()
+    for alice, bob in pairs:
+        alice_share = tuple(share(bit) for bit in blood_type_encoding[alice])
+        bob_share = tuple(share(bit) for bit in blood_type_encoding[bob])
+        blood_type_compatibility_tester(alice_share, bob_share, **dealer)
+    return time.perf_counter() - start
+
+
+def bench_sliced(pairs: list[tuple[str, str]], width: int, **dealer_word) -> float:
+    # width pairs per pass through the circuit
+    start = time.perf_counter()
+    for i in range(0, len(pairs), width):
+        chunk = pairs[i:i + width]
+        alice_share = tuple(share_word(word, len(chunk)) for word in pack_blood_types([alice for alice, _ in chunk]))
+        bob_share = tuple(share_word(word, len(chunk)) for word in pack_blood_types([bob for _, bob in chunk]))
+        blood_type_compatibility_tester_sliced(alice_share, bob_share, len(chunk), **dealer_word)
+    return time.perf_counter() - start
+
+
+AND_GATES = 7  # AND gates (incl. the ones inside OR) in blood_type_compatibility_tester
+
+
+def bench_online_latency(pairs: list[tuple[str, str]]):
+    # online phase latency per comparison, triples from the inline dealer vs. a pre-filled pool
+    N = len(pairs)
+    t_inline = bench_scalar(pairs)
+
+    pool = TriplePool()
+    start = time.perf_counter()
+    pool.fill(N * AND_GATES)
+    t_offline = time.perf_counter() - start
+    t_pool = bench_scalar(pairs, dealer=pool.dealer)
+
+    print(f"scalar, inline dealer   {t_inline / N * 1e6:8.2f} us/comparison")
+    print(f"scalar, triple pool     {t_pool / N * 1e6:8.2f} us/comparison  (offline fill {t_offline:.3f}s)")
+
+    width = 1024
+    t_inline = bench_sliced(pairs, width)
+    pool = TriplePool()
+    pool.fill(N * AND_GATES)
+    t_pool = bench_sliced(pairs, width, dealer_word=pool.dealer_word)
+    print(f"sliced, inline dealer   {t_inline / N * 1e6:8.2f} us/comparison  (width={width})")
+    print(f"sliced, triple pool     {t_pool / N * 1e6:8.2f} us/comparison  (width={width})")
+
+    # refill thread, starting from an empty pool
+    pool = TriplePool()
+    pool.start_refill(low=1 << 16, high=1 << 18)
+    t_refill = bench_scalar(pairs, dealer=pool.dealer)
+    pool.stop()
+    print(f"scalar, refill thread   {t_refill / N * 1e6:8.2f} us/comparison  {pool.stats}")
+
+
+def report(name: str, N: int, seconds: float):
+    print(f"{name:<22} N={N:<8} {seconds:8.4f}s  {N / seconds:12.0f} comparisons/s")
+
+
+def bench_circuit(pairs: list[tuple[str, str]], width: int = 1024):
+    # layered circuit evaluation: rounds of openings and throughput
+    circuit = blood_type_circuit()
+    opener = LocalOpener()
+    start = time.perf_counter()
+    for i in range(0, len(pairs), width):
+        chunk = pairs[i:i + width]
+        circuit_compatibility([bob for _, bob in chunk], [alice for alice, _ in chunk], opener=opener)
+    seconds = time.perf_counter() - start
+    passes = (len(pairs) + width - 1) // width
+    report(f"circuit width={width}", len(pairs), seconds)
+    print(f"rounds per pass: {opener.rounds // passes} layered vs {circuit.and_count() + 1} gate by gate "
+          f"({circuit.and_count()} AND gates + output)")
+
+
+if __name__ == "__main__":
+    N = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    pairs = random_pairs(N)
+
+    t_scalar = bench_scalar(pairs)
+    report("scalar", N, t_scalar)
+    for width in (64, 64 * 16, 64 * 256, N):
+        t_sliced = bench_sliced(pairs, width)
+        report(f"sliced width={width}", N, t_sliced)
+    bench_circuit(pairs)
+
+    print()
+    bench_online_latency(pairs)
@@ -0,0 +1,180 @@
+"""
+Tests for the BeDOZa blood type protocol.
+Run with: pytest test_bedoza.py
+"""
+import random
+import threading
+import time
+import unittest
+from unittest import mock
+from BeDOZa_passitve import blood_type_encoding, share, reconstruct, blood_type_compatibility_tester
+from BeDOZa_sliced import sliced_compatibility, pack_blood_types, unpack_bits
+import triple_pool
+from triple_pool import TriplePool
+import BeDOZa_net
+from BeDOZa_circuit import CircuitBuilder, LocalOpener, blood_type_circuit, circuit_compatibility, evaluate, schedule
+
+blood_types = list(blood_type_encoding.keys())
+
+
+def scalar_compatibility(donor: str, recipient: str) -> int:
+    alice_share = tuple(share(bit) for bit in blood_type_encoding[recipient])
+    bob_share = tuple(share(bit) for bit in blood_type_encoding[donor])
+    return blood_type_compatibility_tester(alice_share, bob_share)
+
+
+class TestSliced(unittest.TestCase):
+
+    def test_all_pairs_match_scalar(self):
+        """One sliced pass over all 64 pairs gives the scalar answers."""
+        donors = [d for d in blood_types for _ in blood_types]
+        recipients = [r for _ in blood_types for r in blood_types]
+        status = sliced_compatibility(donors, recipients)
+        assert status == [scalar_compatibility(d, r) for d, r in zip(donors, recipients)]
+
+    def test_wide_words(self):
+        donors = [random.choice(blood_types) for _ in range(1000)]
+        recipients = [random.choice(blood_types) for _ in range(1000)]
+        status = sliced_compatibility(donors, recipients)
+        assert status == [scalar_compatibility(d, r) for d, r in zip(donors, recipients)]
+
+    def test_packing(self):
+        types = ['a+', 'o-', 'ab-']
+        words = pack_blood_types(types)
+        for i in range(3):
+            assert unpack_bits(words[i], 3) == [blood_type_encoding[t][i] for t in types]
+        assert unpack_bits(0, 0) == []
+
+
+class TestTriplePool(unittest.TestCase):
+
+    def check_triple(self, triple, mask=1):
+        (u_a, u_b), (v_a, v_b), (w_a, w_b) = triple
+        assert (u_a ^ u_b) & (v_a ^ v_b) == w_a ^ w_b
+        assert max(u_a, u_b, v_a, v_b, w_a, w_b) <= mask
+
+    def test_bits_and_words(self):
+        """Bit and word triples are valid, also across block boundaries."""
+        pool = TriplePool(block_bits=64)
+        pool.fill(1000)
+        assert pool.depth() >= 1000
+        for width in (1, 3, 100, 64):
+            self.check_triple(pool.dealer())
+            self.check_triple(pool.dealer_word(width), (1 << width) - 1)
+        assert pool.stats.exhausted == 0
+
+    def test_exhaustion(self):
+        pool = TriplePool(block_bits=8)
+        self.check_triple(pool.dealer())
+        assert pool.stats.exhausted == 1
+        assert pool.depth() == 7
+
+    def test_protocol_with_pool(self):
+        pool = TriplePool(block_bits=256)
+        pool.fill(7 * 64)
+        donors = [d for d in blood_types for _ in blood_types]
+        recipients = [r for _ in blood_types for r in blood_types]
+        expected = sliced_compatibility(donors, recipients)
+        for donor, recipient, z in zip(donors, recipients, expected):
+            alice_share = tuple(share(bit) for bit in blood_type_encoding[recipient])
+            bob_share = tuple(share(bit) for bit in blood_type_encoding[donor])
+            assert blood_type_compatibility_tester(alice_share, bob_share, dealer=pool.dealer) == z
+        assert pool.stats.served == 7 * 64
+        assert sliced_compatibility(donors, recipients, dealer_word=pool.dealer_word) == expected
+
+    def test_refill_thread(self):
+        pool = TriplePool(block_bits=64)
+        pool.start_refill(low=128, high=512)
+        for _ in range(2000):
+            self.check_triple(pool.dealer())
+        self.check_triple(pool.dealer_word(1000), (1 << 1000) - 1)
+        pool.stop()
+        assert pool.stats.refills > 0
+
+    def test_stop_wakes_waiting_dealer(self):
+        """stop() while a request waits for the refill thread raises instead of hanging."""
+        real = triple_pool.generate_block
+
+        def slow_block(nbits):
+            time.sleep(0.05)
+            return real(nbits)
+
+        errors = []
+
+        def request():
+            try:
+                pool.dealer_word(800)  # 100 blocks, about 5 seconds of refills
+            except RuntimeError as e:
+                errors.append(e)
+
+        with mock.patch.object(triple_pool, "generate_block", slow_block):
+            pool = TriplePool(block_bits=8)
+            pool.start_refill(low=0, high=0)
+            thread = threading.Thread(target=request)
+            thread.start()
+            time.sleep(0.1)
+            pool.stop()
+            thread.join(2)
+        assert not thread.is_alive() and len(errors) == 1
+
+
+class TestCircuit(unittest.TestCase):
+
+    def test_blood_type_circuit(self):
+        """The circuit agrees with the hand-written tester, in one opening per AND layer."""
+        donors = [d for d in blood_types for _ in blood_types]
+        recipients = [r for _ in blood_types for r in blood_types]
+        opener = LocalOpener()
+        status = circuit_compatibility(donors, recipients, opener=opener)
+        assert status == [scalar_compatibility(d, r) for d, r in zip(donors, recipients)]
+        # 4 AND layers plus opening the output
+        assert len(schedule(blood_type_circuit())) == 5
+        assert opener.rounds == 5
+        assert opener.opened == 2 * blood_type_circuit().and_count() + 1
+
+    def test_scalar_shares_and_pool(self):
+        pool = TriplePool(block_bits=64)
+        circuit = blood_type_circuit()
+        for donor in blood_types:
+            inputs = [share(bit) for bit in blood_type_encoding['b+'] + blood_type_encoding[donor]]
+            (z,) = evaluate(circuit, inputs, dealer_word=pool.dealer_word)
+            assert reconstruct(z) == scalar_compatibility(donor, 'b+')
+
+    def test_layers(self):
+        """x0 & x1 & x2 & x3 as a chain has 3 layers, as a tree 2."""
+        chain = CircuitBuilder(4)
+        chain_out = chain.and_(chain.and_(chain.and_(0, 1), 2), 3)
+        tree = CircuitBuilder(4)
+        tree_out = tree.and_(tree.and_(0, 1), tree.and_(2, 3))
+        for builder, out, depth in ((chain, chain_out, 3), (tree, tree_out, 2)):
+            circuit = builder.build([out])
+            assert len(schedule(circuit)) == depth + 1
+            for x in range(16):
+                bits = [(x >> i) & 1 for i in range(4)]
+                (z,) = evaluate(circuit, [share(bit) for bit in bits])
+                assert reconstruct(z) == int(x == 15)
+
+    def test_constant_gates(self):
+        c = CircuitBuilder(1)
+        circuit = c.build([c.and_const(0, 1), c.and_const(0, 0), c.xor_const(0, 1), c.xor(0, 0)])
+        for bit in (0, 1):
+            outputs = evaluate(circuit, [share(bit)])
+            assert [reconstruct(z) for z in outputs] == [bit, 0, 1 - bit, 0]
+
+
+class TestNetwork(unittest.TestCase):
+
+    def test_parties_over_transport(self):
+        """Each party only holds its halves, the result matches the in-process circuit."""
+        donors = [d for d in blood_types for _ in blood_types]
+        recipients = [r for _ in blood_types for r in blood_types]
+        expected = circuit_compatibility(donors, recipients)
+        for backend in ("queue", "tcp"):
+            status, stats_a, stats_b = BeDOZa_net.run(recipients, donors, backend)
+            assert status == expected
+            # input shares, 4 AND layers, output
+            assert stats_a.rounds == stats_b.rounds == 6
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,175 @@
+import secrets
+import threading
+from collections import deque
+
+# Offline Beaver triple pool for BeDOZa.
+#
+# The dealer's triples ([u], [v], [w]) with w = u*v are generated in bulk before
+# the inputs are known (offline phase) and stored packed: a block of n triples is
+# six n-bit strings u_a, u_b, v_a, v_b, w_a, w_b, where bit k of each string
+# belongs to triple k. The online phase only reads bits out of these blocks.
+#
+# TriplePool.dealer is a drop-in for dealer() in BeDOZa_passitve.py and
+# TriplePool.dealer_word for dealer_word() in BeDOZa_sliced.py, e.g.
+#   pool = TriplePool(); pool.fill(10000)
+#   blood_type_compatibility_tester(alice_share, bob_share, dealer=pool.dealer)
+
+
+def generate_block(nbits: int) -> tuple[bytes, bytes, bytes, bytes, bytes, bytes]:
+    # nbits shared triples at once: (u_a, u_b, v_a, v_b, w_a, w_b), bit k of each is triple k
+    u = secrets.randbits(nbits)
+    v = secrets.randbits(nbits)
+    w = u & v
+    u_b, v_b, w_b = secrets.randbits(nbits), secrets.randbits(nbits), secrets.randbits(nbits)
+    nbytes = (nbits + 7) // 8
+    return tuple(x.to_bytes(nbytes, 'little') for x in (u ^ u_b, u_b, v ^ v_b, v_b, w ^ w_b, w_b))
+
+
+class PoolStats:
+    def __init__(self):
+        self.generated = 0  # triples generated (offline, refill thread or on exhaustion)
+        self.served = 0     # triples handed to the online phase, bit or word triples count as 1 per bit
+        self.wasted = 0     # triples skipped to byte-align word requests
+        self.exhausted = 0  # times the online phase found the pool empty
+        self.refills = 0    # blocks added by the refill thread
+
+    def __repr__(self):
+        return (f"PoolStats(generated={self.generated}, served={self.served}, wasted={self.wasted}, "
+                f"exhausted={self.exhausted}, refills={self.refills})")
+
+
+class TriplePool:
+    def __init__(self, block_bits: int = 1 << 16):
+        if block_bits <= 0 or block_bits % 8:
+            raise ValueError(f"block_bits must be a positive multiple of 8, got {block_bits}")
+        self.block_bits = block_bits
+        self.blocks = deque()  # blocks not yet fully consumed, the first one is being read
+        self.position = 0      # bit position in self.blocks[0]
+        self.needed = 0        # triples an online request is waiting for
+        self.low = 0           # refill thread wakes up when the depth drops below this
+        self.stats = PoolStats()
+
+        self.lock = threading.Lock()
+        self.available = threading.Condition(self.lock)
+        self.refill_thread = None
+        self.stop_refill = threading.Event()
+
+    def __repr__(self):
+        return f"TriplePool(depth={self.depth()}, {self.stats})"
+
+    def depth(self) -> int:
+        # number of triples left in the pool
+        with self.lock:
+            return self._depth()
+
+    def _depth(self) -> int:
+        return len(self.blocks) * self.block_bits - self.position
+
+    # offline phase
+    def fill(self, count: int):
+        """Generate blocks until at least count triples are in the pool."""
+        while self.depth() < count:
+            self._add(generate_block(self.block_bits))
+
+    def _add(self, block, refill: bool = False):
+        with self.lock:
+            self.blocks.append(block)
+            self.stats.generated += self.block_bits
+            if refill:
+                self.stats.refills += 1
+            self.available.notify_all()
+
+    def start_refill(self, low: int, high: int):
+        """Background thread that tops the pool up to high triples whenever it drops below low."""
+        if self.refill_thread is not None:
+            raise ValueError("refill thread already running")
+        if not 0 <= low <= high:
+            raise ValueError(f"need 0 <= low <= high, got low={low}, high={high}")
+        self.stop_refill.clear()
+        self.low = low
+
+        def refill():
+            while not self.stop_refill.is_set():
+                with self.lock:
+                    while self._depth() >= max(low, self.needed) and not self.stop_refill.is_set():
+                        self.available.wait()
+                    target = max(high, self.needed)
+                while self.depth() < target and not self.stop_refill.is_set():
+                    self._add(generate_block(self.block_bits), refill=True)
+
+        self.refill_thread = threading.Thread(target=refill, name="triple-pool-refill", daemon=True)
+        self.refill_thread.start()
+
+    def stop(self):
+        """Stops the refill thread, an online request still waiting for it raises RuntimeError."""
+        if self.refill_thread is None:
+            return
+        with self.lock:
+            self.stop_refill.set()
+            self.available.notify_all()
+        self.refill_thread.join()
+        self.refill_thread = None
+
+    # online phase
+    def _wait_for(self, nbits: int):
+        # called with the lock held, makes sure nbits triples are in the pool
+        if self._depth() >= nbits:
+            return
+        self.stats.exhausted += 1
+        if self.refill_thread is not None:
+            self.needed = nbits
+            self.available.notify_all()  # wake the refill thread
+            while self._depth() < nbits:
+                if self.stop_refill.is_set():
+                    self.needed = 0
+                    raise RuntimeError(f"triple pool stopped while waiting for {nbits} triples")
+                self.available.wait()
+            self.needed = 0
+        else:
+            while self._depth() < nbits:
+                self.blocks.append(generate_block(self.block_bits))
+                self.stats.generated += self.block_bits
+
+    def _advance(self, nbits: int):
+        self.position += nbits
+        while self.blocks and self.position >= self.block_bits:
+            self.blocks.popleft()
+            self.position -= self.block_bits
+        if self.refill_thread is not None and self._depth() < self.low:
+            self.available.notify_all()
+
+    def dealer(self) -> tuple[tuple[int, int], tuple[int, int], tuple[int, int]]:
+        """One bit triple, same format as dealer() in BeDOZa_passitve.py."""
+        with self.lock:
+            self._wait_for(1)
+            block = self.blocks[0]
+            byte, bit = self.position >> 3, self.position & 7
+            u_a, u_b, v_a, v_b, w_a, w_b = [(part[byte] >> bit) & 1 for part in block]
+            self._advance(1)
+            self.stats.served += 1
+        return (u_a, u_b), (v_a, v_b), (w_a, w_b)
+
+    def dealer_word(self, width: int) -> tuple[tuple[int, int], tuple[int, int], tuple[int, int]]:
+        """width triples as words, same format as dealer_word() in BeDOZa_sliced.py."""
+        with self.lock:
+            skip = -self.position % 8  # word triples start on a byte boundary
+            self._wait_for(skip + width)
+            self._advance(skip)
+            self.stats.wasted += skip
+
+            words = [0] * 6
+            taken = 0
+            while taken < width:
+                block = self.blocks[0]
+                start = self.position >> 3
+                nbits = min(width - taken, self.block_bits - self.position)
+                end = start + (nbits + 7) // 8
+                for i, part in enumerate(block):
+                    words[i] |= int.from_bytes(part[start:end], 'little') << taken
+                taken += nbits
+                self._advance(nbits)
+            self.stats.served += width
+
+        mask = (1 << width) - 1
+        u_a, u_b, v_a, v_b, w_a, w_b = [word & mask for word in words]
+        return (u_a, u_b), (v_a, v_b), (w_a, w_b)
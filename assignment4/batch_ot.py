@@ -0,0 +1,119 @@
+import os
+import secrets
+import sys
+
+from elgamal import decode_message, encode_message
+from groups import Group, ModPGroup
+from ot import Bob
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import transport
+
+# Batched 1-out-of-8 OT: N transfers with one message in each direction.
+#
+# Alice has N choice indices b_k in 0..7, Bob has N vectors of 8 bits. All keys
+# and ciphertexts are flat arrays of group elements, entry 8k + i belongs to
+# transfer k, message i:
+#   Alice -> Bob  pks[8k + i]   public keys, the real one at i = b_k, the other 7 oblivious
+#   Bob -> Alice  c1[k]         g^y_k, shared by the 8 ciphertexts of transfer k
+#                 c2[8k + i]    m_ki * pks[8k + i]^y_k
+# Reusing y_k for the 8 public keys of one transfer is still secure (the keys are
+# independent), it saves 7 exponentiations and 7 elements per transfer. The group
+# precomputation (the generator table) is shared by all N transfers.
+# Over the wire the arrays are packed with Group.pack, element_size() bytes each.
+
+CHOICES = 8
+
+
+def as_group(G) -> Group:
+    # a (p, q, g) tuple from elgamal.py or a Group
+    return G if isinstance(G, Group) else ModPGroup(*G)
+
+
+def batch_choose(choices: list[int], G) -> tuple[list, list[int]]:
+    """Alice: (flat list of 8N public keys, her N secret keys)."""
+    G = as_group(G)
+    pks, sks = [], []
+    for b in choices:
+        if not 0 <= b < CHOICES:
+            raise ValueError(f"choice should be in range [0, {CHOICES - 1}], you gave {b}")
+        for i in range(CHOICES):
+            if i == b:
+                sk = G.random_exponent()
+                pks.append(G.power_g(sk))
+                sks.append(sk)
+            else:
+                pks.append(G.oblivious_element(secrets.randbelow(G.q - 1) + 1))
+    return pks, sks
+
+
+def batch_transfer(pks: list, messages: list[list[int]], G) -> tuple[list, list]:
+    """Bob: encrypts messages[k][i] under pks[8k + i], returns the flat arrays (c1, c2)."""
+    G = as_group(G)
+    if len(pks) != CHOICES * len(messages):
+        raise ValueError(f"need {CHOICES} public keys per message vector, got {len(pks)} keys for {len(messages)} vectors")
+    encoded = [encode_message(0, G), encode_message(1, G)]
+    c1, c2 = [], []
+    for k, vector in enumerate(messages):
+        if len(vector) != CHOICES:
+            raise ValueError(f"message vector {k} should have {CHOICES} entries, got {len(vector)}")
+        y = G.random_exponent()
+        c1.append(G.power_g(y))
+        for i, bit in enumerate(vector):
+            c2.append(G.mul(encoded[bit], G.power(pks[CHOICES * k + i], y)))
+    return c1, c2
+
+
+def batch_retrieve(c1: list, c2: list, choices: list[int], sks: list[int], G) -> list[int]:
+    """Alice: the chosen bit of every transfer."""
+    G = as_group(G)
+    if not len(c1) == len(choices) == len(sks) or len(c2) != CHOICES * len(choices):
+        raise ValueError(f"got {len(c1)} c1 and {len(c2)} c2 entries for {len(choices)} choices")
+    result = []
+    for k, (b, sk) in enumerate(zip(choices, sks)):
+        s = G.power(c1[k], sk)
+        result.append(decode_message(G.mul(c2[CHOICES * k + b], G.inv(s)), G))
+    return result
+
+
+def batch_ot(choices: list[int], messages: list[list[int]], G) -> list[int]:
+    # both parties in one process, [messages[k][choices[k]] for every k]
+    pks, sks = batch_choose(choices, G)
+    c1, c2 = batch_transfer(pks, messages, G)
+    return batch_retrieve(c1, c2, choices, sks, G)
+
+
+def compatibility_rows(donors: list[str]) -> list[list[int]]:
+    # Bob's message vector for each donor blood type, as in ot.Bob.transfer_c
+    bob = Bob('o-', verbose=False)
+    return [bob.compatibility[bob.blood_type_encoding[donor]] for donor in donors]
+
+
+def alice(channel: transport.Channel, recipients: list[str], G) -> list[int]:
+    G = as_group(G)
+    bob = Bob('o-', verbose=False)
+    choices = [bob.blood_type_encoding[recipient] for recipient in recipients]
+    pks, sks = batch_choose(choices, G)
+    channel.send(G.pack(pks))
+    c1 = G.unpack(channel.recv())
+    c2 = G.unpack(channel.recv())
+    return batch_retrieve(c1, c2, choices, sks, G)
+
+
+def bob(channel: transport.Channel, donors: list[str], G):
+    G = as_group(G)
+    pks = G.unpack(channel.recv())
+    c1, c2 = batch_transfer(pks, compatibility_rows(donors), G)
+    channel.send(G.pack(c1))
+    channel.send(G.pack(c2))
+
+
+def run(recipients: list[str], donors: list[str], G, backend: str = "queue") -> tuple[list[int], transport.ChannelStats, transport.ChannelStats]:
+    """len(recipients) OTs in one round trip, 1 where donors[k] can donate to recipients[k]."""
+    if len(donors) != len(recipients):
+        raise ValueError(f"donors and recipients must have the same length, got {len(donors)} and {len(recipients)}")
+    result, _, stats_a, stats_b = transport.run_parties(
+        lambda channel: alice(channel, recipients, G),
+        lambda channel: bob(channel, donors, G),
+        backend)
+    return result, stats_a, stats_b
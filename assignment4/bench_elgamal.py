@@ -0,0 +1,90 @@
+"""
+Benchmarks for ElGamal key generation, encryption and decryption per group size.
+Run with: python bench_elgamal.py [N] [generate]
+
+Without `generate` only the toy group, the standardized groups and generated groups
+already in the cache are measured. With it, missing 2048/3072-bit groups are
+generated first (takes minutes, once) and cached.
+"""
+import sys
+import time
+
+import elgamal
+import fixed_base
+
+
+def bench_group(name: str, G: elgamal.GroupDescription, N: int):
+    start = time.perf_counter()
+    keys = [elgamal.elgamal_Gen(G) for _ in range(N)]
+    t_gen = time.perf_counter() - start
+
+    m = elgamal.encode_message(0, G)
+    start = time.perf_counter()
+    cts = [elgamal.elgamal_Enc(pk, m) for pk, _ in keys]
+    t_enc = time.perf_counter() - start
+
+    start = time.perf_counter()
+    ok = all(elgamal.elgamal_Dec(c, sk, pk) == m for c, (pk, sk) in zip(cts, keys))
+    t_dec = time.perf_counter() - start
+
+    print(f"{name:<14} {G[0].bit_length():>5} bits  Gen {t_gen / N * 1e3:8.3f} ms  "
+          f"Enc {t_enc / N * 1e3:8.3f} ms  Dec {t_dec / N * 1e3:8.3f} ms  ok={ok}")
+
+
+def bench_fixed_base(name: str, G: elgamal.GroupDescription, N: int):
+    # elgamal_Enc with plain pow() vs. precomputed tables for g and a reused public key
+    cache = fixed_base.default_cache
+    pk, sk = elgamal.elgamal_Gen(G)
+    m = elgamal.encode_message(0, G)
+
+    max_tables = cache.max_tables
+    cache.max_tables = 0  # disabled
+    start = time.perf_counter()
+    for _ in range(N):
+        elgamal.elgamal_Enc(pk, m)
+    t_plain = time.perf_counter() - start
+    cache.max_tables = max_tables
+
+    cache.clear()
+    start = time.perf_counter()
+    for _ in range(cache.threshold):
+        elgamal.elgamal_Enc(pk, m)  # tables for g and h are built on the last of these
+    t_build = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(N):
+        elgamal.elgamal_Enc(pk, m)
+    t_table = time.perf_counter() - start
+
+    # OT pattern: every ciphertext under a fresh public key, only g is reused
+    pks = [elgamal.elgamal_Gen(G)[0] for _ in range(N)]
+    start = time.perf_counter()
+    for pk_i in pks:
+        elgamal.elgamal_Enc(pk_i, m)
+    t_fresh = time.perf_counter() - start
+
+    print(f"{name:<14} Enc pow {t_plain / N * 1e3:8.3f} ms  tables {t_table / N * 1e3:8.3f} ms "
+          f"({t_plain / t_table:4.1f}x, warm-up {t_build * 1e3:.0f} ms)  fresh pk {t_fresh / N * 1e3:8.3f} ms")
+
+
+if __name__ == "__main__":
+    N = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    generate = "generate" in sys.argv[2:]
+
+    bench_group("toy", elgamal.elgamal_safe_GGen(), N)
+    for name in elgamal.STANDARD_GROUPS:
+        bench_group(name, elgamal.standard_group(name), N)
+
+    cached = elgamal.load_groups()
+    for bits in (2048, 3072):
+        if bits in cached or generate:
+            start = time.perf_counter()
+            G = elgamal.elgamal_safe_GGen(bits)
+            print(f"loading/generating the {bits}-bit group took {time.perf_counter() - start:.2f} s")
+            bench_group("generated", G, N)
+        else:
+            print(f"no cached {bits}-bit group in {elgamal.CACHE_PATH}, run with `generate` to create it")
+
+    print("\nfixed-base precomputation")
+    for name in elgamal.STANDARD_GROUPS:
+        bench_fixed_base(name, elgamal.standard_group(name), N)
+    print(fixed_base.default_cache)
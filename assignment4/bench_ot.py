@@ -0,0 +1,90 @@
+"""
+Benchmark of the 1-out-of-8 OT in ot.py on each group backend.
+Run with: python bench_ot.py [N]
+"""
+import pickle
+import random
+import sys
+import time
+
+import os
+import tempfile
+
+import batch_ot
+import elgamal
+import rot_pool
+from ot import Alice, Bob
+
+blood_types = ['o-', 'o+', 'a-', 'a+', 'b-', 'b+', 'ab-', 'ab+']
+
+
+def bench_ot(name: str, N: int):
+    G = elgamal.elgamal_group(name)
+    bytes_total = 0
+    start = time.perf_counter()
+    for _ in range(N):
+        alice = Alice(random.choice(blood_types), verbose=False, group=G)
+        bob = Bob('o-', verbose=False, group=G)  # o- can donate to everyone
+        pk_list = alice.choose_b()
+        c = bob.transfer_c(pk_list)
+        assert alice.retreive(c) == 1
+        bytes_total += len(pickle.dumps(pk_list)) + len(pickle.dumps(c))
+    seconds = time.perf_counter() - start
+    print(f"{name:<10} element {G.element_size():>4} B  {N / seconds:10.2f} OT/s  "
+          f"{seconds / N * 1e3:9.2f} ms/OT  {bytes_total / N:8.0f} B/OT pickled")
+
+
+def bench_batch(name: str, N: int):
+    # N OTs through batch_ot over the queue transport, one message each way
+    G = elgamal.elgamal_group(name)
+    recipients = [random.choice(blood_types) for _ in range(N)]
+    start = time.perf_counter()
+    result, stats_a, stats_b = batch_ot.run(recipients, ['o-'] * N, G)
+    seconds = time.perf_counter() - start
+    assert result == [1] * N
+    print(f"{name:<10} batch {N:>5}  {N / seconds:10.2f} OT/s  {seconds / N * 1e3:9.2f} ms/OT  "
+          f"{(stats_a.bytes_sent + stats_b.bytes_sent) / N:8.0f} B/OT on the wire")
+
+
+def bench_rot(name: str, N: int):
+    # offline: fill the random OT pools, online: derandomize one OT at a time and as a batch
+    G = elgamal.elgamal_group(name)
+    sender, receiver = rot_pool.ROTPool(rot_pool.SENDER), rot_pool.ROTPool(rot_pool.RECEIVER)
+    start = time.perf_counter()
+    rot_pool.fill(sender, receiver, 2 * N + 1000, G)
+    t_offline = time.perf_counter() - start
+
+    choices = [random.randrange(8) for _ in range(N)]
+    messages = [[random.randrange(2) for _ in range(8)] for _ in range(N)]
+    start = time.perf_counter()
+    for b, m in zip(choices, messages):
+        rot_pool.rot_ot(sender, receiver, [b], [m])
+    t_single = time.perf_counter() - start
+    start = time.perf_counter()
+    assert rot_pool.rot_ot(sender, receiver, choices, messages) == [m[b] for b, m in zip(choices, messages)]
+    t_batch = time.perf_counter() - start
+
+    # file-backed pools write the position through before every OT
+    with tempfile.TemporaryDirectory() as tmp:
+        sender.save(os.path.join(tmp, "sender.rot"))
+        receiver.save(os.path.join(tmp, "receiver.rot"))
+        M = min(N, 200)
+        start = time.perf_counter()
+        for b, m in zip(choices[:M], messages[:M]):
+            rot_pool.rot_ot(sender, receiver, [b], [m])
+        t_file = time.perf_counter() - start
+
+    print(f"{name:<10} offline {(2 * N + 1000) / t_offline:10.2f} OT/s   online {t_single / N * 1e6:7.2f} us/OT single, "
+          f"{t_batch / N * 1e6:6.2f} us/OT batched, {t_file / M * 1e6:7.1f} us/OT file-backed   {receiver}")
+
+
+if __name__ == "__main__":
+    N = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    for name in ("toy", "modp2048", "ffdhe2048", "ffdhe3072", "p256"):
+        bench_ot(name, N)
+    print()
+    for name in ("toy", "ffdhe2048", "p256"):
+        bench_batch(name, 10 * N if name != "toy" else 1000 * N)
+    print()
+    for name in ("toy", "p256"):
+        bench_rot(name, 1000 * N if name == "toy" else 5 * N)
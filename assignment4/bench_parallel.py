@@ -0,0 +1,60 @@
+"""
+Scaling benchmark for the process-pool OT (parallel_ot.py), 1..max workers.
+Run with: python bench_parallel.py [N] [max_workers] [chunk]
+"""
+import os
+import random
+import sys
+import time
+
+import batch_ot
+import elgamal
+import parallel_ot
+from ot import Alice, Bob
+
+blood_types = ['o-', 'o+', 'a-', 'a+', 'b-', 'b+', 'ab-', 'ab+']
+
+
+def bench_batch(G, N: int, workers: int, chunk: int, baseline: float = None) -> float:
+    choices = [random.randrange(8) for _ in range(N)]
+    messages = [[random.randrange(2) for _ in range(8)] for _ in range(N)]
+    with parallel_ot.make_executor(workers) as executor:
+        parallel_ot.parallel_ot(choices[:workers], messages[:workers], G, executor, 1)  # start the workers, build their tables
+        start = time.perf_counter()
+        result = parallel_ot.parallel_ot(choices, messages, G, executor, chunk)
+        seconds = time.perf_counter() - start
+    assert result == [m[b] for b, m in zip(choices, messages)]
+    speedup = f"  {baseline / seconds:5.2f}x" if baseline else ""
+    print(f"batch   {G.name:<10} workers={workers:<3} chunk={chunk:<4} {N / seconds:8.2f} OT/s{speedup}")
+    return seconds
+
+
+def bench_objects(G, N: int, workers: int, chunk: int):
+    # Alice/Bob from ot.py with their 8 keys / encryptions spread over the pool
+    with parallel_ot.make_executor(workers) as executor:
+        start = time.perf_counter()
+        for _ in range(N):
+            alice = Alice(random.choice(blood_types), verbose=False, group=G, executor=executor, chunk=chunk)
+            bob = Bob('o-', verbose=False, group=G, executor=executor, chunk=chunk)
+            assert alice.retreive(bob.transfer_c(alice.choose_b())) == 1
+        seconds = time.perf_counter() - start
+    print(f"objects {G.name:<10} workers={workers:<3} chunk={chunk:<4} {N / seconds:8.2f} OT/s")
+
+
+if __name__ == "__main__":
+    N = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    max_workers = int(sys.argv[2]) if len(sys.argv) > 2 else max(os.cpu_count() or 1, 2)
+    chunk = int(sys.argv[3]) if len(sys.argv) > 3 else 2
+    print(f"{os.cpu_count()} CPUs")
+
+    for name in ("ffdhe2048", "p256"):
+        G = elgamal.elgamal_group(name)
+        pks, sks = batch_ot.batch_choose([0], G)  # warm up the parent's tables
+        start = time.perf_counter()
+        batch_ot.batch_ot([random.randrange(8) for _ in range(N)], [[1] * 8] * N, G)
+        baseline = time.perf_counter() - start
+        print(f"batch   {G.name:<10} sequential            {N / baseline:8.2f} OT/s")
+        for workers in range(1, max_workers + 1):
+            bench_batch(G, N, workers, chunk, baseline)
+        for workers in (1, max_workers):
+            bench_objects(G, max(N // 4, 1), workers, 1)
@@ -1,23 +1,215 @@
-import random
+import json
+import os
+import secrets
+import tempfile
 from typing import Tuple  # for Python < 3.9
 
+from fixed_base import fixed_pow
+from groups import Group, ModPGroup, P256
+
+# With a Group object (groups.py) instead of a (p, q, g) tuple, public keys are
+# (group, h) and ciphertexts pairs of group elements, see elgamal_group().
 PublicKey = tuple[int, int, int, int]  # or Tuple[int, int, int, int]
 Ciphertext = tuple[int, int]           # or Tuple[int, int]
 GroupDescription = Tuple[int, int, int]  # or Tuple[int, int, int]
 
-def elgamal_safe_GGen():
-    # hardcoding a safe group
-    p = 11
-    q = 5
-    r = 2
-    #choose x randomly from 1... q-1
-    g = 3 # generator of G, hardcoding it
-    return p, q, g
+# Safe-prime groups: p = 2q + 1 with p and q prime, G is the subgroup of order q
+# (the squares mod p), so g must be a square.
+#
+# Built-in standardized groups, g = 2 in all of them:
+#   modp2048, modp3072    RFC 3526 (p built from the digits of pi)
+#   ffdhe2048, ffdhe3072  RFC 7919 (p built from the digits of e)
+# Other sizes are generated with generate_safe_prime_group() and cached on disk in
+# CACHE_PATH as JSON, {"2048": {"p": hex, "q": hex, "g": int}, ...}. The cache is only
+# read the first time elgamal_safe_GGen(bits) asks for a generated group.
+
+STANDARD_GROUPS = {
+    "modp2048": int(
+        "FFFFFFFFFFFFFFFFC90FDAA22168C234C4C6628B80DC1CD129024E088A67CC74"
+        "020BBEA63B139B22514A08798E3404DDEF9519B3CD3A431B302B0A6DF25F1437"
+        "4FE1356D6D51C245E485B576625E7EC6F44C42E9A637ED6B0BFF5CB6F406B7ED"
+        "EE386BFB5A899FA5AE9F24117C4B1FE649286651ECE45B3DC2007CB8A163BF05"
+        "98DA48361C55D39A69163FA8FD24CF5F83655D23DCA3AD961C62F356208552BB"
+        "9ED529077096966D670C354E4ABC9804F1746C08CA18217C32905E462E36CE3B"
+        "E39E772C180E86039B2783A2EC07A28FB5C55DF06F4C52C9DE2BCBF695581718"
+        "3995497CEA956AE515D2261898FA051015728E5A8AACAA68FFFFFFFFFFFFFFFF"
+        , 16),
+    "modp3072": int(
+        "FFFFFFFFFFFFFFFFC90FDAA22168C234C4C6628B80DC1CD129024E088A67CC74"
+        "020BBEA63B139B22514A08798E3404DDEF9519B3CD3A431B302B0A6DF25F1437"
+        "4FE1356D6D51C245E485B576625E7EC6F44C42E9A637ED6B0BFF5CB6F406B7ED"
+        "EE386BFB5A899FA5AE9F24117C4B1FE649286651ECE45B3DC2007CB8A163BF05"
+        "98DA48361C55D39A69163FA8FD24CF5F83655D23DCA3AD961C62F356208552BB"
+        "9ED529077096966D670C354E4ABC9804F1746C08CA18217C32905E462E36CE3B"
+        "E39E772C180E86039B2783A2EC07A28FB5C55DF06F4C52C9DE2BCBF695581718"
+        "3995497CEA956AE515D2261898FA051015728E5A8AAAC42DAD33170D04507A33"
+        "A85521ABDF1CBA64ECFB850458DBEF0A8AEA71575D060C7DB3970F85A6E1E4C7"
+        "ABF5AE8CDB0933D71E8C94E04A25619DCEE3D2261AD2EE6BF12FFA06D98A0864"
+        "D87602733EC86A64521F2B18177B200CBBE117577A615D6C770988C0BAD946E2"
+        "08E24FA074E5AB3143DB5BFCE0FD108E4B82D120A93AD2CAFFFFFFFFFFFFFFFF"
+        , 16),
+    "ffdhe2048": int(
+        "FFFFFFFFFFFFFFFFADF85458A2BB4A9AAFDC5620273D3CF1D8B9C583CE2D3695"
+        "A9E13641146433FBCC939DCE249B3EF97D2FE363630C75D8F681B202AEC4617A"
+        "D3DF1ED5D5FD65612433F51F5F066ED0856365553DED1AF3B557135E7F57C935"
+        "984F0C70E0E68B77E2A689DAF3EFE8721DF158A136ADE73530ACCA4F483A797A"
+        "BC0AB182B324FB61D108A94BB2C8E3FBB96ADAB760D7F4681D4F42A3DE394DF4"
+        "AE56EDE76372BB190B07A7C8EE0A6D709E02FCE1CDF7E2ECC03404CD28342F61"
+        "9172FE9CE98583FF8E4F1232EEF28183C3FE3B1B4C6FAD733BB5FCBC2EC22005"
+        "C58EF1837D1683B2C6F34A26C1B2EFFA886B423861285C97FFFFFFFFFFFFFFFF"
+        , 16),
+    "ffdhe3072": int(
+        "FFFFFFFFFFFFFFFFADF85458A2BB4A9AAFDC5620273D3CF1D8B9C583CE2D3695"
+        "A9E13641146433FBCC939DCE249B3EF97D2FE363630C75D8F681B202AEC4617A"
+        "D3DF1ED5D5FD65612433F51F5F066ED0856365553DED1AF3B557135E7F57C935"
+        "984F0C70E0E68B77E2A689DAF3EFE8721DF158A136ADE73530ACCA4F483A797A"
+        "BC0AB182B324FB61D108A94BB2C8E3FBB96ADAB760D7F4681D4F42A3DE394DF4"
+        "AE56EDE76372BB190B07A7C8EE0A6D709E02FCE1CDF7E2ECC03404CD28342F61"
+        "9172FE9CE98583FF8E4F1232EEF28183C3FE3B1B4C6FAD733BB5FCBC2EC22005"
+        "C58EF1837D1683B2C6F34A26C1B2EFFA886B4238611FCFDCDE355B3B6519035B"
+        "BC34F4DEF99C023861B46FC9D6E6C9077AD91D2691F7F7EE598CB0FAC186D91C"
+        "AEFE130985139270B4130C93BC437944F4FD4452E2D74DD364F2E21E71F54BFF"
+        "5CAE82AB9C9DF69EE86D2BC522363A0DABC521979B0DEADA1DBF9A42D5C4484E"
+        "0ABCD06BFA53DDEF3C1B20EE3FD59D7C25E41D2B66C62E37FFFFFFFFFFFFFFFF"
+        , 16),
+}
+
+CACHE_PATH = os.path.join(os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")), "crycom2025", "elgamal_groups.json")
+
+SMALL_PRIMES = [p for p in range(3, 2000) if all(p % d for d in range(2, int(p ** 0.5) + 1))]
+
+_loaded = {}  # cache path -> {bits: GroupDescription}, read from disk on first use
+
+
+def is_probable_prime(n: int, rounds: int = 40) -> bool:
+    # Miller-Rabin with random bases
+    if n < 2:
+        return False
+    for p in [2] + SMALL_PRIMES[:50]:
+        if n % p == 0:
+            return n == p
+    d, s = n - 1, 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+    for _ in range(rounds):
+        a = secrets.randbelow(n - 3) + 2
+        x = pow(a, d, n)
+        if x == 1 or x == n - 1:
+            continue
+        for _ in range(s - 1):
+            x = pow(x, 2, n)
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def check_group(G: GroupDescription, rounds: int = 40) -> bool:
+    # p = 2q + 1, both prime, and g generates the order q subgroup
+    p, q, g = G
+    return (p == 2 * q + 1 and 1 < g < p and pow(g, q, p) == 1
+            and is_probable_prime(q, rounds) and is_probable_prime(p, rounds))
+
+
+def standard_group(name: str) -> GroupDescription:
+    if name not in STANDARD_GROUPS:
+        raise ValueError(f"Unknown group {name}, use one of {list(STANDARD_GROUPS)}")
+    p = STANDARD_GROUPS[name]
+    return p, (p - 1) // 2, 2
+
+
+def generate_safe_prime_group(bits: int) -> GroupDescription:
+    """
+    Random safe prime p = 2q + 1 of the given bit length, g = 4.
+    Takes a while for 2048 bits and more, use elgamal_safe_GGen(bits) to get it cached.
+    """
+    if bits < 16:
+        raise ValueError(f"bits should be at least 16, you gave bits = {bits}")
+    while True:
+        # q odd with its top bit set, so p = 2q + 1 has exactly `bits` bits
+        q = secrets.randbits(bits - 1) | (1 << (bits - 2)) | 1
+        # sieve: neither q nor 2q + 1 may have a small factor
+        if any(q % s == 0 or q % s == (s - 1) // 2 for s in SMALL_PRIMES if s < q):
+            continue
+        p = 2 * q + 1
+        # cheap Fermat test on p first, most candidates fail here
+        if pow(2, p - 1, p) != 1:
+            continue
+        if is_probable_prime(q) and is_probable_prime(p):
+            return p, q, 4  # 4 = 2^2 is a square and not 1, so it generates the order q subgroup
+
+
+def load_groups(path: str = CACHE_PATH) -> dict[int, GroupDescription]:
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    groups = {}
+    for bits, group in data.items():
+        G = int(group["p"], 16), int(group["q"], 16), int(group["g"])
+        p, q, g = G
+        if p == 2 * q + 1 and pow(g, q, p) == 1:  # cheap sanity check, skip broken entries
+            groups[int(bits)] = G
+    return groups
+
+
+def save_groups(groups: dict[int, GroupDescription], path: str = CACHE_PATH):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    data = {str(bits): {"p": format(p, "x"), "q": format(q, "x"), "g": g} for bits, (p, q, g) in sorted(groups.items())}
+    # write to a temporary file and rename, so a crash never leaves a half-written cache
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump(data, f, indent=1)
+    os.replace(tmp, path)
+
+
+def elgamal_safe_GGen(bits: int = None, cache_path: str = CACHE_PATH) -> GroupDescription:
+    """
+    No argument: the toy group p = 11, q = 5, g = 3.
+    bits: a generated safe-prime group of that size, generated once and then read from cache_path.
+    For the standardized groups use standard_group(name).
+    """
+    if bits is None:
+        # hardcoding a safe group
+        p = 11
+        q = 5
+        r = 2
+        #choose x randomly from 1... q-1
+        g = 3 # generator of G, hardcoding it
+        return p, q, g
+
+    if cache_path not in _loaded:
+        _loaded[cache_path] = load_groups(cache_path)
+    groups = _loaded[cache_path]
+    if bits not in groups:
+        groups[bits] = generate_safe_prime_group(bits)
+        save_groups(groups, cache_path)
+    return groups[bits]
+
+def elgamal_group(name: str) -> Group:
+    """Group backend by name: "toy", a standard_group name or "p256"."""
+    if name == "p256":
+        return P256
+    if name == "toy":
+        return ModPGroup(*elgamal_safe_GGen(), name="toy")
+    return ModPGroup(*standard_group(name), name=name)
+
+
+def group_order(G) -> int:
+    # q, for a (p, q, g) tuple or a Group
+    return G.q if isinstance(G, Group) else G[1]
+
 
 def elgamal_Gen(G:GroupDescription)-> Tuple[PublicKey, int]:
+    if isinstance(G, Group):
+        x = G.random_exponent()
+        return (G, G.power_g(x)), x
     p, q, g = G
-    x = random.randint(1, q - 1)
-    h = pow(g, x, p)  # y = g^x mod p
+    x = secrets.randbelow(q - 1) + 1  # x from 1 ... q-1
+    h = fixed_pow(g, x, p, q.bit_length())  # y = g^x mod p
     pk = (p, q, g, h)
     sk = x
     return pk, sk
@@ -33,6 +225,8 @@ def elgamal_OGen(G: GroupDescription, r: int) -> PublicKey:
     - Output h = s^2 mod p (ensures h is in subgroup of order q)
     - We don't know log_g(h) = the discrete log of h base g
     """
+    if isinstance(G, Group):
+        return (G, G.oblivious_element(r))
     p, q, g = G
     
     # Use randomness r to generate s in range [1, p-1]
@@ -46,23 +240,43 @@ def elgamal_OGen(G: GroupDescription, r: int) -> PublicKey:
 
 def encode_message(msg, G: GroupDescription) -> int:
     """ need to map 1's and 0s to group elements """
+    if isinstance(G, Group):
+        return G.identity if msg == 1 else G.g
     if msg == 1:
         return 1
     elif msg == 0:
         return G[2]  # g
-    
+
+
+def decode_message(m, G: GroupDescription) -> int:
+    """ inverse of encode_message """
+    identity, g = (G.identity, G.g) if isinstance(G, Group) else (1, G[2])
+    if m == identity:
+        return 1
+    elif m == g:
+        return 0
+    raise ValueError(f"{m} does not encode a bit in this group")
+
 
 def elgamal_Enc(pk:PublicKey, m:int)-> Ciphertext:
+    if isinstance(pk[0], Group):
+        G, h = pk
+        y = G.random_exponent()
+        return G.power_g(y), G.mul(m, G.power(h, y))
     p,q, g, h = pk
     # choose y randomly from 1... q-1
-    y = random.randint(1, q-1)
-    s = pow(h, y, p)  # a = g^k mod p
-    c1 = pow(g, y, p)
+    y = secrets.randbelow(q - 1) + 1
+    # g and reused public keys go through precomputed tables (fixed_base.py)
+    s = fixed_pow(h, y, p, q.bit_length())  # a = g^k mod p
+    c1 = fixed_pow(g, y, p, q.bit_length())
     c2 = (m * s) % p
     c = c1, c2
     return c
 
 def elgamal_Dec(c: Ciphertext, sk:int, pk:PublicKey) -> int:
+    if isinstance(pk[0], Group):
+        G = pk[0]
+        return G.mul(c[1], G.inv(G.power(c[0], sk)))
     # 1. s: = c
     s = pow(c[0], sk, pk[0])  # s = c1^x mod p
     # 2. compute s^-1 mod p
@@ -0,0 +1,126 @@
+import threading
+from collections import OrderedDict
+
+# Fixed-base exponentiation for ElGamal.
+#
+# pow(g, e, p) with a base that is used over and over (the generator g, a public
+# key h that encrypts many messages) can be sped up with a precomputed table.
+# Split e into w-bit digits e = sum d_i * 2^(w*i), then
+#     g^e = prod_i (g^(2^(w*i)))^(d_i)
+# and table[i][d] = g^(d * 2^(w*i)) holds every factor, so an exponentiation is
+# one multiplication per digit and no squarings at all.
+#
+# A table costs (exp_bits / w) * 2^w multiplications to build and as many group
+# elements of memory (about 3.4 MB for a 2048-bit group and w = 5), so
+# FixedBaseCache only builds one after a base was used `threshold` times, keeps at
+# most `max_tables` of them and evicts the least recently used one.
+
+
+class FixedBaseTable:
+    def __init__(self, base: int, modulus: int, exp_bits: int, window: int = 5):
+        if window < 1:
+            raise ValueError(f"window should be at least 1, you gave window = {window}")
+        self.base = base
+        self.modulus = modulus
+        self.exp_bits = exp_bits
+        self.window = window
+        self.rows = []  # rows[i][d] = base^(d * 2^(window*i)) mod modulus
+        row_base = base % modulus
+        for _ in range((exp_bits + window - 1) // window):
+            row = [1, row_base]
+            for _ in range(2, 1 << window):
+                row.append(row[-1] * row_base % modulus)
+            self.rows.append(row)
+            row_base = row[-1] * row_base % modulus  # base^(2^(window*(i+1)))
+
+    def __repr__(self):
+        return f"FixedBaseTable(bits={self.modulus.bit_length()}, exp_bits={self.exp_bits}, window={self.window})"
+
+    def pow(self, e: int) -> int:
+        if e < 0 or e.bit_length() > self.exp_bits:
+            return pow(self.base, e, self.modulus)
+        p = self.modulus
+        mask = (1 << self.window) - 1
+        result = 1
+        for row in self.rows:
+            if not e:
+                break
+            d = e & mask
+            if d:
+                result = result * row[d] % p
+            e >>= self.window
+        return result
+
+
+class CacheStats:
+    def __init__(self):
+        self.hits = 0       # exponentiations answered from a table
+        self.misses = 0     # exponentiations done with pow()
+        self.builds = 0     # tables built
+        self.evictions = 0  # tables dropped to stay below max_tables
+
+    def __repr__(self):
+        return f"CacheStats(hits={self.hits}, misses={self.misses}, builds={self.builds}, evictions={self.evictions})"
+
+
+class FixedBaseCache:
+    def __init__(self, max_tables: int = 8, threshold: int = 4, window: int = 5, min_bits: int = 256):
+        self.max_tables = max_tables  # 0 disables the cache
+        self.threshold = threshold    # uses of a base before its table is built
+        self.window = window
+        self.min_bits = min_bits      # smaller moduli (the toy group) always use pow()
+        self.tables = OrderedDict()   # (base, modulus) -> FixedBaseTable, least recently used first
+        self.uses = OrderedDict()     # (base, modulus) -> uses so far, for bases without a table
+        self.stats = CacheStats()
+        self.lock = threading.Lock()
+
+    def __repr__(self):
+        return f"FixedBaseCache(tables={len(self.tables)}/{self.max_tables}, {self.stats})"
+
+    def clear(self):
+        with self.lock:
+            self.tables.clear()
+            self.uses.clear()
+
+    def pow(self, base: int, e: int, modulus: int, exp_bits: int) -> int:
+        """base^e mod modulus, exp_bits is the bit length of the exponents used with this base (e.g. of q)."""
+        if self.max_tables <= 0 or modulus.bit_length() < self.min_bits:
+            return pow(base, e, modulus)
+        key = (base, modulus)
+        with self.lock:
+            table = self.tables.get(key)
+            if table is not None and table.exp_bits >= exp_bits:
+                self.tables.move_to_end(key)
+                self.stats.hits += 1
+            else:
+                table = None
+                self.stats.misses += 1
+                uses = self.uses.pop(key, 0) + 1
+                if uses < self.threshold:
+                    self.uses[key] = uses
+                    # only remember the most recent bases, one-off public keys would pile up
+                    while len(self.uses) > 16 * self.max_tables:
+                        self.uses.popitem(last=False)
+        if table is not None:
+            return table.pow(e)
+        if uses < self.threshold:
+            return pow(base, e, modulus)
+
+        # built outside the lock, two threads may both build it, the second one wins
+        table = FixedBaseTable(base, modulus, exp_bits, self.window)
+        with self.lock:
+            self.tables[key] = table
+            self.tables.move_to_end(key)
+            self.stats.builds += 1
+            while len(self.tables) > self.max_tables:
+                self.tables.popitem(last=False)
+                self.stats.evictions += 1
+        return table.pow(e)
+
+
+default_cache = FixedBaseCache()
+
+
+def fixed_pow(base: int, e: int, modulus: int, exp_bits: int) -> int:
+    # pow(base, e, modulus) through the module-wide cache
+    return default_cache.pow(base, e, modulus, exp_bits)
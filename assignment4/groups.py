@@ -0,0 +1,339 @@
+import hashlib
+import secrets
+
+from fixed_base import fixed_pow
+
+# Group backends for ElGamal.
+#
+# elgamal.py works with any cyclic group of prime order q given as a Group object:
+#   ModPGroup(p, q, g)  the order q subgroup of Z_p^* for a safe prime p = 2q + 1
+#   ECGroup(...)        points on a short Weierstrass curve y^2 = x^3 + ax + b over F_p,
+#                       P256 is NIST P-256
+# The group is written multiplicatively in both cases: mul(a, b) is the group
+# operation (point addition on the curve) and power(a, e) is a^e (scalar
+# multiplication e*a on the curve).
+#
+# A P-256 element is 33 bytes compressed and one exponentiation is a few hundred
+# point operations on 256-bit numbers, against 256/384 bytes and a 2048/3072-bit
+# modular exponentiation for the safe-prime groups of the same security.
+
+
+class Group:
+    name = "group"
+    q = 0            # prime order of the group
+    g = None         # generator
+    identity = None  # neutral element
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.name})"
+
+    def mul(self, a, b):
+        raise NotImplementedError
+
+    def inv(self, a):
+        raise NotImplementedError
+
+    def power(self, a, e: int):
+        raise NotImplementedError
+
+    def power_g(self, e: int):
+        # g^e, backends precompute tables for the generator
+        return self.power(self.g, e)
+
+    def oblivious_element(self, r: int):
+        """An element derived from the randomness r whose discrete log nobody knows."""
+        raise NotImplementedError
+
+    def element_size(self) -> int:
+        # bytes to send one element
+        raise NotImplementedError
+
+    def random_exponent(self) -> int:
+        # uniform in 1 ... q-1
+        return secrets.randbelow(self.q - 1) + 1
+
+    def to_bytes(self, a) -> bytes:
+        # element_size() bytes
+        raise NotImplementedError
+
+    def from_bytes(self, data: bytes):
+        raise NotImplementedError
+
+    def pack(self, elements: list) -> bytes:
+        # a flat array of elements, element_size() bytes each
+        return b''.join([self.to_bytes(a) for a in elements])
+
+    def unpack(self, data: bytes) -> list:
+        size = self.element_size()
+        if len(data) % size:
+            raise ValueError(f"length {len(data)} is not a multiple of the element size {size}")
+        return [self.from_bytes(data[i:i + size]) for i in range(0, len(data), size)]
+
+
+class ModPGroup(Group):
+    def __init__(self, p: int, q: int, g: int, name: str = None):
+        if p != 2 * q + 1:
+            raise ValueError(f"p should be the safe prime 2q + 1, got p = {p}, q = {q}")
+        self.p = p
+        self.q = q
+        self.g = g
+        self.identity = 1
+        self.name = name or f"modp{p.bit_length()}"
+
+    def mul(self, a: int, b: int) -> int:
+        return a * b % self.p
+
+    def inv(self, a: int) -> int:
+        return pow(a, -1, self.p)
+
+    def power(self, a: int, e: int) -> int:
+        # repeated bases (public keys that encrypt several messages) get fixed-base tables
+        return fixed_pow(a, e, self.p, self.q.bit_length())
+
+    def oblivious_element(self, r: int) -> int:
+        # same as elgamal_OGen: squaring lands in the order q subgroup
+        if r < 1 or r >= self.p:
+            raise ValueError(f"r should be in range [1, {self.p - 1}], you gave r = {r}")
+        return pow(r, 2, self.p)
+
+    def element_size(self) -> int:
+        return (self.p.bit_length() + 7) // 8
+
+    def to_bytes(self, a: int) -> bytes:
+        return a.to_bytes(self.element_size(), 'big')
+
+    def from_bytes(self, data: bytes) -> int:
+        a = int.from_bytes(data, 'big')
+        # peer data: only elements of the order q subgroup, not the whole of Z_p^*
+        if not 1 <= a < self.p or pow(a, self.q, self.p) != 1:
+            raise ValueError(f"{a} is not an element of {self.name}")
+        return a
+
+
+class ECGroup(Group):
+    """
+    Points are affine tuples (x, y), the point at infinity (the identity) is None.
+    Internally scalar multiplication uses Jacobian coordinates (X, Y, Z) for (X/Z^2, Y/Z^3)
+    so that only the final conversion needs a modular inverse.
+    """
+
+    def __init__(self, name: str, p: int, a: int, b: int, gx: int, gy: int, q: int, window: int = 4):
+        self.name = name
+        self.p = p
+        self.a = a % p
+        self.b = b
+        self.q = q
+        self.g = (gx, gy)
+        self.identity = None
+        self.window = window
+        if not self.on_curve(self.g):
+            raise ValueError(f"generator is not on the curve {name}")
+        self._g_rows = None  # fixed-base table for g, built on first use
+
+    def __reduce__(self):
+        # named curves pickle as their name, so a message carries no curve parameters or tables
+        if CURVES.get(self.name) is self:
+            return curve, (self.name,)
+        return super().__reduce__()
+
+    def on_curve(self, P) -> bool:
+        if P is None:
+            return True
+        x, y = P
+        return (y * y - x * x * x - self.a * x - self.b) % self.p == 0
+
+    # Jacobian arithmetic
+    def _double(self, P):
+        X, Y, Z = P
+        if not Y:
+            return (1, 1, 0)
+        p = self.p
+        YY = Y * Y % p
+        S = 4 * X * YY % p
+        ZZ = Z * Z % p
+        if self.a == p - 3:
+            M = 3 * (X - ZZ) * (X + ZZ) % p  # 3X^2 - 3Z^4 with one multiplication less
+        else:
+            M = (3 * X * X + self.a * ZZ * ZZ) % p
+        X3 = (M * M - 2 * S) % p
+        Y3 = (M * (S - X3) - 8 * YY * YY) % p
+        Z3 = 2 * Y * Z % p
+        return (X3, Y3, Z3)
+
+    def _add(self, P, Q):
+        if not P[2]:
+            return Q
+        if not Q[2]:
+            return P
+        p = self.p
+        X1, Y1, Z1 = P
+        X2, Y2, Z2 = Q
+        Z1Z1 = Z1 * Z1 % p
+        Z2Z2 = Z2 * Z2 % p
+        U1 = X1 * Z2Z2 % p
+        U2 = X2 * Z1Z1 % p
+        S1 = Y1 * Z2 * Z2Z2 % p
+        S2 = Y2 * Z1 * Z1Z1 % p
+        H = (U2 - U1) % p
+        R = (S2 - S1) % p
+        if not H:
+            return self._double(P) if not R else (1, 1, 0)
+        HH = H * H % p
+        HHH = H * HH % p
+        V = U1 * HH % p
+        X3 = (R * R - HHH - 2 * V) % p
+        Y3 = (R * (V - X3) - S1 * HHH) % p
+        Z3 = Z1 * Z2 * H % p
+        return (X3, Y3, Z3)
+
+    def _add_affine(self, P, Q):
+        # P Jacobian, Q affine (Z = 1) and not the identity
+        if not P[2]:
+            return (Q[0], Q[1], 1)
+        p = self.p
+        X1, Y1, Z1 = P
+        x2, y2 = Q
+        Z1Z1 = Z1 * Z1 % p
+        U2 = x2 * Z1Z1 % p
+        S2 = y2 * Z1 * Z1Z1 % p
+        H = (U2 - X1) % p
+        R = (S2 - Y1) % p
+        if not H:
+            return self._double(P) if not R else (1, 1, 0)
+        HH = H * H % p
+        HHH = H * HH % p
+        V = X1 * HH % p
+        X3 = (R * R - HHH - 2 * V) % p
+        Y3 = (R * (V - X3) - Y1 * HHH) % p
+        Z3 = Z1 * H % p
+        return (X3, Y3, Z3)
+
+    def _to_affine(self, P):
+        X, Y, Z = P
+        if not Z:
+            return None
+        p = self.p
+        z_inv = pow(Z, -1, p)
+        zz_inv = z_inv * z_inv % p
+        return (X * zz_inv % p, Y * zz_inv * z_inv % p)
+
+    def _from_affine(self, P):
+        return (1, 1, 0) if P is None else (P[0], P[1], 1)
+
+    # group operations
+    def mul(self, P, Q):
+        return self._to_affine(self._add(self._from_affine(P), self._from_affine(Q)))
+
+    def inv(self, P):
+        return None if P is None else (P[0], -P[1] % self.p)
+
+    def power(self, P, e: int):
+        # fixed window: 2^window - 1 precomputed multiples, then window doublings per digit
+        e %= self.q
+        if P is None or not e:
+            return None
+        w = self.window
+        multiples = [(1, 1, 0), self._from_affine(P)]
+        for _ in range(2, 1 << w):
+            multiples.append(self._add(multiples[-1], multiples[1]))
+        R = (1, 1, 0)
+        digits = format(e, 'b')
+        digits = '0' * (-len(digits) % w) + digits
+        for i in range(0, len(digits), w):
+            for _ in range(w):
+                R = self._double(R)
+            d = int(digits[i:i + w], 2)
+            if d:
+                R = self._add(R, multiples[d])
+        return self._to_affine(R)
+
+    def _generator_rows(self):
+        # rows[i][d] = (d * 2^(window*i)) * g in affine coordinates, no doublings needed online
+        if self._g_rows is None:
+            w = self.window
+            rows = []
+            base = self._from_affine(self.g)
+            for _ in range((self.q.bit_length() + w - 1) // w):
+                row = [base]
+                for _ in range(2, 1 << w):
+                    row.append(self._add(row[-1], base))
+                rows.append([None] + [self._to_affine(P) for P in row])
+                for _ in range(w):
+                    base = self._double(base)
+            self._g_rows = rows
+        return self._g_rows
+
+    def power_g(self, e: int):
+        e %= self.q
+        w = self.window
+        mask = (1 << w) - 1
+        R = (1, 1, 0)
+        for row in self._generator_rows():
+            if not e:
+                break
+            d = e & mask
+            if d:
+                R = self._add_affine(R, row[d])
+            e >>= w
+        return self._to_affine(R)
+
+    def oblivious_element(self, r: int):
+        # hash r to a point (try and increment), its discrete log is unknown to everyone
+        if r < 1 or r >= self.q:
+            raise ValueError(f"r should be in range [1, {self.q - 1}], you gave r = {r}")
+        nbytes = (self.p.bit_length() + 7) // 8
+        counter = 0
+        while True:
+            digest = hashlib.sha256(r.to_bytes(nbytes, 'big') + counter.to_bytes(4, 'big')).digest()
+            x = int.from_bytes(digest, 'big') % self.p
+            rhs = (x * x * x + self.a * x + self.b) % self.p
+            y = self.sqrt(rhs)
+            if y is not None:
+                return (x, y if digest[-1] & 1 == y & 1 else self.p - y)
+            counter += 1
+
+    def sqrt(self, n: int):
+        # square root mod p for p = 3 mod 4, None if n is not a square
+        if self.p % 4 != 3:
+            raise ValueError("sqrt is only implemented for p = 3 mod 4")
+        y = pow(n, (self.p + 1) // 4, self.p)
+        return y if y * y % self.p == n % self.p else None
+
+    def element_size(self) -> int:
+        # compressed point: x and one bit of y
+        return (self.p.bit_length() + 7) // 8 + 1
+
+    def to_bytes(self, P) -> bytes:
+        # 0x02/0x03 (parity of y) followed by x, all zeros for the identity
+        size = self.element_size()
+        if P is None:
+            return bytes(size)
+        return bytes([2 + (P[1] & 1)]) + P[0].to_bytes(size - 1, 'big')
+
+    def from_bytes(self, data: bytes):
+        if not any(data):
+            return None
+        x = int.from_bytes(data[1:], 'big')
+        y = self.sqrt((x * x * x + self.a * x + self.b) % self.p) if data[0] in (2, 3) and x < self.p else None
+        if y is None:
+            raise ValueError(f"{data.hex()} is not a point on {self.name}")
+        return (x, y if y & 1 == data[0] & 1 else self.p - y)
+
+
+P256 = ECGroup(
+    "p256",
+    p=0xffffffff00000001000000000000000000000000ffffffffffffffffffffffff,
+    a=-3,
+    b=0x5ac635d8aa3a93e7b3ebbd55769886bc651d06b0cc53b0f63bce3c3e27d2604b,
+    gx=0x6b17d1f2e12c4247f8bce6e563a440f277037d812deb33a0f4a13945d898c296,
+    gy=0x4fe342e2fe1a7f9b8ee7eb4a7c0f9e162bce33576b315ececbb6406837bf51f5,
+    q=0xffffffff00000000ffffffffffffffffbce6faada7179e84f3b9cac2fc632551,
+)
+
+CURVES = {"p256": P256}
+
+
+def curve(name: str) -> ECGroup:
+    if name not in CURVES:
+        raise ValueError(f"Unknown curve {name}, use one of {list(CURVES)}")
+    return CURVES[name]
@@ -1,10 +1,17 @@
 import elgamal
-import random
+import secrets
+from itertools import repeat
 from typing import Tuple  # for Python < 3.9
 
 class Alice:
-    def __init__(self, blood_type: str):
+    def __init__(self, blood_type: str, verbose: bool = True, group=None, executor=None, chunk: int = 1):
         self.blood_type = blood_type  # Alice's blood type (receiver type)
+        self.verbose = verbose  # print the protocol messages
+        # (p, q, g) tuple or a groups.Group backend, e.g. elgamal.elgamal_group("p256"), default the toy group
+        self.group = group if group is not None else elgamal.elgamal_safe_GGen()
+        # process pool for the key generation (parallel_ot.make_executor), chunk keys per task
+        self.executor = executor
+        self.chunk = chunk
         self.blood_type_encoding = {
             'o-': 0,
             'o+': 1,
@@ -49,48 +56,60 @@ class Alice:
     def choose_b(self):
         # choose bit b i.e send 7 random public keys and one real public key. The real pk is at index b
         b = self.get_blood_type_index()
+        self.pk_list = []  # a fresh list for every OT
 
-        G = elgamal.elgamal_safe_GGen() # generate a safe group
+        G = self.group
         # print(f"Using group G: {G}")
 
-        # generate one real public/private key pair
-        pk, sk = elgamal.elgamal_Gen(G) # generate a public/private key pair
-
-        #generate 7 oblivious public keys
-        opk = elgamal.elgamal_OGen( G, random.randint(1, G[1]-1)) # generate an oblivious public key with random r
-
         # create a list of 8 public keys with the real pk at index b
-
-        for i in range(0,8):
-            if i ==b:
-                pk, sk = elgamal.elgamal_Gen(G) # generate a public/private key pair
-                self.pk_list.append(pk)
-                self.sk = sk
-
-            else:
-                opk = elgamal.elgamal_OGen( G, random.randint(1, G[1]-1)) # generate an oblivious public key with random r
-                self.pk_list.append(opk)
-
-        print("Alice: sending b to bob, b is 7 random public keys and one real public key. The real pk is at index b")
-        print("Alice: b/pk_list =", self.pk_list) 
+        # (one real public/private key pair, 7 oblivious public keys)
+
+        if self.executor is not None:
+            # same keys computed on the pool, the oblivious randomness is drawn here in the parent
+            real = self.executor.submit(elgamal.elgamal_Gen, G)
+            rs = [secrets.randbelow(elgamal.group_order(G) - 1) + 1 for _ in range(7)]
+            self.pk_list = list(self.executor.map(elgamal.elgamal_OGen, repeat(G), rs, chunksize=self.chunk))
+            pk, self.sk = real.result()
+            self.pk_list.insert(b, pk)
+        else:
+            for i in range(0,8):
+                if i ==b:
+                    pk, sk = elgamal.elgamal_Gen(G) # generate a public/private key pair
+                    self.pk_list.append(pk)
+                    self.sk = sk
+
+                else:
+                    opk = elgamal.elgamal_OGen( G, secrets.randbelow(elgamal.group_order(G) - 1) + 1) # generate an oblivious public key with random r
+                    self.pk_list.append(opk)
+
+        if self.verbose:
+            print("Alice: sending b to bob, b is 7 random public keys and one real public key. The real pk is at index b")
+            print("Alice: b/pk_list =", self.pk_list) 
         return self.pk_list
     
     def retreive(self, c:list):
         # decrypt the ciphertext at index b using her private key sk
         b = self.get_blood_type_index()
-        print(f"Alice: receiving ciphertexts c from Bob, c = {c}")
+        if self.verbose:
+            print(f"Alice: receiving ciphertexts c from Bob, c = {c}")
         
-        m = elgamal.elgamal_Dec(c[b], self.sk, self.pk_list[b])
-        print(f"Alice: decrypted m = {m}")
-        if m == 1:
-            print(f"Alice: Yes, I  can receive blood from a Bob, even though I dont know his blood type")
-        else:
-            print(f"Alice: No, I cannot receive blood from Bob, even though I dont know his blood type")
+        m = elgamal.decode_message(elgamal.elgamal_Dec(c[b], self.sk, self.pk_list[b]), self.group)
+        if self.verbose:
+            print(f"Alice: decrypted m = {m}")
+            if m == 1:
+                print(f"Alice: Yes, I  can receive blood from a Bob, even though I dont know his blood type")
+            else:
+                print(f"Alice: No, I cannot receive blood from Bob, even though I dont know his blood type")
+        return m
                 
 
 class Bob:
-    def __init__(self, blood_type: str):
+    def __init__(self, blood_type: str, verbose: bool = True, group=None, executor=None, chunk: int = 1):
         self.blood_type = blood_type  # Bob's blood type (donor type)
+        self.verbose = verbose  # print the protocol messages
+        self.group = group if group is not None else elgamal.elgamal_safe_GGen()  # same group as Alice
+        self.executor = executor  # process pool for the encryptions, chunk per task
+        self.chunk = chunk
         self.blood_type_encoding = {
             'o-': 0,
             'o+': 1,
@@ -130,12 +149,16 @@ class Bob:
     def transfer_c(self, pk_list):
         # encode his vector and then encrypt with the public keys
         m = self.compatibility[self.blood_type_encoding[self.blood_type]]
-        m_encoded = [elgamal.encode_message(bit, elgamal.elgamal_safe_GGen()) for bit in m]
+        m_encoded = [elgamal.encode_message(bit, self.group) for bit in m]
         # print(f"Bob: m_encoded = {m_encoded}")
 
-        self.c = [elgamal.elgamal_Enc(pk, me) for pk, me in zip(pk_list, m_encoded)]
+        if self.executor is not None:
+            self.c = list(self.executor.map(elgamal.elgamal_Enc, pk_list, m_encoded, chunksize=self.chunk))
+        else:
+            self.c = [elgamal.elgamal_Enc(pk, me) for pk, me in zip(pk_list, m_encoded)]
 
-        print(f"Bob: sending ciphertexts c to Alice, c = {self.c}")
+        if self.verbose:
+            print(f"Bob: sending ciphertexts c to Alice, c = {self.c}")
         return self.c
 
 
@@ -145,13 +168,14 @@ class Bob:
         
 
 #
-bob = Bob('a-') # donor
-alice = Alice('ab-') # recipent
-pk_list = alice.choose_b()
+if __name__ == "__main__":
+    bob = Bob('a-') # donor
+    alice = Alice('ab-') # recipent
+    pk_list = alice.choose_b()
 
 
-c = bob.transfer_c(pk_list)
+    c = bob.transfer_c(pk_list)
 
-m = alice.retreive(c)
+    m = alice.retreive(c)
 
 
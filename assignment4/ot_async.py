@@ -0,0 +1,48 @@
+import asyncio
+import os
+import random
+import sys
+
+from ot import Alice, Bob
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import async_runtime
+
+# The 1-out-of-8 OT from ot.py as asyncio coroutines, so that many sessions can
+# run over one event loop and one connection (see async_runtime.py).
+# Messages are the same as in ot_net.py.
+# Run the load generator with: python ot_async.py [sessions] [concurrency]
+
+blood_types = ['o-', 'o+', 'a-', 'a+', 'b-', 'b+', 'ab-', 'ab+']
+
+
+async def alice(channel: async_runtime.SessionChannel, blood_type: str) -> int:
+    alice = Alice(blood_type, verbose=False)
+    await channel.send_obj(alice.choose_b())
+    c = await channel.recv_obj()
+    return alice.retreive(c)
+
+
+async def bob(channel: async_runtime.SessionChannel, blood_type: str):
+    bob = Bob(blood_type, verbose=False)
+    pk_list = await channel.recv_obj()
+    await channel.send_obj(bob.transfer_c(pk_list))
+
+
+async def main(sessions: int, concurrency: int):
+    # Bob serves every session with his blood type, Alice's differs per session
+    donor = 'o-'  # can donate to everyone, so every session must decrypt to 1
+    recipients = [random.choice(blood_types) for _ in range(sessions)]
+    for link in async_runtime.LINKS:
+        report = await async_runtime.load_test(
+            lambda channel, i: alice(channel, recipients[i]),
+            lambda channel: bob(channel, donor),
+            sessions, concurrency, link,
+            check=lambda i, m: m == 1)
+        async_runtime.print_report("OT", link, concurrency, report)
+
+
+if __name__ == "__main__":
+    sessions = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    asyncio.run(main(sessions, concurrency))
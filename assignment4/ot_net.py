@@ -0,0 +1,45 @@
+import os
+import sys
+import time
+
+from elgamal import elgamal_group
+from ot import Alice, Bob
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import transport
+
+# The 1-out-of-8 OT from ot.py with Alice and Bob talking over a transport.Channel.
+#
+# Messages:  Alice -> Bob  pk_list, 8 public keys (one real, seven oblivious)
+#            Bob -> Alice  c, 8 ciphertexts of his compatibility row
+
+
+def alice(channel: transport.Channel, blood_type: str, group=None) -> int:
+    alice = Alice(blood_type, verbose=False, group=group)
+    channel.send_obj(alice.choose_b())
+    c = channel.recv_obj()
+    return alice.retreive(c)
+
+
+def bob(channel: transport.Channel, blood_type: str, group=None):
+    bob = Bob(blood_type, verbose=False, group=group)
+    pk_list = channel.recv_obj()
+    channel.send_obj(bob.transfer_c(pk_list))
+
+
+def run(recipient: str, donor: str, backend: str = "queue", group=None) -> tuple[int, transport.ChannelStats, transport.ChannelStats]:
+    """OT over the given transport backend, returns Alice's decrypted m (1 = compatible)."""
+    m, _, stats_a, stats_b = transport.run_parties(
+        lambda channel: alice(channel, recipient, group),
+        lambda channel: bob(channel, donor, group),
+        backend)
+    return m, stats_a, stats_b
+
+
+if __name__ == "__main__":
+    for name in ("toy", "ffdhe2048", "p256"):
+        for backend in transport.BACKENDS:
+            start = time.perf_counter()
+            m, stats_a, stats_b = run('ab-', 'a-', backend, elgamal_group(name))
+            seconds = time.perf_counter() - start
+            transport.report(f"OT {name}", backend, stats_a, stats_b, seconds)
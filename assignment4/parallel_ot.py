@@ -0,0 +1,67 @@
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from itertools import repeat
+
+import batch_ot
+
+# Key generation and encryption of the OT spread over a process pool.
+#
+# Two levels:
+#   Alice(..., executor=ex) / Bob(..., executor=ex) in ot.py run the 8 key
+#   generations / encryptions of one OT as pool tasks, `chunk` per task
+#   parallel_choose / parallel_transfer / parallel_retrieve split a batch_ot batch
+#   into chunks of `chunk` OTs, one task per chunk
+#
+# Randomness across fork: keys, encryption exponents and the oblivious-key inputs
+# of Alice.choose_b all come from `secrets` (os.urandom, never shared between
+# processes), the oblivious-key inputs are drawn in the parent. Nothing here uses
+# `random`, Mersenne Twister output is predictable and must not pick secrets.
+# Every worker builds its own fixed-base tables (fixed_base.py) on first use.
+
+
+def make_executor(workers: int = None, mp_context=None) -> ProcessPoolExecutor:
+    """Process pool for the functions below, workers defaults to the number of CPUs."""
+    return ProcessPoolExecutor(max_workers=workers or os.cpu_count(), mp_context=mp_context)
+
+
+def _chunks(items: list, chunk: int) -> list[list]:
+    if chunk < 1:
+        raise ValueError(f"chunk should be at least 1, you gave chunk = {chunk}")
+    return [items[i:i + chunk] for i in range(0, len(items), chunk)]
+
+
+def parallel_choose(choices: list[int], group, executor: Executor, chunk: int = 16) -> tuple[list, list[int]]:
+    """batch_ot.batch_choose with chunks of `chunk` OTs on the pool, same result layout."""
+    pks, sks = [], []
+    for pks_chunk, sks_chunk in executor.map(batch_ot.batch_choose, _chunks(choices, chunk), repeat(group)):
+        pks.extend(pks_chunk)
+        sks.extend(sks_chunk)
+    return pks, sks
+
+
+def parallel_transfer(pks: list, messages: list[list[int]], group, executor: Executor, chunk: int = 16) -> tuple[list, list]:
+    """batch_ot.batch_transfer with chunks of `chunk` OTs on the pool."""
+    if len(pks) != batch_ot.CHOICES * len(messages):
+        raise ValueError(f"need {batch_ot.CHOICES} public keys per message vector, got {len(pks)} keys for {len(messages)} vectors")
+    c1, c2 = [], []
+    pk_chunks = _chunks(pks, batch_ot.CHOICES * chunk)
+    for c1_chunk, c2_chunk in executor.map(batch_ot.batch_transfer, pk_chunks, _chunks(messages, chunk), repeat(group)):
+        c1.extend(c1_chunk)
+        c2.extend(c2_chunk)
+    return c1, c2
+
+
+def parallel_retrieve(c1: list, c2: list, choices: list[int], sks: list[int], group, executor: Executor, chunk: int = 16) -> list[int]:
+    """batch_ot.batch_retrieve with chunks of `chunk` OTs on the pool."""
+    result = []
+    for bits in executor.map(batch_ot.batch_retrieve, _chunks(c1, chunk), _chunks(c2, batch_ot.CHOICES * chunk),
+                             _chunks(choices, chunk), _chunks(sks, chunk), repeat(group)):
+        result.extend(bits)
+    return result
+
+
+def parallel_ot(choices: list[int], messages: list[list[int]], group, executor: Executor, chunk: int = 16) -> list[int]:
+    # batch_ot.batch_ot on the pool
+    pks, sks = parallel_choose(choices, group, executor, chunk)
+    c1, c2 = parallel_transfer(pks, messages, group, executor, chunk)
+    return parallel_retrieve(c1, c2, choices, sks, group, executor, chunk)
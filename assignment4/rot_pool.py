@@ -0,0 +1,211 @@
+import os
+import secrets
+import struct
+import sys
+import tempfile
+
+import batch_ot
+from elgamal import elgamal_safe_GGen
+from ot import Bob
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import transport
+
+# Random 1-out-of-8 OTs, precomputed offline and derandomized online.
+#
+# Offline: the OT from batch_ot.py is run on random inputs. Random OT k leaves
+#   sender    R_k, 8 random bits (one byte, bit i = R_k,i)
+#   receiver  a random choice c_k in 0..7 and the bit R_k,c_k
+# Online, receiver with choice b and sender with message bits m_0..m_7 (one byte):
+#   receiver -> sender  k, d = (c_k - b) mod 8
+#   sender -> receiver  z = m xor (R_k rotated right by d), bit i is m_i xor R_k,(i+d) mod 8
+#   receiver            m_b = bit b of z xor R_k,c_k
+# That is one byte each way and a table lookup, no group operations. d is uniform
+# because c_k is, and z hides every m_i except m_b behind an unknown R bit.
+#
+# A random OT must never be used twice, so a file-backed pool writes its new
+# position to disk before an OT is handed out. File layout:
+#   header  magic b'ROT1', party (0 = sender, 1 = receiver), first, count, position
+#   data    count bytes, R_k (sender) or c_k | R_k,c_k << 3 (receiver) for k = first, first + 1, ...
+# Indices are absolute: saving drops the used OTs but keeps the numbering, so
+# both parties stay in sync whenever either of them compacts its file.
+
+MAGIC = b'ROT1'
+HEADER = struct.Struct('>4sBQQQ')  # magic, party, first, count, position
+SENDER = 0
+RECEIVER = 1
+
+# ROTATE[d << 8 | R] = R rotated right by d bits (8-bit)
+ROTATE = bytes([((R >> d) | (R << (8 - d))) & 0xFF for d in range(8) for R in range(256)])
+
+
+def generate(count: int, group=None) -> tuple[bytes, bytes]:
+    """Offline phase: count random OTs through batch_ot, returns (sender's data, receiver's data)."""
+    group = group if group is not None else elgamal_safe_GGen()
+    R = secrets.token_bytes(count)
+    choices = [secrets.randbelow(batch_ot.CHOICES) for _ in range(count)]
+    messages = [[(R_k >> i) & 1 for i in range(batch_ot.CHOICES)] for R_k in R]
+    received = batch_ot.batch_ot(choices, messages, group)
+    return R, bytes([c | (bit << 3) for c, bit in zip(choices, received)])
+
+
+class PoolStats:
+    def __init__(self):
+        self.generated = 0  # random OTs added to the pool
+        self.served = 0     # random OTs used online
+        self.exhausted = 0  # online requests that found the pool too small
+        self.refills = 0    # calls to extend
+
+    def __repr__(self):
+        return f"PoolStats(generated={self.generated}, served={self.served}, exhausted={self.exhausted}, refills={self.refills})"
+
+
+class ROTPool:
+    """One party's random OTs, consumed sequentially. Both parties must take in the same order."""
+
+    def __init__(self, party: int, data: bytes = b'', path: str = None):
+        self.party = party
+        self.data = bytearray(data)
+        self.first = 0     # index of data[0]
+        self.position = 0  # next unused byte of data
+        self.path = path  # set by save/load, then every take is written through
+        self.stats = PoolStats()
+        self.stats.generated = len(data)
+
+    def __repr__(self):
+        return f"ROTPool(party={'sender' if self.party == SENDER else 'receiver'}, remaining={self.remaining()}, {self.stats})"
+
+    def remaining(self) -> int:
+        return len(self.data) - self.position
+
+    def extend(self, data: bytes):
+        # refill with more OTs from generate(), the other party must add the matching data
+        self.data += data
+        self.stats.generated += len(data)
+        self.stats.refills += 1
+        if self.path is not None:
+            self.save(self.path)
+
+    def take(self, N: int) -> int:
+        """Reserve the next N random OTs, returns the index of the first one."""
+        if N > self.remaining():
+            self.stats.exhausted += 1
+            raise ValueError(f"random OT pool exhausted: asked for {N}, {self.remaining()} left")
+        start = self.position
+        self.position += N
+        self.stats.served += N
+        if self.path is not None:
+            self._write_position()
+        return self.first + start
+
+    def view(self, start: int, N: int) -> bytes:
+        # data of OTs start ... start + N - 1
+        return bytes(self.data[start - self.first:start - self.first + N])
+
+    def _write_position(self):
+        # only the position field of the header changes
+        with open(self.path, 'r+b') as f:
+            f.seek(HEADER.size - 8)
+            f.write(struct.pack('>Q', self.position))
+            f.flush()
+            os.fsync(f.fileno())
+
+    def save(self, path: str):
+        """Write the unused OTs to path (replacing it atomically), later takes are written through."""
+        self.first += self.position
+        self.data = self.data[self.position:]
+        self.position = 0
+        directory = os.path.dirname(path) or "."
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(HEADER.pack(MAGIC, self.party, self.first, len(self.data), 0))
+            f.write(self.data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+        self.path = path
+
+    @classmethod
+    def load(cls, path: str) -> "ROTPool":
+        with open(path, 'rb') as f:
+            magic, party, first, count, position = HEADER.unpack(f.read(HEADER.size))
+            data = f.read(count)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a random OT pool")
+        if len(data) != count:
+            raise ValueError(f"{path} is truncated: {len(data)} of {count} bytes")
+        pool = cls(party, data, path)
+        pool.first = first
+        pool.position = position
+        return pool
+
+
+def fill(sender: ROTPool, receiver: ROTPool, count: int, group=None):
+    """Offline phase for both parties: add count matching random OTs to both pools."""
+    R, received = generate(count, group)
+    sender.extend(R)
+    receiver.extend(received)
+
+
+# online phase
+def receiver_request(pool: ROTPool, choices: list[int]) -> tuple[int, bytes]:
+    """Receiver: (first index, d per OT) for the sender."""
+    if any(b not in range(8) for b in choices):
+        raise ValueError("choices must be in 0..7")
+    start = pool.take(len(choices))
+    data = pool.view(start, len(choices))
+    return start, bytes([((c_k & 7) - b) & 7 for c_k, b in zip(data, choices)])
+
+
+def sender_response(pool: ROTPool, start: int, d: bytes, messages: bytes) -> bytes:
+    """Sender: messages[k] holds the 8 message bits of OT k (bit i = m_i), returns z."""
+    if len(d) != len(messages):
+        raise ValueError(f"{len(d)} offsets but {len(messages)} messages")
+    if pool.first + pool.position != start:
+        raise ValueError(f"pools out of sync: receiver is at {start}, sender at {pool.first + pool.position}")
+    pool.take(len(d))
+    R = pool.view(start, len(d))
+    return bytes([ROTATE[(d_k << 8) | R_k] ^ m_k for d_k, R_k, m_k in zip(d, R, messages)])
+
+
+def receiver_finish(pool: ROTPool, start: int, choices: list[int], z: bytes) -> list[int]:
+    data = pool.view(start, len(choices))
+    return [((z_k >> b) ^ (c_k >> 3)) & 1 for b, z_k, c_k in zip(choices, z, data)]
+
+
+def message_bytes(messages: list[list[int]]) -> bytes:
+    # 8 message bits per OT packed into a byte, bit i = messages[k][i]
+    return bytes([sum(bit << i for i, bit in enumerate(vector)) for vector in messages])
+
+
+def rot_ot(sender: ROTPool, receiver: ROTPool, choices: list[int], messages: list[list[int]]) -> list[int]:
+    # online phase with both parties in one process, [messages[k][choices[k]] for every k]
+    start, d = receiver_request(receiver, choices)
+    z = sender_response(sender, start, d, message_bytes(messages))
+    return receiver_finish(receiver, start, choices, z)
+
+
+def alice(channel: transport.Channel, pool: ROTPool, recipients: list[str]) -> list[int]:
+    # Alice is the receiver, her choice is her blood type index
+    encoding = Bob('o-', verbose=False).blood_type_encoding
+    choices = [encoding[recipient] for recipient in recipients]
+    start, d = receiver_request(pool, choices)
+    channel.send(struct.pack('>Q', start) + d)
+    return receiver_finish(pool, start, choices, channel.recv())
+
+
+def bob(channel: transport.Channel, pool: ROTPool, donors: list[str]):
+    data = channel.recv()
+    (start,) = struct.unpack_from('>Q', data)
+    channel.send(sender_response(pool, start, data[8:], message_bytes(batch_ot.compatibility_rows(donors))))
+
+
+def run(recipients: list[str], donors: list[str], sender: ROTPool, receiver: ROTPool, backend: str = "queue") -> tuple[list[int], transport.ChannelStats, transport.ChannelStats]:
+    """Online blood type OTs from the pools, 1 where donors[k] can donate to recipients[k]."""
+    if len(donors) != len(recipients):
+        raise ValueError(f"donors and recipients must have the same length, got {len(donors)} and {len(recipients)}")
+    result, _, stats_a, stats_b = transport.run_parties(
+        lambda channel: alice(channel, receiver, recipients),
+        lambda channel: bob(channel, sender, donors),
+        backend)
+    return result, stats_a, stats_b
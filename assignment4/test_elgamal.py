@@ -0,0 +1,256 @@
+"""
+Tests for the ElGamal groups.
+Run with: pytest test_elgamal.py
+"""
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import elgamal
+from fixed_base import FixedBaseCache, FixedBaseTable
+import batch_ot
+import multiprocessing
+import parallel_ot
+import random
+import rot_pool
+from groups import P256
+from ot import Alice, Bob
+
+
+class TestGroups(unittest.TestCase):
+
+    def test_toy_group_default(self):
+        assert elgamal.elgamal_safe_GGen() == (11, 5, 3)
+
+    def test_standard_groups(self):
+        """The built-in groups are safe-prime groups of the advertised size."""
+        for name in elgamal.STANDARD_GROUPS:
+            G = elgamal.standard_group(name)
+            assert G[0].bit_length() == int(name[-4:])
+            assert elgamal.check_group(G, rounds=3)
+
+    def test_unknown_group(self):
+        with self.assertRaises(ValueError):
+            elgamal.standard_group("modp1024")
+
+    def test_generated_group_is_cached(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "groups.json")
+            G = elgamal.elgamal_safe_GGen(128, cache_path=path)
+            assert G[0].bit_length() == 128
+            assert elgamal.check_group(G)
+            with open(path) as f:
+                assert "128" in json.load(f)
+
+            # a fresh process would read it back instead of generating again
+            assert elgamal.load_groups(path) == {128: G}
+            del elgamal._loaded[path]
+            assert elgamal.elgamal_safe_GGen(128, cache_path=path) == G
+
+    def test_enc_dec(self):
+        for G in (elgamal.elgamal_safe_GGen(), elgamal.standard_group("ffdhe2048")):
+            pk, sk = elgamal.elgamal_Gen(G)
+            for bit in (0, 1):
+                m = elgamal.encode_message(bit, G)
+                assert elgamal.elgamal_Dec(elgamal.elgamal_Enc(pk, m), sk, pk) == m
+
+
+class TestFixedBase(unittest.TestCase):
+
+    def test_table_matches_pow(self):
+        p, q, g = elgamal.standard_group("modp2048")
+        for window in (1, 4, 5):
+            table = FixedBaseTable(g, p, q.bit_length(), window)
+            for e in (0, 1, 2, q - 1, q, 2 * q, 12345678901234567890):
+                assert table.pow(e) == pow(g, e, p)
+
+    def test_cache_threshold_and_eviction(self):
+        p, q, g = elgamal.standard_group("ffdhe2048")
+        cache = FixedBaseCache(max_tables=2, threshold=2, window=3)
+        bases = [g, pow(g, 3, p), pow(g, 5, p)]
+        for base in bases:
+            for e in (7, q - 2):
+                assert cache.pow(base, e, p, q.bit_length()) == pow(base, e, p)
+        assert cache.stats.builds == 3
+        assert cache.stats.evictions == 1
+        assert list(cache.tables) == [(bases[1], p), (bases[2], p)]
+        assert cache.pow(bases[2], 11, p, q.bit_length()) == pow(bases[2], 11, p)
+        assert cache.stats.hits == 1
+
+    def test_small_modulus_skips_tables(self):
+        cache = FixedBaseCache(threshold=1)
+        assert cache.pow(3, 4, 11, 3) == pow(3, 4, 11)
+        assert not cache.tables
+
+
+class TestGroupBackends(unittest.TestCase):
+
+    def test_p256_arithmetic(self):
+        G = P256
+        assert G.power(G.g, G.q) is None
+        # x coordinate of 2G from the SEC test vectors
+        assert G.power(G.g, 2)[0] == 0x7cf27b188d034f7e8a52380304b51ac3c08969e277f21b35a60b48fc47669978
+        for e, f in ((1, 2), (12345, G.q - 1), (G.q - 5, 77)):
+            assert G.power_g(e) == G.power(G.g, e)
+            assert G.mul(G.power_g(e), G.power_g(f)) == G.power_g(e + f)
+            assert G.mul(G.power_g(e), G.inv(G.power_g(e))) is None
+        assert G.on_curve(G.oblivious_element(3))
+
+    def test_enc_dec_all_backends(self):
+        for name in ("toy", "ffdhe2048", "p256"):
+            G = elgamal.elgamal_group(name)
+            pk, sk = elgamal.elgamal_Gen(G)
+            opk = elgamal.elgamal_OGen(G, 3)
+            for bit in (0, 1):
+                m = elgamal.encode_message(bit, G)
+                assert elgamal.decode_message(elgamal.elgamal_Dec(elgamal.elgamal_Enc(pk, m), sk, pk), G) == bit
+                elgamal.elgamal_Enc(opk, m)
+        with self.assertRaises(ValueError):
+            elgamal.decode_message(5, elgamal.elgamal_safe_GGen())
+
+    def test_ot_p256(self):
+        """1-out-of-8 OT on P-256 agrees with Bob's compatibility table."""
+        for recipient in ('o-', 'a+', 'ab-'):
+            for donor in ('o-', 'b+'):
+                alice = Alice(recipient, verbose=False, group=P256)
+                bob = Bob(donor, verbose=False, group=P256)
+                m = alice.retreive(bob.transfer_c(alice.choose_b()))
+                assert m == bob.compatibility[bob.blood_type_encoding[donor]][alice.get_blood_type_index()]
+
+
+class TestBatchOT(unittest.TestCase):
+
+    def test_batch_matches_messages(self):
+        for G in (elgamal.elgamal_safe_GGen(), elgamal.elgamal_group("ffdhe2048"), P256):
+            choices = [0, 7, 3, 3, 5]
+            messages = [[(k + i) % 2 for i in range(8)] for k in range(len(choices))]
+            assert batch_ot.batch_ot(choices, messages, G) == [messages[k][b] for k, b in enumerate(choices)]
+
+    def test_pack_unpack(self):
+        for G in (batch_ot.as_group(elgamal.elgamal_safe_GGen()), elgamal.elgamal_group("ffdhe2048"), P256):
+            elements = [G.identity, G.g, G.power_g(12345), G.oblivious_element(7)]
+            data = G.pack(elements)
+            assert len(data) == len(elements) * G.element_size()
+            assert G.unpack(data) == elements
+            if G is not P256:
+                with self.assertRaises(ValueError):
+                    G.from_bytes(G.to_bytes(G.p - 1))  # order 2, outside the order q subgroup
+
+    def test_run_over_transport(self):
+        blood_types = ['o-', 'o+', 'a-', 'a+', 'b-', 'b+', 'ab-', 'ab+']
+        recipients = [r for r in blood_types for _ in blood_types]
+        donors = [d for _ in blood_types for d in blood_types]
+        result, stats_a, stats_b = batch_ot.run(recipients, donors, elgamal.elgamal_safe_GGen())
+        assert stats_a.rounds == 1 and stats_b.rounds == 1
+        rows = batch_ot.compatibility_rows(donors)
+        bob = Bob('o-', verbose=False)
+        assert result == [row[bob.blood_type_encoding[r]] for row, r in zip(rows, recipients)]
+
+    def test_bad_choice(self):
+        with self.assertRaises(ValueError):
+            batch_ot.batch_choose([8], elgamal.elgamal_safe_GGen())
+
+    def test_choose_b_resets_pk_list(self):
+        alice = Alice('a+', verbose=False)
+        alice.choose_b()
+        assert len(alice.choose_b()) == 8
+
+
+class TestROTPool(unittest.TestCase):
+
+    def make_pools(self, count: int):
+        sender, receiver = rot_pool.ROTPool(rot_pool.SENDER), rot_pool.ROTPool(rot_pool.RECEIVER)
+        rot_pool.fill(sender, receiver, count)
+        return sender, receiver
+
+    def test_derandomized_ot(self):
+        sender, receiver = self.make_pools(200)
+        choices = [k % 8 for k in range(100)]
+        messages = [[(k >> i) & 1 for i in range(8)] for k in range(100)]
+        assert rot_pool.rot_ot(sender, receiver, choices, messages) == [m[b] for b, m in zip(choices, messages)]
+        assert sender.remaining() == receiver.remaining() == 100
+
+    def test_blood_types_over_transport(self):
+        blood_types = ['o-', 'o+', 'a-', 'a+', 'b-', 'b+', 'ab-', 'ab+']
+        recipients = [r for r in blood_types for _ in blood_types]
+        donors = [d for _ in blood_types for d in blood_types]
+        sender, receiver = self.make_pools(64)
+        result, stats_a, stats_b = rot_pool.run(recipients, donors, sender, receiver)
+        assert stats_a.bytes_sent == 8 + 64 and stats_b.bytes_sent == 64
+        rows = batch_ot.compatibility_rows(donors)
+        assert result == [row[blood_types.index(r)] for row, r in zip(rows, recipients)]
+
+    def test_exhaustion(self):
+        sender, receiver = self.make_pools(3)
+        with self.assertRaises(ValueError):
+            rot_pool.rot_ot(sender, receiver, [0] * 4, [[0] * 8] * 4)
+        assert receiver.stats.exhausted == 1
+
+    def test_out_of_sync_and_bad_choice(self):
+        sender, receiver = self.make_pools(10)
+        start, d = rot_pool.receiver_request(receiver, [1, 2])
+        with self.assertRaises(ValueError):
+            rot_pool.sender_response(sender, start + 1, d, bytes(2))
+        assert sender.remaining() == 10  # nothing taken on a mismatch
+        assert len(rot_pool.sender_response(sender, start, d, bytes(2))) == 2
+        with self.assertRaises(ValueError):
+            rot_pool.receiver_request(receiver, [8])
+        assert receiver.remaining() == 8
+
+    def test_persistence(self):
+        """Used OTs are never handed out again after a reload, and compaction keeps the indices."""
+        sender, receiver = self.make_pools(50)
+        with tempfile.TemporaryDirectory() as tmp:
+            sender.save(os.path.join(tmp, "sender.rot"))
+            rot_pool.rot_ot(sender, receiver, [1] * 10, [[1] * 8] * 10)
+            receiver.save(os.path.join(tmp, "receiver.rot"))
+            sender = rot_pool.ROTPool.load(os.path.join(tmp, "sender.rot"))
+            receiver = rot_pool.ROTPool.load(os.path.join(tmp, "receiver.rot"))
+            assert sender.remaining() == receiver.remaining() == 40
+            assert rot_pool.rot_ot(sender, receiver, [5, 2], [[0, 0, 1, 0, 0, 1, 0, 0]] * 2) == [1, 1]
+
+
+class TestParallelOT(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.executor = parallel_ot.make_executor(2, multiprocessing.get_context("fork"))
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.executor.shutdown()
+
+    def test_batch_chunks(self):
+        G = elgamal.elgamal_safe_GGen()
+        choices = [k % 8 for k in range(37)]
+        messages = [[(k * 7 + i) % 3 % 2 for i in range(8)] for k in range(37)]
+        for chunk in (1, 5, 64):
+            result = parallel_ot.parallel_ot(choices, messages, G, self.executor, chunk)
+            assert result == [m[b] for b, m in zip(choices, messages)]
+        with self.assertRaises(ValueError):
+            parallel_ot.parallel_ot(choices, messages, G, self.executor, 0)
+
+    def test_alice_bob_on_pool(self):
+        for G in (elgamal.elgamal_safe_GGen(), P256):
+            for recipient, donor in (('ab+', 'o-'), ('o-', 'a+')):
+                alice = Alice(recipient, verbose=False, group=G, executor=self.executor, chunk=3)
+                bob = Bob(donor, verbose=False, group=G, executor=self.executor, chunk=3)
+                m = alice.retreive(bob.transfer_c(alice.choose_b()))
+                assert m == bob.compatibility[bob.blood_type_encoding[donor]][alice.get_blood_type_index()]
+
+    def test_choose_b_uses_secrets(self):
+        """Neither branch of choose_b draws from the predictable module-level random."""
+        def broken(*args):
+            raise AssertionError("random used for OT secrets")
+
+        with mock.patch.multiple(random, randint=broken, randrange=broken, getrandbits=broken, random=broken):
+            for executor in (self.executor, None):
+                alice = Alice('ab+', verbose=False, executor=executor, chunk=3)
+                bob = Bob('o-', verbose=False, executor=executor, chunk=3)
+                assert alice.retreive(bob.transfer_c(alice.choose_b())) == 1
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,14 +3,18 @@ import secrets
 import random
 from typing import Tuple, List, Dict, Callable
 
+from aes import fixed_key_G
+
 # Security parameter (key length in bits)
 K = 128
+PAD_MASK = (1 << 128) - 1  # the 0^16 half of a padded plaintext
 
 #enc scheme with special correctness property
-def G(key_a: bytes, key_b: bytes, gate_id: int) -> bytes:
+def G(key_a: bytes, key_b: bytes, gate_id: int, size: int = 32) -> bytes:
     """
     Pseudorandom generator (PRG) using cryptographic hash.
-    Takes two keys and gate identifier, outputs a pseudorandom string.
+    Takes two keys and gate identifier, outputs a pseudorandom string
+    of size bytes (at most 32).
     
     digest = F_k_2(K_1, gate_number)
 
@@ -20,7 +24,19 @@ def G(key_a: bytes, key_b: bytes, gate_id: int) -> bytes:
     h.update(key_b)
     h.update(gate_id.to_bytes(4, 'big')) 
     # return h.digest()[:K // 8]
-    return h.digest() # 32 bytes
+    return h.digest()[:size] # 32 bytes by default
+
+
+# PRF backends for garbling, all with the interface of G:
+#   sha256  G above
+#   aes     fixed-key AES (aes.py), from `cryptography` if installed, else pure Python
+PRFS = {"sha256": G, "aes": fixed_key_G}
+
+
+def get_prf(name: str) -> Callable:
+    if name not in PRFS:
+        raise ValueError(f"Unknown PRF {name}, use one of {list(PRFS)}")
+    return PRFS[name]
 
 
 def generate_random_key() -> bytes:
@@ -29,14 +45,18 @@ def generate_random_key() -> bytes:
 
 
 def xor_bytes(a: bytes, b: bytes) -> bytes:
-    """XOR two byte strings."""
-    return bytes(x ^ y for x, y in zip(a, b))
+    """XOR two byte strings (as long as the shorter one)."""
+    n = min(len(a), len(b))
+    if len(a) != n or len(b) != n:
+        a, b = a[:n], b[:n]
+    # one xor of two ints instead of a Python loop over the bytes
+    return (int.from_bytes(a, 'big') ^ int.from_bytes(b, 'big')).to_bytes(n, 'big')
 
 
 #=======================================================
 
 
-def enc(k_1: bytes, k_2:bytes , gate_number :int, m: bytes) -> bytes:
+def enc(k_1: bytes, k_2:bytes , gate_number :int, m: bytes, prf: Callable = G) -> bytes:
     """
     Encrypt message m(k_3) using two keys k_1 and k_2, and gate number.
 
@@ -47,20 +67,18 @@ def enc(k_1: bytes, k_2:bytes , gate_number :int, m: bytes) -> bytes:
         k_2: 16-byte key
         gate_number: Gate identifier
         m: 16-byte key
+        prf: one of PRFS
     
     Returns:
         32-byte ciphertext
     """
-    c_1 = G(k_1, k_2, gate_number) # 32 bytes
-    # generate 16 byes of 0s and pad it to message
-    pad = bytes([0]*16)    
-    m = m + pad
-    # print(f"m after padding: {m}, len: {len(m)}")
-    c_2 = xor_bytes(c_1, m)
-    return c_2
+    c_1 = prf(k_1, k_2, gate_number) # 32 bytes
+    # x || 0^16 as an int is x shifted by 128 bits, no padded copy of m needed
+    c_2 = int.from_bytes(c_1, 'big') ^ (int.from_bytes(m, 'big') << 128)
+    return c_2.to_bytes(32, 'big')
 
 
-def dec(k_1: bytes, k_2:bytes , gate_number :int, c: bytes) -> bytes:
+def dec(k_1: bytes, k_2:bytes , gate_number :int, c: bytes, prf: Callable = G) -> bytes:
 
     """
     Decrypt ciphertext c using two keys k_1 and k_2, and gate number
@@ -76,18 +94,55 @@ def dec(k_1: bytes, k_2:bytes , gate_number :int, c: bytes) -> bytes:
         k_2: 16-byte key
         gate_number: Gate identifier
         c: 32-byte ciphertext
+        prf: one of PRFS
         
     """
 
-    c_2 = G(k_1, k_2, gate_number) # 32 bytes
-    m = xor_bytes(c, c_2)
+    c_2 = prf(k_1, k_2, gate_number) # 32 bytes
+    m = int.from_bytes(c, 'big') ^ int.from_bytes(c_2, 'big')
 
     #if the last 16 bytes are not 0s, then return bot
     # else return first 16 bytes 
-    if m[16:] != bytes([0]*16):
+    if m & PAD_MASK:
         raise ValueError("Decryption failed: return BOT symbol")
     else:
-        return m[:16] # return first 16 bytes(that would be the output key)
-    
+        return (m >> 128).to_bytes(16, 'big') # return first 16 bytes(that would be the output key)
+
+
+def enc_unpadded(k_1: bytes, k_2: bytes, gate_number: int, m: bytes, prf: Callable = G) -> bytes:
+    """
+    Encryption without the 0^16 padding, for point-and-permute garbling where the
+    evaluator knows which row to decrypt and never has to recognise a failure.
+
+    c = F_k_2(K_1, gate_number)[:16] xor x
+
+    Args:
+        k_1: 16-byte key
+        k_2: 16-byte key
+        gate_number: Gate identifier
+        m: 16-byte key
+        prf: one of PRFS
+
+    Returns:
+        16-byte ciphertext
+    """
+    return (int.from_bytes(prf(k_1, k_2, gate_number, 16), 'big') ^ int.from_bytes(m, 'big')).to_bytes(16, 'big')
+
+
+# xor with the same pad
+dec_unpadded = enc_unpadded
+
+
+# Garbling writes straight into one preallocated bytearray: the ciphertext is
+# built as an int and stored with a slice assignment, no per-row bytes object
+# is kept. c and m may be memoryview slices of a packed garbled circuit.
+def enc_into(out: bytearray, offset: int, k_1: bytes, k_2: bytes, gate_number: int, m: bytes, prf: Callable = G):
+    """enc(k_1, k_2, gate_number, m) written to out[offset:offset + 32]."""
+    c = int.from_bytes(prf(k_1, k_2, gate_number), 'big') ^ (int.from_bytes(m, 'big') << 128)
+    out[offset:offset + 32] = c.to_bytes(32, 'big')
 
 
+def enc_unpadded_into(out: bytearray, offset: int, k_1: bytes, k_2: bytes, gate_number: int, m: bytes, prf: Callable = G):
+    """enc_unpadded(k_1, k_2, gate_number, m) written to out[offset:offset + 16]."""
+    c = int.from_bytes(prf(k_1, k_2, gate_number, 16), 'big') ^ int.from_bytes(m, 'big')
+    out[offset:offset + 16] = c.to_bytes(16, 'big')
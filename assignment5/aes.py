@@ -0,0 +1,120 @@
+import hashlib
+
+# Fixed-key AES-128 as a garbling PRF.
+#
+# With the key fixed and public, AES is a random permutation pi and
+#   H(k_a, k_b, T) = pi(X) xor X,  X = 2 k_a xor 4 k_b xor T
+# (doubling in GF(2^128)) is a tweakable correlation robust hash, the usual
+# choice in garbling implementations because AES-NI makes pi a few cycles.
+# The block cipher comes from the `cryptography` package when it is installed,
+# otherwise from the pure-Python T-table AES below (FIPS-197), which only needs
+# 16 table lookups and xors per round on 32-bit words.
+
+FIXED_KEY = hashlib.sha256(b"crycom2025 fixed-key AES").digest()[:16]
+
+try:
+    from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+except ImportError:
+    Cipher = None
+
+
+def _xtime(a: int) -> int:
+    # multiplication by 2 in GF(2^8)
+    a <<= 1
+    return a ^ 0x11B if a & 0x100 else a
+
+
+def _sbox() -> list[int]:
+    # inverse in GF(2^8) followed by the affine map
+    exp, log = [0] * 255, [0] * 256
+    a = 1
+    for i in range(255):
+        exp[i] = a
+        log[a] = i
+        a ^= _xtime(a)  # times the generator 3
+    sbox = []
+    for x in range(256):
+        b = exp[-log[x] % 255] if x else 0
+        s = b
+        for shift in range(1, 5):
+            s ^= ((b << shift) | (b >> (8 - shift))) & 0xFF
+        sbox.append(s ^ 0x63)
+    return sbox
+
+
+SBOX = _sbox()
+# TE0[x] = column (2 S[x], S[x], S[x], 3 S[x]), TE1..TE3 are its byte rotations
+TE0 = [(_xtime(s) << 24) | (s << 16) | (s << 8) | (_xtime(s) ^ s) for s in SBOX]
+TE1 = [(t >> 8) | ((t & 0xFF) << 24) for t in TE0]
+TE2 = [(t >> 16) | ((t & 0xFFFF) << 16) for t in TE0]
+TE3 = [(t >> 24) | ((t & 0xFFFFFF) << 8) for t in TE0]
+
+
+class AES128:
+    """AES-128 encryption of 128-bit ints (big-endian blocks)."""
+
+    def __init__(self, key: bytes):
+        if len(key) != 16:
+            raise ValueError(f"AES-128 needs a 16-byte key, got {len(key)} bytes")
+        w = [int.from_bytes(key[i:i + 4], 'big') for i in range(0, 16, 4)]
+        rcon = 1
+        for i in range(4, 44):
+            t = w[i - 1]
+            if i % 4 == 0:
+                t = ((SBOX[(t >> 16) & 0xFF] << 24) | (SBOX[(t >> 8) & 0xFF] << 16)
+                     | (SBOX[t & 0xFF] << 8) | SBOX[t >> 24]) ^ (rcon << 24)
+                rcon = _xtime(rcon)
+            w.append(w[i - 4] ^ t)
+        self.round_keys = w
+
+    def encrypt_int(self, block: int) -> int:
+        rk = self.round_keys
+        s0 = (block >> 96) ^ rk[0]
+        s1 = ((block >> 64) & 0xFFFFFFFF) ^ rk[1]
+        s2 = ((block >> 32) & 0xFFFFFFFF) ^ rk[2]
+        s3 = (block & 0xFFFFFFFF) ^ rk[3]
+        for r in range(4, 40, 4):
+            s0, s1, s2, s3 = (
+                TE0[s0 >> 24] ^ TE1[(s1 >> 16) & 0xFF] ^ TE2[(s2 >> 8) & 0xFF] ^ TE3[s3 & 0xFF] ^ rk[r],
+                TE0[s1 >> 24] ^ TE1[(s2 >> 16) & 0xFF] ^ TE2[(s3 >> 8) & 0xFF] ^ TE3[s0 & 0xFF] ^ rk[r + 1],
+                TE0[s2 >> 24] ^ TE1[(s3 >> 16) & 0xFF] ^ TE2[(s0 >> 8) & 0xFF] ^ TE3[s1 & 0xFF] ^ rk[r + 2],
+                TE0[s3 >> 24] ^ TE1[(s0 >> 16) & 0xFF] ^ TE2[(s1 >> 8) & 0xFF] ^ TE3[s2 & 0xFF] ^ rk[r + 3])
+        # last round: SubBytes and ShiftRows only
+        S = SBOX
+        out = 0
+        for a, b, c, d, k in ((s0, s1, s2, s3, rk[40]), (s1, s2, s3, s0, rk[41]),
+                              (s2, s3, s0, s1, rk[42]), (s3, s0, s1, s2, rk[43])):
+            out = (out << 32) | (((S[a >> 24] << 24) | (S[(b >> 16) & 0xFF] << 16)
+                                  | (S[(c >> 8) & 0xFF] << 8) | S[d & 0xFF]) ^ k)
+        return out
+
+    def encrypt_block(self, block: bytes) -> bytes:
+        return self.encrypt_int(int.from_bytes(block, 'big')).to_bytes(16, 'big')
+
+
+def fixed_key_permutation(key: bytes = FIXED_KEY):
+    """pi as a function on 128-bit ints, from `cryptography` if available."""
+    if Cipher is not None:
+        encryptor = Cipher(algorithms.AES(key), modes.ECB()).encryptor()
+        return lambda x: int.from_bytes(encryptor.update(x.to_bytes(16, 'big')), 'big')
+    return AES128(key).encrypt_int
+
+
+BACKEND = "cryptography" if Cipher is not None else "python"
+_pi = fixed_key_permutation()
+
+
+def _double(x: int) -> int:
+    # multiplication by 2 in GF(2^128)
+    x <<= 1
+    return x ^ 0x100000000000000000000000000000087 if x >> 128 else x
+
+
+def fixed_key_G(key_a: bytes, key_b: bytes, gate_id: int, size: int = 32) -> bytes:
+    """Same interface as Enc_scheme.G: size bytes, one AES call per 16 bytes."""
+    x = _double(int.from_bytes(key_a, 'big')) ^ _double(_double(int.from_bytes(key_b, 'big')))
+    out = []
+    for counter in range((size + 15) // 16):
+        X = x ^ (gate_id << 8) ^ counter
+        out.append((_pi(X) ^ X).to_bytes(16, 'big'))
+    return b''.join(out)[:size]
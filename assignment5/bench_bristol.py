@@ -0,0 +1,44 @@
+"""
+Parsing speed of the Bristol loader on a generated Bristol Fashion file of
+chi_circuit(width, rounds) (2 * width * rounds + width gates), checked against
+the circuit it was written from.
+Run with: python bench_bristol.py [width] [rounds]
+"""
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+
+from bristol import load_bristol
+from garbled_circuits import GATE_TYPES, chi_circuit, chi_gates, plain_eval
+
+
+def write_chi(path: str, width: int, rounds: int):
+    q = width + 2 * width * rounds
+    with open(path, "w") as f:
+        f.write(f"{q} {2 * width + q}\n2 {width} {width}\n1 {width}\n\n")
+        # wire numbers of chi_gates are already in order, Bristol counts from 0
+        f.writelines(f"2 1 {a - 1} {b - 1} {number - 1} {GATE_TYPES[code]}\n" for number, code, a, b in chi_gates(width, rounds))
+
+
+def bench(width: int, rounds: int):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "chi.txt")
+        write_chi(path, width, rounds)
+        size = os.path.getsize(path)
+        start = time.perf_counter()
+        circuit, inputs, outputs = load_bristol(path, compact=True)
+        seconds = time.perf_counter() - start
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3  # kB on Linux
+    x = [random.getrandbits(1) for _ in range(circuit.n)]
+    ok = plain_eval(circuit, x) == plain_eval(chi_circuit(width, rounds, compact=True), x)
+    print(f"chi_circuit({width}, {rounds})  {circuit.q} gates  file {size / 1e6:.1f} MB  load {seconds:.2f} s"
+          f"  {circuit.q / seconds / 1e6:.2f} M gates/s  max RSS {rss:.0f} MB  ok={ok}")
+
+
+if __name__ == '__main__':
+    width = int(sys.argv[1]) if len(sys.argv) > 1 else 128
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 8000
+    bench(width, rounds)
@@ -0,0 +1,52 @@
+"""
+Memory of the list and compact garbled circuit representations, and a
+million-gate run of the compact one.
+Run with: python bench_compact.py [bits for the big run, about 4 gates per bit]
+"""
+import resource
+import secrets
+import sys
+import time
+import tracemalloc
+
+from garbled_circuits import comparison_circuit, garble_compact, plain_eval, yao_eval_packed, yao_garble
+
+
+def traced(fn) -> tuple[object, int]:
+    # result of fn() and the bytes it still holds
+    tracemalloc.start()
+    result = fn()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size
+
+
+def compare(bits: int, scheme: str):
+    _, lists = traced(lambda: (lambda c: (c, yao_garble(c, [], scheme)))(comparison_circuit(bits)))
+    _, compact = traced(lambda: garble_compact(comparison_circuit(bits, compact=True), scheme))
+    q = 4 * bits - 2
+    print(f"{scheme:<17} {q:>8} gates  lists {lists / 1e6:8.1f} MB ({lists / q:6.0f} B/gate)  "
+          f"compact {compact / 1e6:8.1f} MB ({compact / q:6.0f} B/gate)")
+
+
+def big_run(bits: int, scheme: str):
+    circuit = comparison_circuit(bits, compact=True)
+    x = [secrets.randbits(1) for _ in range(circuit.n)]
+    start = time.perf_counter()
+    garbled = garble_compact(circuit, scheme)
+    garble = time.perf_counter() - start
+    start = time.perf_counter()
+    Y = yao_eval_packed(garbled.encode(x), memoryview(garbled.data), circuit, scheme)
+    evaluate = time.perf_counter() - start
+    ok = Y[0] == garbled.d()[0][plain_eval(circuit, x)[0]]
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3  # kB on Linux
+    print(f"{scheme:<17} {circuit.q:>8} gates  garble {garble:7.2f} s  eval {evaluate:7.2f} s  "
+          f"ciphertexts {len(garbled.data) / 1e6:7.1f} MB  labels {len(garbled.labels) / 1e6:6.1f} MB  "
+          f"max RSS {rss:7.1f} MB  ok={ok}")
+
+
+if __name__ == "__main__":
+    bits = int(sys.argv[1]) if len(sys.argv) > 1 else 250000
+    for scheme in ("classic", "half_gates"):
+        compare(4096, scheme)
+    big_run(bits, "half_gates")
@@ -0,0 +1,43 @@
+"""
+Decoding all m outputs with yao_de: from the output keys, from a colour table and
+from a hashed table, against one yao_de call per output as before.
+Run with: python bench_decode.py [outputs] [repeats]
+"""
+import random
+import sys
+import time
+
+from garbled_circuits import chi_circuit, garble_compact, plain_eval, yao_de, yao_eval_packed
+
+
+def timed(decode, repeats: int) -> tuple[list[int], float]:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        bits = decode()
+    return bits, (time.perf_counter() - start) / repeats
+
+
+def bench(m: int, repeats: int):
+    circuit = chi_circuit(m, 1, compact=True)
+    garbled = garble_compact(circuit, "half_gates")
+    x = [random.getrandbits(1) for _ in range(circuit.n)]
+    Y = yao_eval_packed(garbled.encode(x), garbled.data, circuit, "half_gates")
+    d = garbled.d()
+    expected = plain_eval(circuit, x)
+    colour_table, hashed_table = garbled.decoding_table(), garbled.decoding_table(hashed=True)
+    cases = [
+        ("one call per output", lambda: [yao_de([Y_j], [d_j])[0] for Y_j, d_j in zip(Y, d)], 32 * m),
+        ("output keys", lambda: yao_de(Y, d), 32 * m),
+        ("colour table", lambda: yao_de(Y, colour_table), len(colour_table)),
+        ("hashed table", lambda: yao_de(Y, hashed_table), len(hashed_table)),
+    ]
+    print(f"{m} outputs, half_gates")
+    for name, decode, size in cases:
+        bits, seconds = timed(decode, repeats)
+        print(f"  {name:<20} {seconds * 1e6:9.1f} us  {seconds / m * 1e9:7.1f} ns/output  table {size:>7} B  ok={bits == expected}")
+
+
+if __name__ == '__main__':
+    m = int(sys.argv[1]) if len(sys.argv) > 1 else 1024
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    bench(m, repeats)
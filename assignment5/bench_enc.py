@@ -0,0 +1,33 @@
+"""
+Rows per second of the garbling encryption for every PRF backend.
+Run with: python bench_enc.py [rows]
+"""
+import sys
+import time
+
+import aes
+from Enc_scheme import PRFS, dec, enc, enc_unpadded, generate_random_key
+
+
+def bench(prf_name: str, rows: int):
+    prf = PRFS[prf_name]
+    keys = [(generate_random_key(), generate_random_key(), generate_random_key()) for _ in range(rows)]
+    start = time.perf_counter()
+    cts = [enc(k1, k2, i, m, prf) for i, (k1, k2, m) in enumerate(keys)]
+    t_enc = time.perf_counter() - start
+    start = time.perf_counter()
+    ok = all(dec(k1, k2, i, c, prf) == m for i, ((k1, k2, m), c) in enumerate(zip(keys, cts)))
+    t_dec = time.perf_counter() - start
+    start = time.perf_counter()
+    for i, (k1, k2, m) in enumerate(keys):
+        enc_unpadded(k1, k2, i, m, prf)
+    t_unpadded = time.perf_counter() - start
+    print(f"{prf_name:<7} enc {rows / t_enc:10.0f} rows/s  dec {rows / t_dec:10.0f} rows/s  "
+          f"enc_unpadded {rows / t_unpadded:10.0f} rows/s  ok={ok}")
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    print(f"AES backend: {aes.BACKEND}")
+    for name in PRFS:
+        bench(name, rows)
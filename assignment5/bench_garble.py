@@ -0,0 +1,38 @@
+"""
+Garbled circuit size and garble/eval time for each garbling scheme.
+Run with: python bench_garble.py [bits] [prf]
+"""
+import secrets
+import sys
+import time
+
+from garbled_circuits import SCHEMES, blood_type_circuit, comparison_circuit, garbled_size, plain_eval
+from garbled_circuits import yao_En, yao_de, yao_eval, yao_garble
+
+
+def bench(name: str, make_circuit, scheme: str, prf: str = "sha256"):
+    circuit = make_circuit()
+    x = [secrets.randbits(1) for _ in range(circuit.n)]
+    start = time.perf_counter()
+    gc, e, d = yao_garble(circuit, [], scheme, prf)
+    garble = time.perf_counter() - start
+    start = time.perf_counter()
+    Y = yao_eval(yao_En(e, x), gc, circuit, verbose=False, scheme=scheme, prf=prf)
+    evaluate = time.perf_counter() - start
+    ok = yao_de(Y, d) == plain_eval(circuit, x)
+    print(f"{name:<16} {scheme:<17} {circuit.q:>7} gates {garbled_size(gc):>10} B  "
+          f"garble {garble * 1e3:9.2f} ms  eval {evaluate * 1e3:9.2f} ms  ok={ok}")
+    return garble, evaluate
+
+
+if __name__ == "__main__":
+    bits = int(sys.argv[1]) if len(sys.argv) > 1 else 1024
+    prf = sys.argv[2] if len(sys.argv) > 2 else "sha256"
+    for name, make_circuit in [("blood type", blood_type_circuit),
+                               (f"x > y {bits} bit", lambda: comparison_circuit(bits))]:
+        classic = None
+        for scheme in SCHEMES:
+            garble, evaluate = bench(name, make_circuit, scheme, prf)
+            classic = classic or (garble, evaluate)
+            if scheme != "classic":
+                print(f"{'':<16} {'':<17} speedup over classic: garble {classic[0] / garble:5.1f}x  eval {classic[1] / evaluate:5.1f}x")
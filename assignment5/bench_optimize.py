@@ -0,0 +1,77 @@
+"""
+Gate counts, garbled size and garble + evaluate time before and after optimize.
+Circuits: the blood type circuit, comparison_circuit(bits) and a ripple-carry
+adder loaded from Bristol Fashion (majority as three ANDs, copies through EQW),
+plus any Bristol files given on the command line.
+Run with: python bench_optimize.py [bits] [bristol files ...]
+"""
+import io
+import random
+import sys
+import time
+
+from bristol import load_bristol
+from garbled_circuits import SCHEMES, as_compact, blood_type_circuit, comparison_circuit, garble_compact, yao_eval_packed
+from optimize import non_free, optimize
+
+
+def adder_bristol(bits: int) -> str:
+    # x + y mod 2^bits, sum_i = x_i ^ y_i ^ c_i, c_(i+1) = (x_i & y_i) ^ (x_i & c_i) ^ (y_i & c_i)
+    gates = []
+    wire = 2 * bits
+    c = None
+    sums = []
+
+    def gate(line: str) -> int:
+        nonlocal wire
+        gates.append(line.format(out=wire))
+        wire += 1
+        return wire - 1
+
+    for i in range(bits):
+        x, y = i, bits + i
+        t = gate(f"2 1 {x} {y} {{out}} XOR")
+        if c is None:
+            sums.append(gate(f"1 1 {t} {{out}} EQW"))
+            c = gate(f"2 1 {x} {y} {{out}} AND")
+            continue
+        sums.append(gate(f"2 1 {t} {c} {{out}} XOR"))
+        if i < bits - 1:
+            xy = gate(f"2 1 {x} {y} {{out}} AND")
+            xc = gate(f"2 1 {x} {c} {{out}} AND")
+            yc = gate(f"2 1 {y} {c} {{out}} AND")
+            c = gate(f"2 1 {gate(f'2 1 {xy} {xc} {{out}} XOR')} {yc} {{out}} XOR")
+    # the sums as the last wires
+    outputs = [gate(f"1 1 {s} {{out}} EQW") for s in sums]
+    assert outputs[-1] == wire - 1
+    return f"{len(gates)} {wire}\n2 {bits} {bits}\n1 {bits}\n\n" + "\n".join(gates) + "\n"
+
+
+def end_to_end(circuit, scheme: str) -> tuple[int, float]:
+    start = time.perf_counter()
+    garbled = garble_compact(circuit, scheme)
+    x = [random.getrandbits(1) for _ in range(circuit.n)]
+    yao_eval_packed(garbled.encode(x), garbled.data, circuit, scheme)
+    return len(garbled.data), time.perf_counter() - start
+
+
+def bench(name: str, circuit):
+    circuit = as_compact(circuit)
+    start = time.perf_counter()
+    optimized, stats = optimize(circuit)
+    seconds = time.perf_counter() - start
+    print(f"{name:<22} gates {circuit.q:>7} -> {optimized.q:<7} non-free {non_free(stats.before):>7} -> "
+          f"{non_free(stats.after):<7} rewrites {stats.rewrites:<5} optimize {seconds * 1e3:8.1f} ms")
+    for scheme in SCHEMES:
+        size, before = end_to_end(circuit, scheme)
+        size_opt, after = end_to_end(optimized, scheme)
+        print(f"    {scheme:<18} {size:>9} -> {size_opt:<9} B   garble + eval {before * 1e3:8.1f} -> {after * 1e3:8.1f} ms")
+
+
+if __name__ == '__main__':
+    bits = int(sys.argv[1]) if len(sys.argv) > 1 else 256
+    bench("blood type", blood_type_circuit())
+    bench(f"x > y {bits} bit", comparison_circuit(bits))
+    bench(f"adder {bits} bit (Bristol)", load_bristol(io.StringIO(adder_bristol(bits)))[0])
+    for path in sys.argv[2:]:
+        bench(path, load_bristol(path, compact=True)[0])
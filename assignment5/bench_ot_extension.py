@@ -0,0 +1,59 @@
+"""
+Benchmark of OT extension against public-key base OTs.
+Run with: python bench_ot_extension.py [m]
+"""
+import secrets
+import sys
+import time
+
+import ot_extension
+from ot_extension import ExtensionReceiver, ExtensionSender, KAPPA, base_choose, base_receive, base_send
+from elgamal import elgamal_group
+
+
+def bench_base(name: str, n: int = KAPPA):
+    # n 1-out-of-2 base OTs, both parties
+    G = elgamal_group(name)
+    choices = [secrets.randbits(1) for _ in range(n)]
+    start = time.perf_counter()
+    pks, sks = base_choose(choices, G)
+    c1, seeds = base_send(pks, G)
+    chosen = base_receive(c1, choices, sks, G)
+    seconds = time.perf_counter() - start
+    assert chosen == [pair[s] for pair, s in zip(seeds, choices)]
+    print(f"base OT   {name:<10} {n:>9} OTs  {n / seconds:12.0f} OT/s  {seconds:8.3f} s")
+
+
+def bench_extension(m: int):
+    S, R = ExtensionSender(), ExtensionReceiver()
+    start = time.perf_counter()
+    S.base_finish(R.base_send(S.base_choose()))
+    print(f"base phase p256 {KAPPA} OTs {time.perf_counter() - start:8.3f} s (once)")
+
+    choices = [secrets.randbits(1) for _ in range(m)]
+    messages = [(secrets.token_bytes(16), secrets.token_bytes(16)) for _ in range(m)]
+    delta = secrets.token_bytes(16)
+    for mode in ("random", "correlated", "chosen"):
+        start = time.perf_counter()
+        u, t = R.extend(choices)
+        q = S.extend(u, m)
+        if mode == "random":
+            pairs = S.random(q)
+            got = R.random(t)
+            ok = got == [pair[r] for pair, r in zip(pairs, choices)]
+        elif mode == "correlated":
+            x0, data = S.correlated(q, delta)
+            got = R.correlated(t, choices, data)
+            ok = got == [x if not r else ot_extension.xor_bytes(x, delta) for x, r in zip(x0, choices)]
+        else:
+            got = R.receive(t, choices, S.send(q, messages))
+            ok = got == [pair[r] for pair, r in zip(messages, choices)]
+        seconds = time.perf_counter() - start
+        print(f"extended  {mode:<10} {m:>9} OTs  {m / seconds:12.0f} OT/s  {seconds:8.3f} s  ok={ok}")
+
+
+if __name__ == "__main__":
+    m = int(sys.argv[1]) if len(sys.argv) > 1 else 1 << 17
+    bench_base("p256", 32)
+    bench_base("ffdhe2048", 8)
+    bench_extension(m)
@@ -0,0 +1,36 @@
+"""
+Garbling time of parallel_garble for 1..N workers against garble_compact, on
+chi_circuit (width parallel gates per layer, 2 * rounds layers with half_gates).
+Run with: python bench_parallel_garble.py [width] [rounds] [scheme] [max workers]
+"""
+import os
+import sys
+import time
+
+from garbled_circuits import SCHEMES, chi_circuit, garble_compact
+from parallel_garble import levelize, parallel_garble
+
+
+def bench(width: int, rounds: int, scheme: str, max_workers: int):
+    circuit = chi_circuit(width, rounds, compact=True)
+    print(f"chi_circuit({width}, {rounds})  {circuit.q} gates  {len(levelize(circuit))} layers  {scheme}  {os.cpu_count()} CPUs")
+    start = time.perf_counter()
+    expected = garble_compact(circuit, scheme, seed=b'bench')
+    sequential = time.perf_counter() - start
+    print(f"  garble_compact        {sequential:8.2f} s")
+    for workers in range(1, max_workers + 1):
+        start = time.perf_counter()
+        garbled = parallel_garble(circuit, scheme, seed=b'bench', workers=workers)
+        seconds = time.perf_counter() - start
+        same = garbled.data == expected.data and garbled.labels == expected.labels
+        print(f"  {workers:>2} workers            {seconds:8.2f} s  speedup {sequential / seconds:5.2f}x  identical={same}")
+
+
+if __name__ == '__main__':
+    width = int(sys.argv[1]) if len(sys.argv) > 1 else 1024
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    scheme = sys.argv[3] if len(sys.argv) > 3 else "half_gates"
+    max_workers = int(sys.argv[4]) if len(sys.argv) > 4 else max(os.cpu_count(), 4)
+    if scheme not in SCHEMES:
+        raise ValueError(f"Unsupported scheme {scheme}, use one of {SCHEMES}")
+    bench(width, rounds, scheme, max_workers)
@@ -0,0 +1,63 @@
+"""
+Throughput and allocations of the byte-level primitives and of packed garbling.
+Run with: python bench_primitives.py [rows] [bits]
+"""
+import sys
+import time
+import tracemalloc
+
+from Enc_scheme import G, enc, enc_into, generate_random_key, xor_bytes
+from garbled_circuits import SCHEMES, comparison_circuit, yao_garble, yao_garble_packed
+
+
+def xor_generator(a: bytes, b: bytes) -> bytes:
+    # the per-byte version xor_bytes replaced
+    return bytes(x ^ y for x, y in zip(a, b))
+
+
+def enc_padded_copy(k_1: bytes, k_2: bytes, gate_number: int, m: bytes) -> bytes:
+    # the enc it replaced: padded copy of m and the per-byte xor
+    return xor_generator(G(k_1, k_2, gate_number), m + bytes(16))
+
+
+def rate(label: str, fn, rows: int):
+    start = time.perf_counter()
+    fn()
+    seconds = time.perf_counter() - start
+    print(f"{label:<28} {rows / seconds:12.0f} /s")
+
+
+def allocations(label: str, fn):
+    # live blocks and bytes held by the result, and the peak while building it
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    start = time.perf_counter()
+    result = fn()
+    seconds = time.perf_counter() - start
+    after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    diff = after.compare_to(before, 'filename')
+    blocks = sum(stat.count_diff for stat in diff)
+    size = sum(stat.size_diff for stat in diff)
+    print(f"{label:<28} {blocks:>9} blocks {size / 1e3:10.1f} kB live {peak / 1e3:10.1f} kB peak  {seconds * 1e3:8.1f} ms (traced)")
+    return result
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    bits = int(sys.argv[2]) if len(sys.argv) > 2 else 1024
+    a, b = generate_random_key() * 2, generate_random_key() * 2
+    rate("xor 32 bytes, generator", lambda: [xor_generator(a, b) for _ in range(rows)], rows)
+    rate("xor 32 bytes, int", lambda: [xor_bytes(a, b) for _ in range(rows)], rows)
+
+    k1, k2, m = generate_random_key(), generate_random_key(), generate_random_key()
+    out = bytearray(32 * rows)
+    rate("enc rows, padded copy", lambda: [enc_padded_copy(k1, k2, i, m) for i in range(rows)], rows)
+    rate("enc rows", lambda: [enc(k1, k2, i, m) for i in range(rows)], rows)
+    rate("enc rows into bytearray", lambda: [enc_into(out, 32 * i, k1, k2, i, m) for i in range(rows)], rows)
+
+    print(f"\ngarbling x > y {bits} bit, circuit and wire keys included")
+    for scheme in SCHEMES:
+        allocations(f"{scheme} lists", lambda: yao_garble(comparison_circuit(bits), [], scheme))
+        allocations(f"{scheme} packed", lambda: yao_garble_packed(comparison_circuit(bits), scheme))
@@ -0,0 +1,49 @@
+"""
+Peak memory of streaming garbling against the whole garbled circuit in memory,
+on chi_circuit (narrow and deep). Every mode runs in its own process so that
+max RSS is its own.
+Run with: python bench_stream.py [width] [rounds] [scheme]
+"""
+import resource
+import secrets
+import subprocess
+import sys
+import time
+
+from garble_stream import GateStream, StreamGarbler, eval_stream
+from garbled_circuits import chi_circuit, chi_gates, garble_compact, yao_En, yao_eval_packed
+
+MODES = ("compact", "stream")
+
+
+def run(mode: str, width: int, rounds: int, scheme: str):
+    start = time.perf_counter()
+    if mode == "compact":
+        circuit = chi_circuit(width, rounds, compact=True)
+        garbled = garble_compact(circuit, scheme)
+        x = [secrets.randbits(1) for _ in range(circuit.n)]
+        Y = yao_eval_packed(garbled.encode(x), garbled.data, circuit, scheme)
+        ok = [Y_j in d_j for Y_j, d_j in zip(Y, garbled.d())]
+        q, held = circuit.q, f"ciphertexts {len(garbled.data) / 1e6:.1f} MB"
+    else:
+        # gates are regenerated for every pass instead of stored
+        circuit = GateStream(2 * width, width, width + 2 * width * rounds, lambda: chi_gates(width, rounds))
+        garbler = StreamGarbler(circuit, scheme)
+        x = [secrets.randbits(1) for _ in range(circuit.n)]
+        Y = eval_stream(yao_En(garbler.e, x), garbler.chunks(), circuit, scheme)
+        ok = [Y_j in d_j for Y_j, d_j in zip(Y, garbler.d)]
+        q, held = circuit.q, f"peak {garbler.peak_labels} live wires"
+    seconds = time.perf_counter() - start
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3  # kB on Linux
+    print(f"{mode:<8} {scheme:<11} {q:>9} gates  {seconds:7.1f} s  max RSS {rss:8.1f} MB  {held}  ok={all(ok)}")
+
+
+if __name__ == "__main__":
+    width = int(sys.argv[1]) if len(sys.argv) > 1 else 128
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 8000
+    scheme = sys.argv[3] if len(sys.argv) > 3 else "half_gates"
+    if len(sys.argv) > 4:
+        run(sys.argv[4], width, rounds, scheme)
+    else:
+        for mode in MODES:
+            subprocess.run([sys.executable, __file__, str(width), str(rounds), scheme, mode], check=True)
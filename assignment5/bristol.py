@@ -0,0 +1,180 @@
+import itertools
+from array import array
+
+from garbled_circuits import GATE_CODES, NOT, XOR, CompactCircuit
+
+# Loader for circuits in Bristol Fashion (and the older Bristol format), the
+# format of the usual MPC benchmark circuits (AES-128, SHA-256, adders, ...):
+#
+#   num_gates num_wires
+#   niv n_1 ... n_niv          input values and their sizes in bits
+#   nov m_1 ... m_nov          output values
+#
+#   2 1 a b out XOR            one gate per line, wires numbered from 0
+#
+# The old format has "n_1 n_2 m" on the second line and no third line. "2 2 1"
+# reads as either, so the format is told by the next non-blank line: the outputs
+# line of Fashion is all numbers, a gate line ends in the gate name. Inputs are
+# the first wires and outputs the last ones, gates come in evaluation order.
+#
+# The file is read line by line into a CompactCircuit with the numbering of
+# garbled_circuits: inputs 1..n, gate i on wire n + i + 1, the m outputs last.
+# Bristol wire numbers are mapped to ours as the gates arrive. Gates outside
+# AND/XOR/NOT are lowered:
+#   INV          NOT
+#   EQW a out    no gate, out is another name for a
+#   EQ c out     the constant wire c, zero = XOR(1, 1) and one = NOT(zero), made once
+#   MAND         one AND per output
+# A gate driving an output wire is held back until the end (or until a later gate
+# reads it) so that the outputs end up as the last m wires in order. When that
+# does not work out (an output that is an input, a constant or read early) the
+# outputs are copied to the end with free XORs against zero.
+
+
+def _header_numbers(lines, what: str) -> list[int]:
+    for line in lines:
+        if line.strip():
+            try:
+                return [int(token) for token in line.split()]
+            except ValueError:
+                raise ValueError(f"bad Bristol header, expected {what}: {line.strip()}") from None
+    raise ValueError(f"Bristol file ends before the {what}")
+
+
+def load_bristol(source, compact: bool = False):
+    """
+    Reads a Bristol (Fashion) circuit from a path or an iterable of lines (an open
+    text file). Returns (circuit, input sizes, output sizes): a CompactCircuit if
+    compact, else a Circuit, and the bit sizes of the input and output values in
+    wire order (x of circuit.n bits is the concatenation of the input values).
+    """
+    if isinstance(source, str):
+        with open(source) as f:
+            return load_bristol(f, compact)
+    lines = iter(source)
+    header = _header_numbers(lines, "gate and wire count")
+    if len(header) != 2:
+        raise ValueError(f"bad Bristol header, expected gate and wire count, got {header}")
+    num_gates, num_wires = header
+    values = _header_numbers(lines, "input sizes")
+    third = next((line for line in lines if line.strip()), None)
+    if third is not None and not third.split()[-1].isalpha():
+        outs = _header_numbers([third], "output sizes")
+        if len(values) != values[0] + 1 or len(outs) != outs[0] + 1:
+            raise ValueError(f"bad Bristol Fashion header, expected sizes, got {values} and {outs}")
+        inputs, outputs = values[1:], outs[1:]
+    elif len(values) == 3:
+        inputs, outputs = values[:2], values[2:]  # old format, third is the first gate
+        if third is not None:
+            lines = itertools.chain([third], lines)
+    else:
+        raise ValueError(f"bad Bristol header, expected input sizes, got {values}")
+    n, m = sum(inputs), sum(outputs)
+    if n < 1 or m < 1 or n + m > num_wires:
+        raise ValueError(f"{n} inputs and {m} outputs do not fit in {num_wires} wires")
+
+    circuit = CompactCircuit(n, m)
+    gates = circuit.gates
+    add_gate, add_a, add_b, add_code = gates.append, circuit.A.append, circuit.B.append, circuit.codes.append
+    # Bristol wire -> our wire, 0 while undefined
+    wmap = array('I', range(1, n + 1))
+    wmap.extend(bytes(4 * (num_wires - n)))
+    first_out = num_wires - m
+    pending = {}  # Bristol output wire -> (code, a, b) of the held back gate
+    constants = {}
+    AND = GATE_CODES["AND"]
+    BINARY = {"XOR": XOR, "AND": AND}
+
+    def emit(code: int, a: int, b: int) -> int:
+        number = n + len(gates) + 1
+        add_gate(number)
+        add_a(a)
+        add_b(b)
+        add_code(code)
+        return number
+
+    def constant(bit: int) -> int:
+        if 0 not in constants:
+            constants[0] = emit(XOR, 1, 1)
+        if bit and 1 not in constants:
+            constants[1] = emit(NOT, constants[0], constants[0])
+        return constants[bit]
+
+    def wire(w: str) -> int:
+        w = int(w)
+        if w >= first_out and w in pending:
+            wmap[w] = emit(*pending.pop(w))
+        ours = wmap[w]
+        if not ours:
+            raise ValueError(f"wire {w} is read before it is set")
+        return ours
+
+    def define(w: str, code: int, a: int, b: int):
+        w = int(w)
+        if w >= first_out:
+            pending[w] = (code, a, b)
+        else:
+            wmap[w] = emit(code, a, b)
+
+    count = 0
+    number = n  # last wire used, kept in step with emit
+    try:
+        for line in lines:
+            p = line.split()
+            if not p:
+                continue
+            count += 1
+            op = p[-1]
+            if op in BINARY:
+                a, b, out = int(p[2]), int(p[3]), int(p[4])
+                if a < first_out and b < first_out and out < first_out and wmap[a] and wmap[b]:
+                    # the common case inline: no outputs involved, inputs set
+                    number += 1
+                    add_gate(number)
+                    add_a(wmap[a])
+                    add_b(wmap[b])
+                    add_code(BINARY[op])
+                    wmap[out] = number
+                    continue
+                define(p[4], BINARY[op], wire(p[2]), wire(p[3]))
+            elif op == "INV":
+                a = wire(p[2])
+                define(p[3], NOT, a, a)
+            elif op == "EQW":
+                a = wire(p[2])
+                out = int(p[3])
+                if out >= first_out:
+                    define(p[3], XOR, a, constant(0))
+                else:
+                    wmap[out] = a
+            elif op == "EQ":
+                c = constant(int(p[2]) & 1)
+                out = int(p[3])
+                if out >= first_out:
+                    define(p[3], XOR, c, constant(0))
+                else:
+                    wmap[out] = c
+            elif op == "MAND":
+                k = int(p[1])
+                for i in range(k):
+                    define(p[2 + 2 * k + i], AND, wire(p[2 + i]), wire(p[2 + k + i]))
+            else:
+                raise ValueError(f"unsupported Bristol gate {op}")
+            number = n + len(gates)  # the other cases add gates through emit
+    except (IndexError, ValueError) as error:
+        raise ValueError(f"Bristol gate {count}: {error if isinstance(error, ValueError) else 'too few wires'}: {line.strip()}") from None
+    if count != num_gates:
+        raise ValueError(f"Bristol header announces {num_gates} gates, the file has {count}")
+
+    outs = range(first_out, num_wires)
+    for w in outs:
+        if w in pending:
+            wmap[w] = emit(*pending.pop(w))
+        elif not wmap[w]:
+            raise ValueError(f"output wire {w} is never set")
+    number = n + len(gates)
+    if [wmap[w] for w in outs] != list(range(number - m + 1, number + 1)):
+        zero = constant(0)
+        for w in outs:
+            emit(XOR, wmap[w], zero)
+    return (circuit if compact else circuit.to_circuit()), inputs, outputs
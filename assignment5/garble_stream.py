@@ -0,0 +1,216 @@
+from array import array
+
+from Enc_scheme import dec, dec_unpadded, enc, enc_unpadded, get_prf
+from garbled_circuits import (K, KEY_BYTES, ROWS, SCHEMES, TRUTH_TABLES, as_compact, colour, coloured_keys, gate_bytes,
+                              generate_random_key, half_gate_eval, half_gate_garble)
+
+# Streaming garbling: the garbler emits the packed ciphertexts (the layout of
+# garbled_layout) a chunk of gates at a time and the evaluator consumes them as
+# they arrive, so neither side holds the whole garbled circuit.
+#
+# Both sides count the remaining reads of every wire (fan_out) and drop a wire's
+# keys after its last use, output wires are kept. Keys of wires nobody reads (dead
+# gates, unused inputs) are dropped as soon as they are made. What stays in memory is the
+# keys of the live wires (the width of the circuit), one chunk and the fan-out
+# counts (4 bytes per wire). The circuit itself can be a GateStream that
+# regenerates its gates instead of storing them.
+
+
+class GateStream:
+    """A circuit given by make_gates(), which returns a fresh iterator over its gates (number, code, A, B)."""
+    __slots__ = ("n", "m", "q", "make_gates")
+
+    def __init__(self, n: int, m: int, q: int, make_gates):
+        self.n = n
+        self.m = m
+        self.q = q
+        self.make_gates = make_gates
+
+    def __iter__(self):
+        return iter(self.make_gates())
+
+
+def iter_gates(circuit):
+    # (number, code, A, B) of a Circuit, CompactCircuit or GateStream, in order
+    if isinstance(circuit, GateStream):
+        return iter(circuit)
+    c = as_compact(circuit)
+    return zip(c.gates, c.codes, c.A, c.B)
+
+
+def fan_out(circuit) -> array:
+    """Reads of every wire by the gates, plus one for each output wire so that it is never freed."""
+    wires = circuit.n + circuit.q
+    uses = array('I', bytes(4 * wires))
+    for _, _, a, b in iter_gates(circuit):
+        uses[a - 1] += 1
+        uses[b - 1] += 1
+    for w in range(wires - circuit.m, wires):
+        uses[w] += 1
+    return uses
+
+
+def output_wires(circuit) -> range:
+    wires = circuit.n + circuit.q
+    return range(wires - circuit.m + 1, wires + 1)
+
+
+class StreamGarbler:
+    """
+    e (the input keys) is ready after construction, chunks() garbles gate by gate and
+    sets d (the output keys) when it is exhausted.
+    """
+
+    def __init__(self, circuit, scheme: str = "half_gates", prf: str = "sha256"):
+        if scheme not in ROWS:
+            raise ValueError(f"Unsupported scheme {scheme}, use one of {SCHEMES}")
+        self.circuit = circuit
+        self.scheme = scheme
+        self.H = get_prf(prf)
+        self.uses = fan_out(circuit)
+        self.delta = int.from_bytes(generate_random_key(K), 'little') | 1
+        # wire -> k^0 as an int (half_gates) or (k^0, k^1)
+        self.labels = {w: self._new_label() for w in range(1, circuit.n + 1)}
+        self.e = [self._pair(w) for w in range(1, circuit.n + 1)]
+        for w in range(1, circuit.n + 1):
+            if not self.uses[w - 1]:
+                del self.labels[w]
+        self.d = None
+        self.peak_labels = len(self.labels)
+        self._garble_gate = {"classic": self._garble_classic, "point_and_permute": self._garble_point_and_permute,
+                             "half_gates": self._garble_half_gates}[scheme]
+
+    def _new_label(self):
+        if self.scheme == "half_gates":
+            return int.from_bytes(generate_random_key(K), 'little')
+        if self.scheme == "point_and_permute":
+            return tuple(coloured_keys())
+        return generate_random_key(K), generate_random_key(K)
+
+    def _pair(self, w: int) -> list[bytes]:
+        label = self.labels[w]
+        if self.scheme == "half_gates":
+            return [label.to_bytes(KEY_BYTES, 'little'), (label ^ self.delta).to_bytes(KEY_BYTES, 'little')]
+        return list(label)
+
+    def _release(self, w: int):
+        self.uses[w - 1] -= 1
+        if not self.uses[w - 1]:
+            del self.labels[w]
+
+    def chunks(self, chunk: int = 4096):
+        """Yields the ciphertexts of `chunk` gates at a time (empty chunks are skipped)."""
+        if chunk < 1:
+            raise ValueError(f"chunk should be at least 1, you gave chunk = {chunk}")
+        out = bytearray()
+        count = 0
+        for number, code, a, b in iter_gates(self.circuit):
+            out += self._garble_gate(number, code, a, b)
+            self._release(a)
+            self._release(b)
+            if not self.uses[number - 1]:
+                del self.labels[number]  # a dead gate
+            self.peak_labels = max(self.peak_labels, len(self.labels))
+            count += 1
+            if count == chunk:
+                if out:
+                    yield out
+                    out = bytearray()
+                count = 0
+        if out:
+            yield out
+        self.d = [self._pair(w) for w in output_wires(self.circuit)]
+
+    def _garble_classic(self, number: int, code: int, a: int, b: int) -> bytes:
+        A_keys, B_keys = self.labels[a], self.labels[b]
+        out_keys = self.labels[number] = self._new_label()
+        f = TRUTH_TABLES[code]
+        return b''.join([enc(A_keys[x], B_keys[y], number, out_keys[f[2 * x + y]], self.H) for x in (0, 1) for y in (0, 1)])
+
+    def _garble_point_and_permute(self, number: int, code: int, a: int, b: int) -> bytes:
+        A_keys, B_keys = self.labels[a], self.labels[b]
+        out_keys = self.labels[number] = self._new_label()
+        f = TRUTH_TABLES[code]
+        rows = [None] * 4
+        for x in (0, 1):
+            for y in (0, 1):
+                rows[2 * colour(A_keys[x]) + colour(B_keys[y])] = enc_unpadded(A_keys[x], B_keys[y], number, out_keys[f[2 * x + y]], self.H)
+        return b''.join(rows)
+
+    def _garble_half_gates(self, number: int, code: int, a: int, b: int) -> bytes:
+        self.labels[number], table = half_gate_garble(self.labels[a], self.labels[b], number, code, self.delta, self.H)
+        return table
+
+
+class _Reader:
+    # reads consecutive gate tables out of a stream of chunks, copying only across chunk borders
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.view = memoryview(b'')
+        self.pos = 0
+
+    def read(self, size: int):
+        if self.pos + size <= len(self.view):
+            self.pos += size
+            return self.view[self.pos - size:self.pos]
+        parts = [self.view[self.pos:]]
+        have = len(parts[0])
+        while have < size:
+            chunk = next(self.chunks, None)
+            if chunk is None:
+                raise ValueError("garbled circuit stream ended early")
+            self.view = memoryview(chunk)
+            self.pos = min(size - have, len(chunk))
+            parts.append(self.view[:self.pos])
+            have += self.pos
+        return b''.join(parts)
+
+    def finish(self):
+        if self.pos < len(self.view) or any(len(chunk) for chunk in self.chunks):
+            raise ValueError("garbled circuit stream is longer than the circuit")
+
+
+def eval_stream(X: list[bytes], chunks, circuit, scheme: str = "half_gates", prf: str = "sha256") -> list[bytes]:
+    """
+    Evaluates the circuit on the input keys X while the chunks (an iterable of
+    bytes-like objects, e.g. StreamGarbler.chunks() or received messages) arrive.
+    Returns the output keys Y, X is not modified.
+    """
+    if scheme not in ROWS:
+        raise ValueError(f"Unsupported scheme {scheme}, use one of {SCHEMES}")
+    if len(X) != circuit.n:
+        raise ValueError(f"need {circuit.n} input keys, got {len(X)}")
+    H = get_prf(prf)
+    uses = fan_out(circuit)
+    half = scheme == "half_gates"
+    keys = {w: int.from_bytes(k, 'little') if half else bytes(k) for w, k in enumerate(X, 1) if uses[w - 1]}
+    sizes = [gate_bytes(scheme, code) for code in range(len(TRUTH_TABLES))]
+    reader = _Reader(chunks)
+
+    for number, code, a, b in iter_gates(circuit):
+        k_a, k_b = keys[a], keys[b]
+        table = reader.read(sizes[code]) if sizes[code] else None
+        if scheme == "classic":
+            for j in range(4):
+                try:
+                    out = dec(k_a, k_b, number, table[32 * j:32 * (j + 1)], H)
+                    break
+                except ValueError:
+                    continue
+            else:
+                raise ValueError(f"gate {number}: no row decrypts")
+        elif scheme == "point_and_permute":
+            row = 16 * (2 * colour(k_a) + colour(k_b))
+            out = dec_unpadded(k_a, k_b, number, table[row:row + 16], H)
+        else:
+            out = half_gate_eval(k_a, k_b, number, code, table, H)
+        if uses[number - 1]:
+            keys[number] = out  # else a dead gate
+        for w in (a, b):
+            uses[w - 1] -= 1
+            if not uses[w - 1]:
+                del keys[w]
+    reader.finish()
+
+    Y = [keys[w] for w in output_wires(circuit)]
+    return [k.to_bytes(KEY_BYTES, 'little') for k in Y] if half else Y
@@ -1,16 +1,58 @@
-from Enc_scheme import enc, dec
+from Enc_scheme import dec, dec_unpadded, enc_into, enc_unpadded_into, G, get_prf
 import random
 from typing import Tuple  # for Python < 3.9
 import secrets
 import pprint
+import hashlib
+from array import array
 
 K= 128
 
+# Garbling schemes:
+#   classic     4 ciphertexts of 32 bytes per gate (enc from Enc_scheme.py), any gate type,
+#               the evaluator decrypts rows until the padding checks out
+#   point_and_permute
+#               4 ciphertexts of 16 bytes per gate (enc_unpadded), any gate type. The last
+#               bit of a key (its colour) is a random permutation bit of the wire, k^0 and
+#               k^1 have different colours, and row 2 * colour(A key) + colour(B key) holds
+#               the output key, so the evaluator decrypts exactly one row.
+#   half_gates  free-XOR: every wire has keys k^0 and k^1 = k^0 xor delta for one global
+#               delta, XOR and NOT gates have no ciphertexts, AND-like gates (AND, OR,
+#               A_OR_NOT_B) have two 16-byte ciphertexts (Zahur, Rosulek, Evans 2015).
+#               The last bit of delta is 1, so the last bit of a key (its colour) tells the
+#               evaluator which half-gate rows to use.
+SCHEMES = ("classic", "point_and_permute", "half_gates")
+
+# truth table of every gate type, NOT only looks at its A wire (circuits set B = A)
+GATE_FUNCTIONS = {
+    "AND": lambda a, b: a & b,
+    "OR": lambda a, b: a | b,
+    "A_OR_NOT_B": lambda a, b: a | (1 - b),
+    "XOR": lambda a, b: a ^ b,
+    "NOT": lambda a, b: 1 - a,
+}
+
+
 def generate_random_key(k) -> bytes:
     """Generate a random k-bit key."""
     return secrets.token_bytes(k // 8)
 
+
+def and_form(f) -> tuple[int, int, int]:
+    """(alpha, beta, gamma) with f(a, b) = ((a ^ alpha) & (b ^ beta)) ^ gamma, None if there is none."""
+    for alpha in (0, 1):
+        for beta in (0, 1):
+            for gamma in (0, 1):
+                if all(f(a, b) == ((a ^ alpha) & (b ^ beta)) ^ gamma for a in (0, 1) for b in (0, 1)):
+                    return alpha, beta, gamma
+    return None
+
+
+AND_FORMS = {name: and_form(f) for name, f in GATE_FUNCTIONS.items()}
+
 class Gate:
+    __slots__ = ("number", "bool_function", "A_wire_number", "B_wire_number", "A_keys", "B_keys", "ciphertexts", "out_keys")
+
     # def __init__(self, number:int, bool_function, A_wire_number:int, B_wire_number:int, A_keys:list, B_keys:list, ciphertexts:list, out_keys:list ):
     def __init__(self ):
         self.number = None
@@ -33,18 +75,154 @@ class Circuit:
         self.B = B 
         self.gate_func = gate_func 
         self.keys = []
-        
 
-def yao_garble(circuit:Circuit, garbled_gates:list[Gate]):
-    
-    for i in range(1, circuit.n + circuit.q + 1):
-        k_0 = generate_random_key(K)
-        k_1 = generate_random_key(K)
-        wire_keys = [k_0, k_1]
-        circuit.keys.append(wire_keys)
 
-    gc = []
-    
+# Compact form: structure of arrays instead of per-gate objects and lists.
+# Gate i has output wire gates[i], input wires A[i] and B[i] (array('I'), 4 bytes
+# each) and type GATE_TYPES[codes[i]] (one byte). Wire labels of a garbled circuit
+# are one bytearray with k^0 || k^1 of wire w at LABEL_BYTES * (w - 1) and the
+# ciphertexts another one (see garbled_layout), so a million-gate circuit is a few
+# contiguous buffers and the ciphertexts can go to a socket as a memoryview.
+GATE_TYPES = tuple(GATE_FUNCTIONS)
+GATE_CODES = {name: code for code, name in enumerate(GATE_TYPES)}
+TRUTH_TABLES = [tuple(GATE_FUNCTIONS[name](a, b) for a in (0, 1) for b in (0, 1)) for name in GATE_TYPES]
+HALF_GATES = [AND_FORMS[name] for name in GATE_TYPES]  # None for XOR and NOT
+XOR, NOT = GATE_CODES["XOR"], GATE_CODES["NOT"]
+KEY_BYTES = K // 8
+LABEL_BYTES = 2 * KEY_BYTES
+
+
+class CompactCircuit:
+    __slots__ = ("n", "m", "gates", "A", "B", "codes")
+
+    def __init__(self, n: int, m: int, gates: array = None, A: array = None, B: array = None, codes: bytearray = None):
+        self.n = n
+        self.m = m
+        self.gates = gates if gates is not None else array('I')
+        self.A = A if A is not None else array('I')
+        self.B = B if B is not None else array('I')
+        self.codes = codes if codes is not None else bytearray()
+
+    @property
+    def q(self) -> int:
+        return len(self.gates)
+
+    @property
+    def gate_func(self) -> list[str]:
+        return [GATE_TYPES[code] for code in self.codes]
+
+    def add(self, func: str, a: int, b: int) -> int:
+        # append a gate on the next wire number, returns that wire
+        if func not in GATE_CODES:
+            raise ValueError("Unsupported gate function")
+        self.gates.append(self.n + len(self.gates) + 1)
+        self.A.append(a)
+        self.B.append(b)
+        self.codes.append(GATE_CODES[func])
+        return self.gates[-1]
+
+    @classmethod
+    def from_circuit(cls, circuit: Circuit) -> "CompactCircuit":
+        if any(func not in GATE_CODES for func in circuit.gate_func):
+            raise ValueError("Unsupported gate function")
+        return cls(circuit.n, circuit.m, array('I', circuit.gates), array('I', circuit.A), array('I', circuit.B),
+                   bytearray(GATE_CODES[func] for func in circuit.gate_func))
+
+    def to_circuit(self) -> Circuit:
+        return Circuit(self.n, self.m, self.q, list(self.gates), list(self.A), list(self.B), self.gate_func)
+
+
+def as_compact(circuit) -> CompactCircuit:
+    # a Circuit or a CompactCircuit
+    return circuit if isinstance(circuit, CompactCircuit) else CompactCircuit.from_circuit(circuit)
+
+
+class GarbledCircuit:
+    """Result of garble_compact: data holds the ciphertexts, labels both keys of every wire."""
+    __slots__ = ("circuit", "scheme", "prf", "data", "labels")
+
+    def __init__(self, circuit: CompactCircuit, scheme: str, prf: str, data: bytearray, labels: bytearray):
+        self.circuit = circuit
+        self.scheme = scheme
+        self.prf = prf
+        self.data = data
+        self.labels = labels
+
+    def key(self, wire: int, bit: int) -> bytes:
+        o = LABEL_BYTES * (wire - 1) + KEY_BYTES * bit
+        return bytes(self.labels[o:o + KEY_BYTES])
+
+    def keys(self, first: int, count: int) -> list[list[bytes]]:
+        # [k^0, k^1] of wires first ... first + count - 1
+        return [[self.key(w, 0), self.key(w, 1)] for w in range(first, first + count)]
+
+    def e(self) -> list[list[bytes]]:
+        return self.keys(1, self.circuit.n)
+
+    def d(self) -> list[list[bytes]]:
+        c = self.circuit
+        return self.keys(c.n + c.q - c.m + 1, c.m)
+
+    def decoding_table(self, hashed: bool = None) -> bytes:
+        return decoding_table(self.d(), self.scheme, hashed)
+
+    def encode(self, x: list[int], first: int = 1) -> list[bytes]:
+        # yao_En for the inputs first, first + 1, ...
+        return [self.key(first + i, bit) for i, bit in enumerate(x)]
+
+
+# Packed garbled circuit: the ciphertexts of all gates back to back in one
+# bytearray, gate i at offsets[i] ... offsets[i + 1] from garbled_layout. Every
+# gate has ROWS[scheme] = (rows, bytes per row), except XOR and NOT gates with
+# half_gates which have none. This is also the wire format of yao_net.py.
+ROWS = {"classic": (4, 32), "point_and_permute": (4, 16), "half_gates": (2, 16)}
+FREE_GATES = ("XOR", "NOT")  # no ciphertexts with half_gates
+
+
+def gate_bytes(scheme: str, code: int) -> int:
+    # ciphertext bytes of one gate
+    if scheme == "half_gates" and HALF_GATES[code] is None:
+        return 0
+    rows, row_bytes = ROWS[scheme]
+    return rows * row_bytes
+
+
+def garbled_layout(circuit, scheme: str) -> array:
+    """Offset of every gate in the packed garbled circuit, the total size at the end."""
+    if scheme not in ROWS:
+        raise ValueError(f"Unsupported scheme {scheme}, use one of {SCHEMES}")
+    circuit = as_compact(circuit)
+    sizes = [gate_bytes(scheme, code) for code in range(len(GATE_TYPES))]
+    offsets = array('Q', [0])
+    total = 0
+    for code in circuit.codes:
+        total += sizes[code]
+        offsets.append(total)
+    return offsets
+
+
+def pack_gc(gc: list[list[bytes]]) -> bytes:
+    return b''.join(C for row in gc for C in row)
+
+
+def unpack_gc(data: bytes, circuit: Circuit, scheme: str) -> list[list[bytes]]:
+    # the list form of yao_garble from a packed garbled circuit
+    offsets = garbled_layout(circuit, scheme)
+    if len(data) != offsets[-1]:
+        raise ValueError(f"garbled circuit should have {offsets[-1]} bytes, got {len(data)}")
+    row_bytes = ROWS[scheme][1]
+    return [[bytes(data[o:o + row_bytes]) for o in range(start, end, row_bytes)]
+            for start, end in zip(offsets, offsets[1:])]
+
+
+def yao_garble(circuit:Circuit, garbled_gates:list[Gate], scheme:str="classic", prf:str="sha256"):
+    """
+    gc: one list of ciphertexts per gate, e: input keys, d: output keys ([k^0, k^1] per wire).
+    yao_eval must be called with the same scheme and prf (a name from Enc_scheme.PRFS).
+    """
+    data, e, d = yao_garble_packed(circuit, scheme, prf)
+    gc = unpack_gc(data, circuit, scheme)
+
     for i in range(len(circuit.gates)):
         gate = Gate()
         gate.bool_function = circuit.gate_func[i]
@@ -55,42 +233,168 @@ def yao_garble(circuit:Circuit, garbled_gates:list[Gate]):
         gate.B_keys = circuit.keys[gate.B_wire_number - 1]
         gate.number = circuit.gates[i]
         gate.out_keys = circuit.keys[gate.number - 1]
-
-        if gate.bool_function == "AND":
-            C00 = enc(gate.A_keys[0], gate.B_keys[0], gate.number, gate.out_keys[0])
-            C01 = enc(gate.A_keys[0], gate.B_keys[1], gate.number, gate.out_keys[0])
-            C10 = enc(gate.A_keys[1], gate.B_keys[0], gate.number, gate.out_keys[0])
-            C11 = enc(gate.A_keys[1], gate.B_keys[1], gate.number, gate.out_keys[1])
-            
-        elif gate.bool_function == "OR":
-            C00 = enc(gate.A_keys[0], gate.B_keys[0], gate.number, gate.out_keys[0])
-            C01 = enc(gate.A_keys[0], gate.B_keys[1], gate.number, gate.out_keys[1])
-            C10 = enc(gate.A_keys[1], gate.B_keys[0], gate.number, gate.out_keys[1])
-            C11 = enc(gate.A_keys[1], gate.B_keys[1], gate.number, gate.out_keys[1])
-            
-      
-        elif gate.bool_function == "A_OR_NOT_B":
-            C00 = enc(gate.A_keys[0], gate.B_keys[0], gate.number, gate.out_keys[1])  # 0,0 -> 1
-            C01 = enc(gate.A_keys[0], gate.B_keys[1], gate.number, gate.out_keys[0])  # 0,1 -> 0
-            C10 = enc(gate.A_keys[1], gate.B_keys[0], gate.number, gate.out_keys[1])  # 1,0 -> 1
-            C11 = enc(gate.A_keys[1], gate.B_keys[1], gate.number, gate.out_keys[1])  # 1,1 -> 1
-            
-            
-            
-        
-        else:
-            raise ValueError("Unsupported gate function")
-        
-        gate.ciphertexts = [C00, C01, C10, C11]
-        gc.append(gate.ciphertexts)
+        gate.ciphertexts = gc[i]
         garbled_gates.append(gate)
 
+    return gc, e, d
+
+
+def yao_garble_packed(circuit: Circuit, scheme: str = "classic", prf: str = "sha256") -> tuple[bytearray, list, list]:
+    """yao_garble with the ciphertexts written into one bytearray (see garbled_layout)."""
+    garbled = garble_compact(circuit, scheme, prf)
+    circuit.keys.extend(garbled.keys(1, circuit.n + circuit.q))
     e = circuit.keys[:circuit.n]
     d = circuit.keys[-circuit.m:]
-   
+    return garbled.data, e, d
 
-    return gc, e, d
 
+def garble_compact(circuit, scheme: str = "classic", prf: str = "sha256", seed: bytes = None) -> GarbledCircuit:
+    """
+    Garble a Circuit or CompactCircuit into contiguous ciphertext and label buffers.
+    With a seed the wire labels are derived from it (key_stream) and the output is
+    the same bytes every time, which parallel_garble.py relies on.
+    """
+    H = get_prf(prf)
+    if scheme not in ROWS:
+        raise ValueError(f"Unsupported scheme {scheme}, use one of {SCHEMES}")
+    c = as_compact(circuit)
+    sizes = [gate_bytes(scheme, code) for code in range(len(GATE_TYPES))]
+    out = bytearray(sum(sizes[code] for code in c.codes))
+    labels = bytearray(LABEL_BYTES * (c.n + c.q))
+    delta = init_labels(labels, c.n, scheme, seed)
+    garble_gate = GARBLE_GATE[scheme]
+    L = memoryview(labels)
+    o = 0
+    for number, code, a, b in zip(c.gates, c.codes, c.A, c.B):
+        garble_gate(L, out, o, number, code, a, b, H, delta)
+        o += sizes[code]
+    return GarbledCircuit(c, scheme, prf, out, labels)
+
+
+def key_stream(seed: bytes, size: int) -> bytes:
+    # size pseudorandom bytes from the seed (SHAKE-256), fresh randomness without one
+    return generate_random_key(8 * size) if seed is None else hashlib.shake_256(seed).digest(size)
+
+
+def init_labels(labels: bytearray, n: int, scheme: str, seed: bytes = None) -> int:
+    """
+    Random labels before garbling: every wire for classic and point_and_permute, the
+    n input wires and the offset delta (returned, 0 for the other schemes) for half_gates.
+    """
+    if scheme == "half_gates":
+        keys = key_stream(seed, KEY_BYTES * (n + 1))
+        delta = int.from_bytes(keys[:KEY_BYTES], 'little') | 1
+        for w in range(n):
+            k = int.from_bytes(keys[KEY_BYTES * (w + 1):KEY_BYTES * (w + 2)], 'little')
+            labels[LABEL_BYTES * w:LABEL_BYTES * (w + 1)] = (k | ((k ^ delta) << K)).to_bytes(LABEL_BYTES, 'little')
+        return delta
+    labels[:] = key_stream(seed, len(labels))
+    if scheme == "point_and_permute":
+        for o in range(0, len(labels), LABEL_BYTES):
+            # colour(k^0) is the random permutation bit, k^1 gets the other colour
+            labels[o + KEY_BYTES] = (labels[o + KEY_BYTES] & 0xFE) | (1 - (labels[o] & 1))
+    return 0
+
+
+# Garbling of one gate, shared by garble_compact and the workers of parallel_garble.py:
+# reads the input labels from L (a memoryview of the label buffer), writes the
+# ciphertexts to out[o:] and, for half_gates, the output wire's labels to L.
+def garble_gate_classic(L: memoryview, out, o: int, number: int, code: int, a: int, b: int, H=G, delta: int = 0):
+    f = TRUTH_TABLES[code]
+    la, lb, lo = LABEL_BYTES * (a - 1), LABEL_BYTES * (b - 1), LABEL_BYTES * (number - 1)
+    A_keys = (L[la:la + KEY_BYTES], L[la + KEY_BYTES:la + LABEL_BYTES])
+    B_keys = (L[lb:lb + KEY_BYTES], L[lb + KEY_BYTES:lb + LABEL_BYTES])
+    out_keys = (L[lo:lo + KEY_BYTES], L[lo + KEY_BYTES:lo + LABEL_BYTES])
+    # C_ab encrypts the output key for f(a, b) under the A key for a and the B key for b
+    enc_into(out, o, A_keys[0], B_keys[0], number, out_keys[f[0]], H)
+    enc_into(out, o + 32, A_keys[0], B_keys[1], number, out_keys[f[1]], H)
+    enc_into(out, o + 64, A_keys[1], B_keys[0], number, out_keys[f[2]], H)
+    enc_into(out, o + 96, A_keys[1], B_keys[1], number, out_keys[f[3]], H)
+
+
+def colour(key: bytes) -> int:
+    # permutation bit carried by a key
+    return key[0] & 1
+
+
+def coloured_keys() -> list[bytes]:
+    # [k^0, k^1] for one wire with a random permutation bit, colour(k^1) = 1 - colour(k^0)
+    keys = bytearray(generate_random_key(2 * K))
+    keys[K // 8] = (keys[K // 8] & 0xFE) | (1 - colour(keys))  # colour(k^0) is the random bit
+    return [bytes(keys[:K // 8]), bytes(keys[K // 8:])]
+
+
+def garble_gate_point_and_permute(L: memoryview, out, o: int, number: int, code: int, a: int, b: int, H=G, delta: int = 0):
+    f = TRUTH_TABLES[code]
+    la, lb, lo = LABEL_BYTES * (a - 1), LABEL_BYTES * (b - 1), LABEL_BYTES * (number - 1)
+    for x in (0, 1):
+        k_a = L[la + KEY_BYTES * x:la + KEY_BYTES * (x + 1)]
+        for y in (0, 1):
+            k_b = L[lb + KEY_BYTES * y:lb + KEY_BYTES * (y + 1)]
+            k_out = lo + KEY_BYTES * f[2 * x + y]
+            row = 2 * colour(k_a) + colour(k_b)
+            enc_unpadded_into(out, o + 16 * row, k_a, k_b, number, L[k_out:k_out + KEY_BYTES], H)
+
+
+def half_gate_hash(key: int, tweak: int, H=G) -> int:
+    # H(key, tweak), 128 bits of the PRF
+    return int.from_bytes(H(key.to_bytes(K // 8, 'little'), b'', tweak, K // 8), 'little')
+
+
+def half_gate_garble(A0: int, B0: int, number: int, code: int, delta: int, H=G) -> tuple[int, bytes]:
+    """
+    One half-gates gate on 128-bit int keys (k^1 = k^0 xor delta on every wire):
+    (k^0 of the output, table), the table is b'' for XOR and NOT.
+    """
+    if code == XOR:
+        return A0 ^ B0, b''
+    if code == NOT:
+        return A0 ^ delta, b''
+    # ((a ^ alpha) & (b ^ beta)) ^ gamma: an AND gate on relabelled wires
+    alpha, beta, gamma = HALF_GATES[code]
+    A0 ^= alpha * delta
+    B0 ^= beta * delta
+    pa, pb = A0 & 1, B0 & 1
+    j = 2 * number
+    HA0, HB0 = half_gate_hash(A0, j, H), half_gate_hash(B0, j + 1, H)
+    # garbler half: knows pb, evaluator half: knows the A wire's value
+    TG = HA0 ^ half_gate_hash(A0 ^ delta, j, H) ^ (pb * delta)
+    TE = HB0 ^ half_gate_hash(B0 ^ delta, j + 1, H) ^ A0
+    WG0 = HA0 ^ (pa * TG)
+    WE0 = HB0 ^ (pb * (TE ^ A0))
+    # T_G then T_E, 16 bytes each
+    return WG0 ^ WE0 ^ (gamma * delta), (TG | (TE << K)).to_bytes(2 * KEY_BYTES, 'little')
+
+
+def half_gate_eval(A: int, B: int, number: int, code: int, table, H=G) -> int:
+    """The output key of a half-gates gate from the int input keys, table as written by half_gate_garble."""
+    if code == XOR:
+        return A ^ B
+    if code == NOT:
+        return A  # the garbler swapped the meaning of the keys
+    j = 2 * number
+    out = half_gate_hash(A, j, H) ^ half_gate_hash(B, j + 1, H)
+    if A & 1:
+        out ^= int.from_bytes(table[:16], 'little')
+    if B & 1:
+        out ^= int.from_bytes(table[16:32], 'little') ^ A
+    return out
+
+
+def garble_gate_half_gates(L: memoryview, out, o: int, number: int, code: int, a: int, b: int, H=G, delta: int = 0):
+    # keys are handled as 128-bit ints (little-endian), k^1 = k^0 xor delta on every wire
+    la, lb = LABEL_BYTES * (a - 1), LABEL_BYTES * (b - 1)
+    A0 = int.from_bytes(L[la:la + KEY_BYTES], 'little')
+    B0 = int.from_bytes(L[lb:lb + KEY_BYTES], 'little')
+    out0, table = half_gate_garble(A0, B0, number, code, delta, H)
+    if table:
+        out[o:o + 32] = table
+    lo = LABEL_BYTES * (number - 1)
+    L[lo:lo + LABEL_BYTES] = (out0 | ((out0 ^ delta) << K)).to_bytes(LABEL_BYTES, 'little')
+
+
+GARBLE_GATE = {"classic": garble_gate_classic, "point_and_permute": garble_gate_point_and_permute,
+               "half_gates": garble_gate_half_gates}
 
 
 def yao_En(e: list[list[bytes]], x:list[int]) -> list[bytes]:
@@ -112,21 +416,30 @@ def yao_En(e: list[list[bytes]], x:list[int]) -> list[bytes]:
     return X
     
 
-def yao_eval(X:list[bytes], gc:list[list[bytes]] ,circuit:Circuit):
+def yao_eval(X:list[bytes], gc:list[list[bytes]] ,circuit:Circuit, verbose:bool=True, scheme:str="classic", prf:str="sha256"):
     """
     Args:
         X: [ k^w_i  : i=i...n   ]  garbled input keys
-        gc: [ [C_00, C_01, C_10, C_11] : for each gate ]
+        gc: [ [C_00, C_01, C_10, C_11] : for each gate ]  ([T_G, T_E] or [] with half_gates)
+        verbose: print every gate evaluation
+        scheme: the scheme gc was garbled with
+        prf: the PRF gc was garbled with
 
     return:
         Y: [ k^w_j  : j=n+1...n+m ] garbled output keys
     """
+    H = get_prf(prf)
+    if scheme != "classic":
+        return yao_eval_packed(X, pack_gc(gc), circuit, scheme, prf)
+    X = list(X)  # the output keys are appended to a copy, the caller's input keys stay as they are
+
     gates = circuit.gates
     A = circuit.A
     B = circuit.B
 
     for i in range(len(gc)):
-        print(f"len(gc): {len(gc)}")
+        if verbose:
+            print(f"len(gc): {len(gc)}")
         
         K_l_num = A[i] #wire number of the left side
         K_r_num = B[i] #wire number of the right side
@@ -135,74 +448,285 @@ def yao_eval(X:list[bytes], gc:list[list[bytes]] ,circuit:Circuit):
 
         gate_num = gates[i]
 
-        print(f" for i = {i}, evaluating gate number{gate_num} with l_wire_number {K_l_num}, r_wire_number {K_r_num}\n")
+        if verbose:
+            print(f" for i = {i}, evaluating gate number{gate_num} with l_wire_number {K_l_num}, r_wire_number {K_r_num}\n")
 
         for j in range(4):
             C = gc[i][j]
             try:
-                out_key = dec(l_key, r_key, gate_num, C)
+                out_key = dec(l_key, r_key, gate_num, C, H)
                 X.append(out_key)
                 break
             except ValueError:
                 continue
+        else:
+            raise ValueError(f"gate {gate_num}: no row decrypts")
     
     Y = X[-circuit.m:]
     return Y
 
-def yao_de(Y, d):
-    output_key = Y[0] # Assuming single output
-    decoding_keys = d[0] # Assuming single output
-    if output_key == decoding_keys[0]:
-        return 0
-    elif output_key == decoding_keys[1]:
-        return 1
+def yao_eval_packed(X: list[bytes], data: bytes, circuit, scheme: str = "classic", prf: str = "sha256") -> list[bytes]:
+    """
+    yao_eval on a packed garbled circuit (bytes, bytearray or memoryview) and a Circuit or
+    CompactCircuit. Rows are read in place and the wire keys live in one bytearray.
+    """
+    H = get_prf(prf)
+    c = as_compact(circuit)
+    offsets = garbled_layout(c, scheme)
+    if len(data) != offsets[-1]:
+        raise ValueError(f"garbled circuit should have {offsets[-1]} bytes, got {len(data)}")
+    if len(X) != c.n:
+        raise ValueError(f"need {c.n} input keys, got {len(X)}")
+    keys = bytearray(KEY_BYTES * (c.n + c.q))
+    keys[:KEY_BYTES * c.n] = b''.join(X)
+    view = memoryview(data)
+    if scheme == "classic":
+        _eval_classic(keys, view, c, H)
+    elif scheme == "point_and_permute":
+        _eval_point_and_permute(keys, view, c, H)
     else:
-        "you fucked up, go cry"
+        _eval_half_gates(keys, view, c, H)
+    first = KEY_BYTES * (c.n + c.q - c.m)
+    return [bytes(keys[o:o + KEY_BYTES]) for o in range(first, len(keys), KEY_BYTES)]
 
 
+def _eval_classic(keys: bytearray, view: memoryview, c: CompactCircuit, H=G):
+    W = memoryview(keys)
+    o = 0
+    for number, a, b in zip(c.gates, c.A, c.B):
+        l_key = W[KEY_BYTES * (a - 1):KEY_BYTES * a]
+        r_key = W[KEY_BYTES * (b - 1):KEY_BYTES * b]
+        for j in range(4):
+            try:
+                W[KEY_BYTES * (number - 1):KEY_BYTES * number] = dec(l_key, r_key, number, view[o + 32 * j:o + 32 * (j + 1)], H)
+                break
+            except ValueError:
+                continue
+        else:
+            raise ValueError(f"gate {number}: no row decrypts")
+        o += 128
+
+
+def _eval_point_and_permute(keys: bytearray, view: memoryview, c: CompactCircuit, H=G):
+    W = memoryview(keys)
+    o = 0
+    for number, a, b in zip(c.gates, c.A, c.B):
+        k_a = W[KEY_BYTES * (a - 1):KEY_BYTES * a]
+        k_b = W[KEY_BYTES * (b - 1):KEY_BYTES * b]
+        row = o + 16 * (2 * colour(k_a) + colour(k_b))
+        W[KEY_BYTES * (number - 1):KEY_BYTES * number] = dec_unpadded(k_a, k_b, number, view[row:row + 16], H)
+        o += 64
+
+
+def _eval_half_gates(keys: bytearray, view: memoryview, c: CompactCircuit, H=G):
+    W = memoryview(keys)
+    o = 0
+    for number, code, a, b in zip(c.gates, c.codes, c.A, c.B):
+        A = int.from_bytes(W[KEY_BYTES * (a - 1):KEY_BYTES * a], 'little')
+        B = int.from_bytes(W[KEY_BYTES * (b - 1):KEY_BYTES * b], 'little')
+        if code == XOR or code == NOT:
+            out = half_gate_eval(A, B, number, code, None, H)
+        else:
+            out = half_gate_eval(A, B, number, code, view[o:o + 32], H)
+            o += 32
+        W[KEY_BYTES * (number - 1):KEY_BYTES * number] = out.to_bytes(KEY_BYTES, 'little')
+
 
+def garbled_size(gc: list[list[bytes]]) -> int:
+    # bytes of ciphertexts in gc
+    return sum(len(C) for row in gc for C in row)
 
 
+def plain_eval(circuit, x: list[int]) -> list[int]:
+    """The circuit (Circuit or CompactCircuit) on cleartext bits x (all n inputs), returns the m output bits."""
+    c = as_compact(circuit)
+    if len(x) != c.n:
+        raise ValueError(f"need {c.n} input bits, got {len(x)}")
+    values = bytearray(c.n + c.q)
+    values[:c.n] = bytes(x)
+    for number, code, a, b in zip(c.gates, c.codes, c.A, c.B):
+        values[number - 1] = TRUTH_TABLES[code][2 * values[a - 1] + values[b - 1]]
+    return list(values[-c.m:])
 
-#========================================
 
-# toggle this to test with different inputs for Alice and Bob
-Alice= [1,0,1]
-Bob = [1,1,0]
+# Decoding tables: what the output keys mean, without the keys themselves.
+#   DECODE_COLOUR  colour(k^0) of every output (one byte each), the bit of key Y_j is
+#                  colour(Y_j) xor that byte. point_and_permute and half_gates only,
+#                  where k^0 and k^1 have different colours. Any key decodes to something.
+#   DECODE_HASH    TAG_BYTES of H(j, k^0) and of H(j, k^1) per output, works for every
+#                  scheme and rejects keys that are neither label.
+# The first byte of a table is its kind.
+DECODE_COLOUR, DECODE_HASH = 0, 1
+TAG_BYTES = 8
 
-#======================================================
 
-#circuit1 = Circuit(3,1,2, [4,5], [1,4], [2,3], ["OR", "AND"]) # easy trest circuit
+def _label_tag(j: int, key: bytes) -> bytes:
+    # hash of output j's label, separate from the garbling PRF inputs
+    return hashlib.sha256(b"decode" + j.to_bytes(8, 'big') + bytes(key)).digest()[:TAG_BYTES]
+
+
+def decoding_table(d: list[list[bytes]], scheme: str = "classic", hashed: bool = None) -> bytes:
+    """
+    Compact decoding table for the output keys d ([k^0, k^1] per output): DECODE_HASH if
+    hashed (the default for classic), else DECODE_COLOUR (1 byte per output instead of 32).
+    """
+    if scheme not in ROWS:
+        raise ValueError(f"Unsupported scheme {scheme}, use one of {SCHEMES}")
+    if hashed is None:
+        hashed = scheme == "classic"
+    if hashed:
+        return bytes([DECODE_HASH]) + b''.join(_label_tag(j, k0) + _label_tag(j, k1) for j, (k0, k1) in enumerate(d))
+    if scheme == "classic":
+        raise ValueError("classic keys carry no colour, use a hashed decoding table")
+    return bytes([DECODE_COLOUR]) + bytes(colour(k0) for k0, _ in d)
+
+
+def yao_de(Y: list[bytes], d) -> list[int]:
+    """
+    The m output bits of the garbled output keys Y, all at once. d is the output keys
+    ([k^0, k^1] per output, from yao_garble or GarbledCircuit.d()) or a decoding_table.
+    Raises ValueError if the number of keys is off or a key is not a label of its output.
+    """
+    if isinstance(d, (bytes, bytearray, memoryview)):
+        return _decode_table(Y, bytes(d))
+    if len(Y) != len(d):
+        raise ValueError(f"need {len(d)} output keys, got {len(Y)}")
+    bits = [0 if Y_j == k0 else 1 if Y_j == k1 else -1 for Y_j, (k0, k1) in zip(Y, d)]
+    if -1 in bits:
+        raise ValueError(f"output key {bits.index(-1)} is neither of its labels")
+    return bits
+
+
+def _decode_table(Y: list[bytes], table: bytes) -> list[int]:
+    if not table:
+        raise ValueError("empty decoding table")
+    kind, body = table[0], table[1:]
+    if kind == DECODE_COLOUR:
+        m = len(body)
+    elif kind == DECODE_HASH:
+        if len(body) % (2 * TAG_BYTES):
+            raise ValueError(f"hashed decoding table of {len(body)} bytes, not {2 * TAG_BYTES} per output")
+        m = len(body) // (2 * TAG_BYTES)
+    else:
+        raise ValueError(f"unknown decoding table kind {kind}")
+    if len(Y) != m:
+        raise ValueError(f"need {m} output keys, got {len(Y)}")
+    if set(map(len, Y)) - {KEY_BYTES}:
+        raise ValueError(f"output keys must be {KEY_BYTES} bytes")
+    if kind == DECODE_COLOUR:
+        # first byte of every key, the colour bits of all outputs xored at once as one int
+        firsts = b''.join(Y)[::KEY_BYTES]
+        mask = int.from_bytes(b'\x01' * m, 'little')
+        return list(((int.from_bytes(firsts, 'little') & mask) ^ int.from_bytes(body, 'little')).to_bytes(m, 'little'))
+    bits = []
+    for j, Y_j in enumerate(Y):
+        tag = _label_tag(j, Y_j)
+        o = 2 * TAG_BYTES * j
+        if tag == body[o:o + TAG_BYTES]:
+            bits.append(0)
+        elif tag == body[o + TAG_BYTES:o + 2 * TAG_BYTES]:
+            bits.append(1)
+        else:
+            raise ValueError(f"output key {j} is neither of its labels")
+    return bits
+
+
+def blood_type_circuit() -> Circuit:
+    """
+    The blood type circuit, inputs 1-3 are Alice's (recipient) bits x_2, x_1, x_0 and
+    4-6 Bob's (donor) bits y_2, y_1, y_0, gates 7-9 compute x_i or not y_i.
+    """
+    return Circuit(n=6, m=1, q=5, gates=[7,8,9,10,11], A=[1,2,3,7,10], B=[4,5,6,8,10], gate_func=["A_OR_NOT_B", "A_OR_NOT_B", "A_OR_NOT_B", "OR", "OR"])
+
+
+def comparison_circuit(bits: int, compact: bool = False):
+    """
+    x > y for bits-bit numbers, inputs 1..bits are x and bits+1..2*bits are y (least
+    significant bit first). With c the result on the lower bits, bit i updates it to
+    x_i xor ((x_i xor c) and (y_i xor c)): 3 XOR, 1 AND per bit.
+    A CompactCircuit if compact, else a Circuit.
+    """
+    circuit = CompactCircuit(n=2 * bits, m=1)
+    add = circuit.add
+    c = add("AND", 1, add("NOT", bits + 1, bits + 1))  # x_0 and not y_0
+    for i in range(1, bits):
+        x_i, y_i = i + 1, bits + i + 1
+        c = add("XOR", x_i, add("AND", add("XOR", x_i, c), add("XOR", y_i, c)))
+    return circuit if compact else circuit.to_circuit()
+
+
+def chi_gates(width: int, rounds: int):
+    """
+    Gates (number, code, A, B) of chi_circuit, generated on the fly: the state
+    s_i = x_i xor y_i (inputs 1..width are x, width+1..2*width are y) goes through
+    `rounds` rounds of s_i <- s_i xor (s_(i+1) and s_(i+2)), indices mod width.
+    """
+    number = 2 * width
+    s = []
+    for i in range(width):
+        number += 1
+        yield number, XOR, i + 1, width + i + 1
+        s.append(number)
+    for _ in range(rounds):
+        t = []
+        for i in range(width):
+            number += 1
+            yield number, GATE_CODES["AND"], s[(i + 1) % width], s[(i + 2) % width]
+            t.append(number)
+        new = []
+        for i in range(width):  # the XORs of the last round are the m outputs
+            number += 1
+            yield number, XOR, s[i], t[i]
+            new.append(number)
+        s = new
+
+
+def chi_circuit(width: int, rounds: int, compact: bool = False):
+    """A narrow, deep circuit: width + 2 * width * rounds gates, never more than 3 * width wires alive."""
+    circuit = CompactCircuit(n=2 * width, m=width)
+    for number, code, a, b in chi_gates(width, rounds):
+        circuit.add(GATE_TYPES[code], a, b)
+    return circuit if compact else circuit.to_circuit()
+
+
+#========================================
+
+if __name__ == "__main__":
 
-circuit1 = Circuit(n=6, m=1, q=5, gates=[7,8,9,10,11], A=[1,2,3,7,10], B=[4,5,6,8,10], gate_func=["A_OR_NOT_B", "A_OR_NOT_B", "A_OR_NOT_B", "OR", "OR"])
-garbled_gates = []
+    # toggle this to test with different inputs for Alice and Bob
+    Alice= [1,0,1]
+    Bob = [1,1,0]
 
-print(f"Alice: 1. Generating garbled circuit:")
-gc, e, d = yao_garble(circuit1, garbled_gates)
+    #======================================================
 
-print("Alice:  gc, e, d <- yao_garble(circuit)\n")
+    #circuit1 = Circuit(3,1,2, [4,5], [1,4], [2,3], ["OR", "AND"]) # easy trest circuit
 
-print(f"Alice: 2.1 Generating encoding info for my bits x_2, x-1, x_1, and sendign them to bob")
+    circuit1 = blood_type_circuit()
+    garbled_gates = []
 
-X = yao_En(e,x=[1,0,1,1,0,1] )
-X = yao_En(e[:3],x=Alice )
-print(f"Alice: 2.1 - X[:half] = yao_En(e, x=[x_2, x_1, x_0]) = {X}\n")
+    print(f"Alice: 1. Generating garbled circuit:")
+    gc, e, d = yao_garble(circuit1, garbled_gates)
 
-print(f"Alice: doing OT with bob to give him encoding keys for his bits y_2, y_1, y_0(which i do not know)")
-X_bob = yao_En(e[3:], x=Bob)
+    print("Alice:  gc, e, d <- yao_garble(circuit)\n")
 
-X = X + X_bob
+    print(f"Alice: 2.1 Generating encoding info for my bits x_2, x-1, x_1, and sendign them to bob")
 
+    X = yao_En(e,x=[1,0,1,1,0,1] )
+    X = yao_En(e[:3],x=Alice )
+    print(f"Alice: 2.1 - X[:half] = yao_En(e, x=[x_2, x_1, x_0]) = {X}\n")
 
-print(f"Bob: 3. Evaluating the garbled circuit(gc) on garbled inputs(X) to get garbled outputs(Y):")
-print(f"Bob: 3. sending y to alice Y <- yao_eval(X, gc)")
-Y = yao_eval(X, gc, circuit1)
-print(f"Y={Y}\n")
+    print(f"Alice: doing OT with bob to give him encoding keys for his bits y_2, y_1, y_0(which i do not know)")
+    X_bob = yao_En(e[3:], x=Bob)
 
-print(f"Alice: 4. Decoding the garbled outputs(Y) to get output bits(output):")
+    X = X + X_bob
 
-output = yao_de(Y, d)
-print(f"output={output}")
 
+    print(f"Bob: 3. Evaluating the garbled circuit(gc) on garbled inputs(X) to get garbled outputs(Y):")
+    print(f"Bob: 3. sending y to alice Y <- yao_eval(X, gc)")
+    Y = yao_eval(X, gc, circuit1)
+    print(f"Y={Y}\n")
 
+    print(f"Alice: 4. Decoding the garbled outputs(Y) to get output bits(output):")
 
+    output = yao_de(Y, d)
+    print(f"output={output}")
@@ -0,0 +1,250 @@
+from array import array
+
+from garbled_circuits import AND_FORMS, GATE_CODES, GATE_TYPES, HALF_GATES, NOT, XOR, CompactCircuit, as_compact
+
+# Circuit optimizer: constant folding, merging of duplicate gates, dead gate
+# removal and an AND-saving XOR rewrite.
+#
+# The circuit is first rebuilt as a graph of AND and XOR nodes on literals,
+# literal 2 * node + neg stands for node xor neg, node 0 is the constant 0 and
+# nodes 1..n are the inputs. Every gate type is an AND form
+# ((a ^ alpha) & (b ^ beta)) ^ gamma (see garbled_circuits.and_form), XOR or NOT,
+# so negations only flip literal bits and NOT gates disappear. While building:
+#   constants   AND/XOR with a constant or twice the same node fold to a literal
+#   duplicates  AND(a, b) / XOR(x, y) are looked up before a node is added, inputs sorted
+# Rewrite: (s & p) ^ (s & q) = s & (p ^ q) when both ANDs are used only there,
+# one AND less. Rounds repeat while the AND count drops.
+# Emission: only nodes an output depends on are garbled. An AND node becomes the one
+# gate of AND, OR, A_OR_NOT_B that computes it up to a negation, which is
+# remembered for the wire and folded into the gates that read it. The outputs must
+# stay the last m wires in order: an output node read by nothing else is emitted at
+# the end, others (negated, inputs, constants, repeated) get a NOT or a free XOR
+# copy there.
+
+AND = GATE_CODES["AND"]
+# gate for an AND node by input polarities (wire value xor literal bit), the gate computes
+# the node xor flip, swap exchanges the inputs
+AND_GATES = {(0, 0): (AND, False, 0), (1, 1): (GATE_CODES["OR"], False, 1),
+             (1, 0): (GATE_CODES["A_OR_NOT_B"], False, 1), (0, 1): (GATE_CODES["A_OR_NOT_B"], True, 1)}
+NODE_AND, NODE_XOR = 1, 2
+
+
+class OptimizeStats:
+    def __init__(self, before: dict[str, int], after: dict[str, int], rewrites: int):
+        self.before = before      # gates per type of the input circuit
+        self.after = after        # and of the result
+        self.rewrites = rewrites  # applied (s & p) ^ (s & q) rewrites
+
+    def __repr__(self):
+        return (f"OptimizeStats(gates {sum(self.before.values())} -> {sum(self.after.values())}, "
+                f"non-free {non_free(self.before)} -> {non_free(self.after)}, rewrites={self.rewrites}, "
+                f"before={self.before}, after={self.after})")
+
+
+def gate_counts(circuit) -> dict[str, int]:
+    """Number of gates of every type."""
+    counts = dict.fromkeys(GATE_TYPES, 0)
+    for code in as_compact(circuit).codes:
+        counts[GATE_TYPES[code]] += 1
+    return counts
+
+
+def non_free(counts: dict[str, int]) -> int:
+    # gates with a table under half_gates (every gate but XOR and NOT)
+    return sum(count for name, count in counts.items() if AND_FORMS[name] is not None)
+
+
+class _Graph:
+    # AND/XOR nodes in topological order, node i reads literals left[i], right[i]
+    def __init__(self, n: int):
+        self.n = n
+        self.kind = bytearray(n + 1)
+        self.left = array('Q', bytes(8 * (n + 1)))
+        self.right = array('Q', bytes(8 * (n + 1)))
+        self.table = {}
+        self.outputs = []
+
+    def _node(self, kind: int, a: int, b: int) -> int:
+        key = (a << 34 | b) << 2 | kind  # literals below 2^34
+        node = self.table.get(key)
+        if node is None:
+            node = self.table[key] = len(self.kind)
+            self.kind.append(kind)
+            self.left.append(a)
+            self.right.append(b)
+        return node
+
+    def AND(self, a: int, b: int) -> int:
+        if a > b:
+            a, b = b, a
+        if a < 2:
+            return b if a else 0  # 1 & b = b, 0 & b = 0
+        if a == b:
+            return a
+        if a == b ^ 1:
+            return 0
+        return 2 * self._node(NODE_AND, a, b)
+
+    def XOR(self, a: int, b: int) -> int:
+        neg = (a ^ b) & 1
+        x, y = sorted((a >> 1, b >> 1))
+        if x == 0:
+            return 2 * y ^ neg  # y xor constant
+        if x == y:
+            return neg
+        return 2 * self._node(NODE_XOR, 2 * x, 2 * y) ^ neg
+
+    def gate(self, code: int, a: int, b: int) -> int:
+        if code == XOR:
+            return self.XOR(a, b)
+        if code == NOT:
+            return a ^ 1
+        alpha, beta, gamma = HALF_GATES[code]
+        return self.AND(a ^ alpha, b ^ beta) ^ gamma
+
+
+def _build(circuit: CompactCircuit) -> _Graph:
+    g = _Graph(circuit.n)
+    lits = array('Q', range(0, 2 * (circuit.n + 1), 2))  # wire -> literal, wire 0 unused
+    lits.extend(bytes(8 * circuit.q))
+    gate = g.gate
+    for number, code, a, b in zip(circuit.gates, circuit.codes, circuit.A, circuit.B):
+        lits[number] = gate(code, lits[a], lits[b])
+    wires = circuit.n + circuit.q
+    g.outputs = [lits[w] for w in range(wires - circuit.m + 1, wires + 1)]
+    return g
+
+
+def _uses(g: _Graph) -> tuple[array, bytearray]:
+    # reads of every node by the nodes the outputs depend on, 0 for dead nodes
+    live = bytearray(len(g.kind))
+    uses = array('I', bytes(4 * len(g.kind)))
+    for lit in g.outputs:
+        live[lit >> 1] = 1
+    for node in range(len(g.kind) - 1, g.n, -1):
+        if live[node]:
+            for lit in (g.left[node], g.right[node]):
+                live[lit >> 1] = 1
+                uses[lit >> 1] += 1
+    return uses, live
+
+
+def _rewrite(g: _Graph) -> tuple[_Graph, int]:
+    # copy of g with (s & p) ^ (s & q) -> s & (p ^ q) where both ANDs are read only there
+    uses, live = _uses(g)
+    outputs = {lit >> 1 for lit in g.outputs}
+    kind, left, right = g.kind, g.left, g.right
+    found = {}  # XOR node -> (s, p, q)
+    for node in range(g.n + 1, len(kind)):
+        if live[node] and kind[node] == NODE_XOR:
+            x, y = left[node] >> 1, right[node] >> 1
+            if kind[x] == NODE_AND and kind[y] == NODE_AND and uses[x] == 1 and uses[y] == 1 and not {x, y} & outputs:
+                shared = {left[x], right[x]} & {left[y], right[y]}
+                if shared:
+                    s = shared.pop()
+                    found[node] = (s, left[x] if right[x] == s else right[x], left[y] if right[y] == s else right[y])
+    if not found:
+        return g, 0
+    new = _Graph(g.n)
+    lits = array('Q', range(0, 2 * (g.n + 1), 2))
+    for node in range(g.n + 1, len(kind)):
+        if not live[node]:
+            lits.append(0)  # never read
+        elif node in found:
+            s, p, q = found[node]
+            lits.append(new.AND(_lit(lits, s), new.XOR(_lit(lits, p), _lit(lits, q))))
+        elif kind[node] == NODE_XOR:
+            lits.append(new.XOR(_lit(lits, left[node]), _lit(lits, right[node])))
+        else:
+            lits.append(new.AND(_lit(lits, left[node]), _lit(lits, right[node])))
+    new.outputs = [_lit(lits, lit) for lit in g.outputs]
+    return new, len(found)
+
+
+def _lit(lits: array, lit: int) -> int:
+    # literal of the old graph in the new one
+    return lits[lit >> 1] ^ (lit & 1)
+
+
+def _and_count(g: _Graph) -> int:
+    _, live = _uses(g)
+    return sum(1 for node in range(g.n + 1, len(g.kind)) if live[node] and g.kind[node] == NODE_AND)
+
+
+def _emit(g: _Graph, m: int) -> CompactCircuit:
+    uses, live = _uses(g)
+    # output nodes read by nothing else, with the right polarity, go to the end
+    first = {}
+    repeated = set()
+    for lit in g.outputs:
+        if lit >> 1 in first:
+            repeated.add(lit >> 1)
+        first.setdefault(lit >> 1, lit)
+    circuit = CompactCircuit(g.n, m)
+    add = circuit.add
+    wire = array('Q', range(g.n + 1))  # node -> wire
+    wire.extend(bytes(8 * (len(g.kind) - g.n - 1)))
+    flip = bytearray(len(g.kind))  # wire value = node xor flip
+
+    def emit(node: int) -> int:
+        a, b = g.left[node], g.right[node]
+        wa, wb = wire[a >> 1], wire[b >> 1]
+        if g.kind[node] == NODE_XOR:
+            flip[node] = flip[a >> 1] ^ flip[b >> 1]
+            return add("XOR", wa, wb)
+        code, swap, flip[node] = AND_GATES[((a & 1) ^ flip[a >> 1], (b & 1) ^ flip[b >> 1])]
+        return add(GATE_TYPES[code], wb, wa) if swap else add(GATE_TYPES[code], wa, wb)
+
+    def deferred(node: int) -> bool:
+        if node <= g.n or uses[node] or node in repeated:
+            return False
+        # the polarity of an AND node's wire only depends on its input polarities
+        a, b = g.left[node], g.right[node]
+        if g.kind[node] == NODE_XOR:
+            return (first[node] & 1) == flip[a >> 1] ^ flip[b >> 1]
+        return (first[node] & 1) == AND_GATES[((a & 1) ^ flip[a >> 1], (b & 1) ^ flip[b >> 1])][2]
+
+    last = set()
+    for node in range(g.n + 1, len(g.kind)):
+        if not live[node]:
+            continue
+        if node in first and deferred(node):
+            last.add(node)
+        else:
+            wire[node] = emit(node)
+
+    zero = None
+    if any((lit >> 1) not in last and lit != 0 and (lit == 1 or (lit & 1) == flip[lit >> 1]) for lit in g.outputs):
+        zero = add("XOR", 1, 1)  # for copies and the constant 1
+    for lit in g.outputs:
+        node = lit >> 1
+        if node in last:
+            emit(node)
+        elif lit == 0:
+            add("XOR", 1, 1)
+        elif lit == 1:
+            add("NOT", zero, zero)
+        elif (lit & 1) != flip[node]:
+            add("NOT", wire[node], wire[node])
+        else:
+            add("XOR", wire[node], zero)
+    return circuit
+
+
+def optimize(circuit, rounds: int = 4):
+    """
+    The optimized circuit (a Circuit for a Circuit, else a CompactCircuit) and an
+    OptimizeStats with the gate counts before and after. Same n and m, same outputs
+    on every input.
+    """
+    c = as_compact(circuit)
+    g = _build(c)
+    rewrites = 0
+    for _ in range(rounds):
+        new, done = _rewrite(g)
+        if not done or _and_count(new) >= _and_count(g):
+            break
+        g, rewrites = new, rewrites + done
+    result = _emit(g, c.m)
+    stats = OptimizeStats(gate_counts(c), gate_counts(result), rewrites)
+    return (result if isinstance(circuit, CompactCircuit) else result.to_circuit()), stats
@@ -0,0 +1,265 @@
+import hashlib
+import os
+import secrets
+import sys
+
+from Enc_scheme import G as hash_G
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "assignment4"))
+import transport
+from batch_ot import as_group
+from groups import P256
+
+# IKNP OT extension: KAPPA public-key base OTs are stretched into any number of
+# 1-out-of-2 OTs that only cost hashing and XORs.
+#
+# Roles are swapped in the base phase: the extension receiver (choices r_j) is
+# the base-OT sender with seed pairs (k0_i, k1_i), the extension sender is the
+# base-OT receiver with random choices s_i and learns k{s_i}_i, i = 0..KAPPA-1.
+#
+# Extending to m OTs (an m x KAPPA bit matrix, stored column by column as m-bit ints):
+#   receiver  t_i = PRG(k0_i), sends u_i = t_i xor PRG(k1_i) xor r
+#   sender    q_i = PRG(k{s_i}_i) xor (s_i * u_i) = t_i xor (s_i * r)
+# so row j of Q is q_j = t_j xor (r_j * s). H(j, q_j) and H(j, q_j xor s) are two
+# pads and the receiver knows H(j, t_j), exactly the one for r_j. On top of that:
+#   chosen OT      sender sends x0_j xor H(j, q_j), x1_j xor H(j, q_j xor s)
+#   random OT      no message, the pads are the messages
+#   correlated OT  x1_j = x0_j xor delta, one 16-byte message per OT
+#
+# PRG and H are the SHA-256 construction G from Enc_scheme.py. The base OTs are
+# ElGamal key encapsulation on a group from assignment4/groups.py (P-256 by
+# default): the base receiver sends a real and an oblivious public key per OT as
+# in the 1-out-of-8 OT, the sender picks y and gets the seeds H(pk_b^y), the
+# receiver recovers H(pk_s^y) from g^y with her secret key.
+# The PRG position advances with every extension, so one base phase serves many
+# extend calls.
+
+KAPPA = 128           # base OTs, computational security parameter
+KEY_BYTES = 16        # seeds and messages
+BLOCK_BYTES = 32      # output of G
+TRANSPOSE_CHUNK = 4096
+
+
+def prg(seed: bytes, start: int, nbits: int) -> int:
+    # nbits of the stream for seed, starting at bit `start` (a multiple of 256), as an int
+    first = start // (8 * BLOCK_BYTES)
+    blocks = (nbits + 8 * BLOCK_BYTES - 1) // (8 * BLOCK_BYTES)
+    stream = b''.join([hash_G(seed, b'prg', first + i) for i in range(blocks)])
+    return int.from_bytes(stream, 'little') & ((1 << nbits) - 1)
+
+
+def pad(j: int, row: int) -> bytes:
+    # correlation robust hash H(j, row) of a KAPPA-bit row
+    return hash_G(row.to_bytes(KAPPA // 8, 'little'), b'', j)[:KEY_BYTES]
+
+
+def xor_bytes(a: bytes, b: bytes) -> bytes:
+    return (int.from_bytes(a, 'little') ^ int.from_bytes(b, 'little')).to_bytes(len(a), 'little')
+
+
+def pack_bits(bits: list[int]) -> int:
+    # bit j of the result is bits[j]
+    return int('0' + ''.join(['1' if b else '0' for b in reversed(bits)]), 2)
+
+
+def transpose(columns: list[int], m: int) -> list[int]:
+    """
+    columns[i] is an m-bit int (bit j = row j of column i), returns the m rows
+    as len(columns)-bit ints (bit i = column i).
+    """
+    rows = []
+    reversed_columns = columns[::-1]  # so that column i ends up as bit i of the row
+    for start in range(0, m, TRANSPOSE_CHUNK):
+        n = min(TRANSPOSE_CHUNK, m - start)
+        mask = (1 << n) - 1
+        # one binary string per column, the first character is row start + n - 1
+        strings = [format((column >> start) & mask, f'0{n}b') for column in reversed_columns]
+        chunk = [int(''.join(row), 2) for row in zip(*strings)]
+        chunk.reverse()
+        rows.extend(chunk)
+    return rows
+
+
+# base OTs, 1-out-of-2 with random seeds
+def base_choose(choices: list[int], group=P256) -> tuple[list, list[int]]:
+    """Base receiver: flat list of 2 public keys per choice (the real one at the chosen index), secret keys."""
+    G = as_group(group)
+    pks, sks = [], []
+    for s in choices:
+        sk = G.random_exponent()
+        real = G.power_g(sk)
+        oblivious = G.oblivious_element(secrets.randbelow(G.q - 1) + 1)
+        pks.extend([real, oblivious] if s == 0 else [oblivious, real])
+        sks.append(sk)
+    return pks, sks
+
+
+def _seed(G, i: int, b: int, element) -> bytes:
+    return hashlib.sha256(i.to_bytes(4, 'big') + bytes([b]) + G.to_bytes(element)).digest()[:KEY_BYTES]
+
+
+def base_send(pks: list, group=P256) -> tuple[list, list[tuple[bytes, bytes]]]:
+    """Base sender: (g^y per OT, seed pairs)."""
+    G = as_group(group)
+    c1, seeds = [], []
+    for i in range(len(pks) // 2):
+        y = G.random_exponent()
+        c1.append(G.power_g(y))
+        seeds.append((_seed(G, i, 0, G.power(pks[2 * i], y)), _seed(G, i, 1, G.power(pks[2 * i + 1], y))))
+    return c1, seeds
+
+
+def base_receive(c1: list, choices: list[int], sks: list[int], group=P256) -> list[bytes]:
+    """Base receiver: the chosen seed of every OT."""
+    G = as_group(group)
+    return [_seed(G, i, s, G.power(c, sk)) for i, (c, s, sk) in enumerate(zip(c1, choices, sks))]
+
+
+class ExtensionSender:
+    """Extension sender, holds s and the seeds k{s_i}_i after the base phase."""
+
+    def __init__(self, group=P256):
+        self.group = as_group(group)
+        self.s = [secrets.randbits(1) for _ in range(KAPPA)]
+        self.s_int = pack_bits(self.s)
+        self.sks = None
+        self.seeds = None
+        self.position = 0  # PRG bits used so far
+        self.count = 0     # OTs extended so far, keeps the j in H(j, .) unique
+
+    def base_choose(self) -> list:
+        pks, self.sks = base_choose(self.s, self.group)
+        return pks
+
+    def base_finish(self, c1: list):
+        self.seeds = base_receive(c1, self.s, self.sks, self.group)
+        self.sks = None
+
+    def extend(self, u: list[int], m: int) -> list[int]:
+        """Rows q_j of the m OTs from the receiver's columns u_i."""
+        if len(u) != KAPPA:
+            raise ValueError(f"need {KAPPA} columns, got {len(u)}")
+        columns = []
+        for s_i, seed, u_i in zip(self.s, self.seeds, u):
+            q_i = prg(seed, self.position, m)
+            columns.append(q_i ^ u_i if s_i else q_i)
+        self.position += -m % (8 * BLOCK_BYTES) + m  # next extension starts on a fresh PRG block
+        return transpose(columns, m)
+
+    def _pads(self, q: list[int]):
+        j0 = self.count
+        self.count += len(q)
+        s = self.s_int
+        return [(pad(j0 + j, q_j), pad(j0 + j, q_j ^ s)) for j, q_j in enumerate(q)]
+
+    def send(self, q: list[int], messages: list[tuple[bytes, bytes]]) -> bytes:
+        # chosen-message OT: both messages masked, flat 2 x 16 bytes per OT
+        if len(q) != len(messages):
+            raise ValueError(f"{len(q)} OTs but {len(messages)} message pairs")
+        out = []
+        for (p0, p1), (x0, x1) in zip(self._pads(q), messages):
+            out.append(xor_bytes(x0, p0))
+            out.append(xor_bytes(x1, p1))
+        return b''.join(out)
+
+    def random(self, q: list[int]) -> list[tuple[bytes, bytes]]:
+        # random OT: the pads are the sender's messages
+        return self._pads(q)
+
+    def correlated(self, q: list[int], delta: bytes) -> tuple[list[bytes], bytes]:
+        # correlated OT: (x0_j list with x1_j = x0_j xor delta, the message to the receiver)
+        x0, out = [], []
+        for p0, p1 in self._pads(q):
+            x0.append(p0)
+            out.append(xor_bytes(xor_bytes(p0, p1), delta))
+        return x0, b''.join(out)
+
+
+class ExtensionReceiver:
+    """Extension receiver, holds both seeds of every base OT."""
+
+    def __init__(self, group=P256):
+        self.group = as_group(group)
+        self.seeds = None
+        self.position = 0
+        self.count = 0
+
+    def base_send(self, pks: list) -> list:
+        c1, self.seeds = base_send(pks, self.group)
+        return c1
+
+    def extend(self, choices: list[int]) -> tuple[list[int], list[int]]:
+        """(columns u_i for the sender, my rows t_j)."""
+        m = len(choices)
+        r = pack_bits(choices)
+        t, u = [], []
+        for k0, k1 in self.seeds:
+            t_i = prg(k0, self.position, m)
+            t.append(t_i)
+            u.append(t_i ^ prg(k1, self.position, m) ^ r)
+        self.position += -m % (8 * BLOCK_BYTES) + m
+        return u, transpose(t, m)
+
+    def _pads(self, t: list[int]) -> list[bytes]:
+        j0 = self.count
+        self.count += len(t)
+        return [pad(j0 + j, t_j) for j, t_j in enumerate(t)]
+
+    def receive(self, t: list[int], choices: list[int], data: bytes) -> list[bytes]:
+        # chosen-message OT
+        out = []
+        for j, (p, r_j) in enumerate(zip(self._pads(t), choices)):
+            offset = (2 * j + r_j) * KEY_BYTES
+            out.append(xor_bytes(data[offset:offset + KEY_BYTES], p))
+        return out
+
+    def random(self, t: list[int]) -> list[bytes]:
+        return self._pads(t)
+
+    def correlated(self, t: list[int], choices: list[int], data: bytes) -> list[bytes]:
+        out = []
+        for j, (p, r_j) in enumerate(zip(self._pads(t), choices)):
+            out.append(xor_bytes(data[j * KEY_BYTES:(j + 1) * KEY_BYTES], p) if r_j else p)
+        return out
+
+
+def pack_columns(columns: list[int], m: int) -> bytes:
+    n = (m + 7) // 8
+    return b''.join([c.to_bytes(n, 'little') for c in columns])
+
+
+def unpack_columns(data: bytes, m: int) -> list[int]:
+    n = (m + 7) // 8
+    return [int.from_bytes(data[i:i + n], 'little') for i in range(0, len(data), n)]
+
+
+# over a transport.Channel:  sender -> receiver  base public keys
+#                            receiver -> sender  base g^y, columns u
+#                            sender -> receiver  masked messages
+def sender(channel: transport.Channel, messages: list[tuple[bytes, bytes]], group=P256):
+    S = ExtensionSender(group)
+    channel.send(S.group.pack(S.base_choose()))
+    S.base_finish(S.group.unpack(channel.recv()))
+    q = S.extend(unpack_columns(channel.recv(), len(messages)), len(messages))
+    channel.send(S.send(q, messages))
+
+
+def receiver(channel: transport.Channel, choices: list[int], group=P256) -> list[bytes]:
+    R = ExtensionReceiver(group)
+    pks = R.group.unpack(channel.recv())
+    channel.send(R.group.pack(R.base_send(pks)))
+    u, t = R.extend(choices)
+    channel.send(pack_columns(u, len(choices)))
+    return R.receive(t, choices, channel.recv())
+
+
+def run(messages: list[tuple[bytes, bytes]], choices: list[int], group=P256, backend: str = "queue") -> tuple[list[bytes], transport.ChannelStats, transport.ChannelStats]:
+    """len(choices) OTs over the transport, returns the receiver's messages[j][choices[j]]."""
+    if len(messages) != len(choices):
+        raise ValueError(f"{len(messages)} message pairs but {len(choices)} choices")
+    _, received, stats_s, stats_r = transport.run_parties(
+        lambda channel: sender(channel, messages, group),
+        lambda channel: receiver(channel, choices, group),
+        backend)
+    return received, stats_s, stats_r
@@ -0,0 +1,97 @@
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+from Enc_scheme import get_prf
+from garbled_circuits import (GARBLE_GATE, LABEL_BYTES, ROWS, SCHEMES, GarbledCircuit, as_compact,
+                              garbled_layout, init_labels)
+
+# Garbling spread over a process pool.
+#
+# The ciphertexts and the labels live in two SharedMemory buffers with the layout
+# of garble_compact (gate offsets from garbled_layout), workers garble ranges of
+# gates straight into them. With half_gates an output label depends on the input
+# labels, so the gates are grouped in layers (levelize: one more than the deepest
+# input) and a layer starts once the previous one is done. classic and
+# point_and_permute draw every label up front and are one layer.
+#
+# Every gate's bytes sit at a fixed offset and depend only on its input labels and
+# the PRF, so the result does not depend on the number of workers or on the order
+# of the tasks: with the same seed it is byte for byte the output of garble_compact.
+
+_state = {}
+
+
+def levelize(circuit) -> list[array]:
+    """Gate indices (0-based positions in the circuit) per layer, a gate only reads wires of earlier layers."""
+    c = as_compact(circuit)
+    level = array('I', bytes(4 * (c.n + c.q)))
+    layers = []
+    for i, (number, a, b) in enumerate(zip(c.gates, c.A, c.B)):
+        depth = max(level[a - 1], level[b - 1])
+        level[number - 1] = depth + 1
+        if depth == len(layers):
+            layers.append(array('I'))
+        layers[depth].append(i)
+    return layers
+
+
+def _init_worker(circuit, offsets, layers, scheme: str, prf: str, delta: int, data_name: str, labels_name: str):
+    data = shared_memory.SharedMemory(name=data_name)
+    labels = shared_memory.SharedMemory(name=labels_name)
+    # the segments stay open for the life of the worker
+    _state.update(circuit=circuit, offsets=offsets, layers=layers, garble_gate=GARBLE_GATE[scheme], H=get_prf(prf),
+                  delta=delta, shm=(data, labels), out=data.buf, labels=labels.buf)
+
+
+def _garble_range(layer: int, start: int, stop: int) -> int:
+    s = _state
+    c, offsets, garble_gate, H, delta, out, L = s["circuit"], s["offsets"], s["garble_gate"], s["H"], s["delta"], s["out"], s["labels"]
+    gates, codes, A, B = c.gates, c.codes, c.A, c.B
+    for i in s["layers"][layer][start:stop]:
+        garble_gate(L, out, offsets[i], gates[i], codes[i], A[i], B[i], H, delta)
+    return stop - start
+
+
+def parallel_garble(circuit, scheme: str = "half_gates", prf: str = "sha256", seed: bytes = None,
+                    workers: int = None, chunk: int = 2048, mp_context=None) -> GarbledCircuit:
+    """
+    garble_compact on a pool of `workers` processes (default: the number of CPUs),
+    `chunk` gates of a layer per task. Same arguments and result as garble_compact.
+    """
+    if scheme not in ROWS:
+        raise ValueError(f"Unsupported scheme {scheme}, use one of {SCHEMES}")
+    if chunk < 1:
+        raise ValueError(f"chunk should be at least 1, you gave chunk = {chunk}")
+    get_prf(prf)
+    c = as_compact(circuit)
+    offsets = garbled_layout(c, scheme)
+    if scheme == "half_gates":
+        layers = levelize(c)
+    else:
+        layers = [array('I', range(c.q))]
+
+    labels = bytearray(LABEL_BYTES * (c.n + c.q))
+    delta = init_labels(labels, c.n, scheme, seed)
+    # SharedMemory refuses size 0 (a circuit of free gates only)
+    data_shm = shared_memory.SharedMemory(create=True, size=max(offsets[-1], 1))
+    labels_shm = shared_memory.SharedMemory(create=True, size=len(labels))
+    try:
+        labels_shm.buf[:len(labels)] = labels
+        initargs = (c, offsets, layers, scheme, prf, delta, data_shm.name, labels_shm.name)
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), mp_context=mp_context,
+                                 initializer=_init_worker, initargs=initargs) as executor:
+            for depth, layer in enumerate(layers):
+                tasks = [executor.submit(_garble_range, depth, start, start + chunk) for start in range(0, len(layer), chunk)]
+                # the next layer reads labels written by this one
+                for task in tasks:
+                    task.result()
+        data = bytearray(data_shm.buf[:offsets[-1]])
+        labels[:] = labels_shm.buf[:len(labels)]
+    finally:
+        data_shm.close()
+        data_shm.unlink()
+        labels_shm.close()
+        labels_shm.unlink()
+    return GarbledCircuit(c, scheme, prf, data, labels)
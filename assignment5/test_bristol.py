@@ -0,0 +1,112 @@
+"""
+Tests for the Bristol circuit loader.
+Run with: pytest test_bristol.py
+"""
+import io
+import itertools
+import random
+import unittest
+
+from bristol import load_bristol
+from garbled_circuits import SCHEMES, Circuit, chi_circuit, garble_compact, plain_eval, yao_eval_packed
+
+# 2-bit adder x + y (3 output bits, least significant first) using every gate type,
+# sum bit 0 comes last in the file
+ADDER = """
+9 14
+2 2 2
+1 3
+
+2 1 0 2 4 AND
+2 1 1 3 5 XOR
+2 1 5 4 12 XOR
+1 1 5 6 INV
+1 1 6 7 INV
+4 2 1 7 3 4 8 9 MAND
+2 1 8 9 10 XOR
+1 1 10 13 EQW
+2 1 0 2 11 XOR
+"""
+
+
+def adder(x: list[int]) -> list[int]:
+    a = x[0] + 2 * x[1]
+    b = x[2] + 2 * x[3]
+    return [((a + b) >> i) & 1 for i in range(3)]
+
+
+def bristol_text(circuit, inputs: list[int]) -> str:
+    # a Circuit with only AND/XOR/NOT gates in Bristol Fashion, wire w is w - 1
+    ops = {"AND": "2 1 {a} {b} {out} AND", "XOR": "2 1 {a} {b} {out} XOR", "NOT": "1 1 {a} {out} INV"}
+    lines = [f"{circuit.q} {circuit.n + circuit.q}", f"{len(inputs)} " + " ".join(map(str, inputs)), f"1 {circuit.m}", ""]
+    for number, a, b, func in zip(circuit.gates, circuit.A, circuit.B, circuit.gate_func):
+        lines.append(ops[func].format(a=a - 1, b=b - 1, out=number - 1))
+    return "\n".join(lines) + "\n"
+
+
+class TestBristol(unittest.TestCase):
+
+    def test_all_gate_types(self):
+        circuit, inputs, outputs = load_bristol(io.StringIO(ADDER))
+        assert isinstance(circuit, Circuit)
+        assert (circuit.n, circuit.m, inputs, outputs) == (4, 3, [2, 2], [3])
+        assert circuit.gates == list(range(circuit.n + 1, circuit.n + circuit.q + 1))
+        for x in itertools.product((0, 1), repeat=4):
+            assert plain_eval(circuit, list(x)) == adder(list(x))
+
+    def test_garbled(self):
+        circuit, _, _ = load_bristol(io.StringIO(ADDER), compact=True)
+        for scheme in SCHEMES:
+            garbled = garble_compact(circuit, scheme)
+            x = [random.getrandbits(1) for _ in range(4)]
+            Y = yao_eval_packed(garbled.encode(x), garbled.data, circuit, scheme)
+            assert [d_j.index(Y_j) for Y_j, d_j in zip(Y, garbled.d())] == adder(x)
+
+    def test_round_trip(self):
+        """Outputs already last and in order: the same gates, no copies."""
+        original = chi_circuit(5, 3)
+        circuit, inputs, _ = load_bristol(io.StringIO(bristol_text(original, [5, 5])))
+        assert inputs == [5, 5]
+        assert (circuit.gates, circuit.A, circuit.B, circuit.gate_func) == (original.gates, original.A, original.B, original.gate_func)
+
+    def test_old_format_and_constants(self):
+        # outputs: not x_0, the constant 1, input x_1 copied
+        text = "3 6\n1 2 3\n\n1 1 0 3 INV\n1 1 1 4 EQ\n1 1 1 5 EQW\n"
+        circuit, inputs, outputs = load_bristol(io.StringIO(text))
+        assert (inputs, outputs) == ([1, 2], [3])
+        for x in itertools.product((0, 1), repeat=3):
+            assert plain_eval(circuit, list(x)) == [1 - x[0], 1, x[1]]
+
+    def test_old_format_two_sizes(self):
+        """'2 2 1' followed by a gate line is the old format, not Fashion's 2 inputs of 2 and 1 bits."""
+        circuit, inputs, outputs = load_bristol(['1 5', '2 2 1', '', '2 1 0 1 4 AND'])
+        assert (inputs, outputs) == ([2, 2], [1])
+        for x in itertools.product((0, 1), repeat=4):
+            assert plain_eval(circuit, list(x)) == [x[0] & x[1]]
+
+    def test_path(self):
+        import os
+        import tempfile
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "adder.txt")
+            with open(path, "w") as f:
+                f.write(ADDER)
+            circuit, _, _ = load_bristol(path, compact=True)
+        assert plain_eval(circuit, [1, 1, 1, 1]) == [0, 1, 1]
+
+    def test_errors(self):
+        bad = [
+            "",                                              # empty
+            "1 5\n2 2 2\n1 1\n\n2 1 0 1 4 OR\n",            # unsupported gate
+            "1 6\n2 2 2\n1 1\n\n2 1 0 4 5 XOR\n",           # wire read before it is set
+            "2 5\n2 2 2\n1 1\n\n2 1 0 1 4 XOR\n",           # gate count
+            "1 5\n2 2 2\n1 1\n\n2 1 0 1 XOR\n",             # too few wires
+            "1 5\n2 2 2\n1 1\n\n2 1 0 1 3 XOR\n",           # output never set
+        ]
+        for text in bad:
+            with self.assertRaises(ValueError):
+                load_bristol(io.StringIO(text))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,7 +3,8 @@ Test suite for crypto module.
 Run with: pytest tests/test_crypto.py
 """
 import unittest
-from Enc_scheme import enc, dec, generate_random_key, G, xor_bytes
+from Enc_scheme import PRFS, enc, dec, enc_unpadded, dec_unpadded, generate_random_key, get_prf, G, xor_bytes, enc_into, enc_unpadded_into
+from aes import AES128
 
 class TestBasicCorrectness(unittest.TestCase):
     """Test basic encrypt-decrypt correctness."""
@@ -31,6 +32,15 @@ class TestBasicCorrectness(unittest.TestCase):
             decrypted = dec(k1, k2, gate, ct)
             assert decrypted == message
 
+    def test_unpadded(self):
+        """Point-and-permute rows: 16 bytes, dec_unpadded(enc_unpadded(m)) = m."""
+        k1 = generate_random_key()
+        k2 = generate_random_key()
+        message = generate_random_key()
+        ct = enc_unpadded(k1, k2, 7, message)
+        assert len(ct) == 16
+        assert dec_unpadded(k1, k2, 7, ct) == message
+
     def test_special_correctness(self):
         """Test special correctness property of enc scheme."""
         k1 = generate_random_key()
@@ -46,6 +56,42 @@ class TestBasicCorrectness(unittest.TestCase):
             return  # Exit the test if decryption fails
 
         
+    def test_xor_and_into(self):
+        """int-based xor keeps the zip semantics, *_into writes the same bytes as enc."""
+        a, b = generate_random_key(), generate_random_key()
+        assert xor_bytes(a, b) == bytes(x ^ y for x, y in zip(a, b))
+        assert xor_bytes(a + b, b) == bytes(x ^ y for x, y in zip(a, b))
+        k1, k2, message = generate_random_key(), generate_random_key(), generate_random_key()
+        out = bytearray(64)
+        enc_into(out, 8, k1, k2, 5, message)
+        assert out[8:40] == enc(k1, k2, 5, message)
+        assert dec(k1, k2, 5, memoryview(out)[8:40]) == message
+        enc_unpadded_into(out, 40, k1, k2, 5, message)
+        assert out[40:56] == enc_unpadded(k1, k2, 5, message)
+
+    def test_prf_backends(self):
+        """enc/dec round trip and distinct pads with every PRF."""
+        k1 = generate_random_key()
+        k2 = generate_random_key()
+        message = generate_random_key()
+        for name in PRFS:
+            prf = get_prf(name)
+            assert dec(k1, k2, 3, enc(k1, k2, 3, message, prf), prf) == message
+            assert prf(k1, k2, 3, 16) == prf(k1, k2, 3)[:16]
+            assert prf(k1, k2, 3) != prf(k1, k2, 4) and prf(k1, k2, 3) != prf(k2, k1, 3)
+        with self.assertRaises(ValueError):
+            get_prf("md5")
+
+
+class TestAES(unittest.TestCase):
+    """FIPS-197 test vectors for the pure-Python AES."""
+
+    def test_vectors(self):
+        cipher = AES128(bytes(range(16)))
+        assert cipher.encrypt_block(bytes.fromhex("00112233445566778899aabbccddeeff")).hex() == "69c4e0d86a7b0430d8cdb78070b4c55a"
+        cipher = AES128(bytes.fromhex("2b7e151628aed2a6abf7158809cf4f3c"))
+        assert cipher.encrypt_block(bytes.fromhex("3243f6a8885a308d313198a2e0370734")).hex() == "3925841d02dc09fbdc118597196a0b32"
+
        
 
 # class TestSecurity:
@@ -0,0 +1,92 @@
+"""
+Tests for streaming garbling.
+Run with: pytest test_garble_stream.py
+"""
+import random
+import unittest
+
+import yao_net
+from garble_stream import GateStream, StreamGarbler, eval_stream, fan_out
+from garbled_circuits import SCHEMES, CompactCircuit, blood_type_circuit, chi_circuit, chi_gates, comparison_circuit, plain_eval, yao_En
+
+
+def decoded(Y: list[bytes], d: list[list[bytes]]) -> list[int]:
+    return [d_j.index(Y_j) for Y_j, d_j in zip(Y, d)]
+
+
+class TestGarbleStream(unittest.TestCase):
+
+    def test_schemes_and_circuits(self):
+        for scheme in SCHEMES:
+            for circuit in (blood_type_circuit(), comparison_circuit(12), chi_circuit(6, 4, compact=True)):
+                garbler = StreamGarbler(circuit, scheme)
+                x = [random.getrandbits(1) for _ in range(circuit.n)]
+                Y = eval_stream(yao_En(garbler.e, x), garbler.chunks(5), circuit, scheme)
+                assert decoded(Y, garbler.d) == plain_eval(circuit, x)
+
+    def test_chunk_borders(self):
+        """Chunks of any size, also splitting a gate's rows, give the same result."""
+        circuit = comparison_circuit(8)
+        for scheme in SCHEMES:
+            garbler = StreamGarbler(circuit, scheme)
+            data = b''.join(bytes(chunk) for chunk in garbler.chunks(3))
+            x = [random.getrandbits(1) for _ in range(circuit.n)]
+            for size in (1, 7, 50, len(data)):
+                pieces = [data[i:i + size] for i in range(0, len(data), size)]
+                Y = eval_stream(yao_En(garbler.e, x), pieces, circuit, scheme)
+                assert decoded(Y, garbler.d) == plain_eval(circuit, x)
+            with self.assertRaises(ValueError):
+                eval_stream(yao_En(garbler.e, x), [data[:-1]], circuit, scheme)
+            with self.assertRaises(ValueError):
+                eval_stream(yao_En(garbler.e, x), [data, b'x'], circuit, scheme)
+
+    def test_classic_wrong_key(self):
+        circuit = blood_type_circuit()
+        garbler = StreamGarbler(circuit, "classic")
+        X = yao_En(garbler.e, [1, 0, 1, 1, 1, 0])
+        X[0] = bytes(32)
+        with self.assertRaisesRegex(ValueError, "no row decrypts"):
+            eval_stream(X, garbler.chunks(5), circuit, "classic")
+
+    def test_width_bounded(self):
+        """A GateStream is never stored and the garbler only keeps the live wires."""
+        width, rounds = 8, 50
+        circuit = GateStream(2 * width, width, width + 2 * width * rounds, lambda: chi_gates(width, rounds))
+        garbler = StreamGarbler(circuit)
+        x = [random.getrandbits(1) for _ in range(circuit.n)]
+        Y = eval_stream(yao_En(garbler.e, x), garbler.chunks(16), circuit)
+        assert decoded(Y, garbler.d) == plain_eval(chi_circuit(width, rounds), x)
+        assert garbler.peak_labels <= 3 * width
+        assert len(garbler.labels) == width  # only the outputs are left
+
+    def test_dead_gates_dropped(self):
+        """Keys of gates nobody reads are not kept, memory does not grow with dead gates."""
+        circuit = CompactCircuit(2, 1)
+        for _ in range(1000):
+            circuit.add("AND", 1, 2)
+        circuit.add("XOR", 1, 2)
+        for scheme in SCHEMES:
+            garbler = StreamGarbler(circuit, scheme)
+            x = [1, 0]
+            Y = eval_stream(yao_En(garbler.e, x), garbler.chunks(64), circuit, scheme)
+            assert decoded(Y, garbler.d) == plain_eval(circuit, x) == [1]
+            assert garbler.peak_labels <= 3
+            assert len(garbler.labels) == 1
+
+    def test_fan_out(self):
+        uses = fan_out(blood_type_circuit())
+        assert list(uses) == [1, 1, 1, 1, 1, 1, 1, 1, 0, 2, 1]  # wire 9 is never read, 11 is the output
+
+    def test_over_transport(self):
+        circuit = comparison_circuit(16)
+        x, y = random.getrandbits(16), random.getrandbits(16)
+        bits_x = [(x >> i) & 1 for i in range(16)]
+        bits_y = [(y >> i) & 1 for i in range(16)]
+        for backend in ("queue", "tcp"):
+            output, stats_a, stats_b = yao_net.run_stream(circuit, bits_x, bits_y, "half_gates", backend, chunk=8)
+            assert output == [int(x > y)]
+            assert stats_a.messages_sent > 3
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,183 @@
+"""
+Tests for the garbling schemes in garbled_circuits.py.
+Run with: pytest test_garbled_circuits.py
+"""
+import random
+import unittest
+
+from Enc_scheme import PRFS
+from garbled_circuits import SCHEMES, Circuit, CompactCircuit, garble_compact, blood_type_circuit, colour, comparison_circuit, garbled_size, plain_eval
+from garbled_circuits import garbled_layout, pack_gc, unpack_gc, yao_En, yao_de, yao_eval, yao_eval_packed, yao_garble, yao_garble_packed
+from garbled_circuits import DECODE_COLOUR, DECODE_HASH, chi_circuit, decoding_table
+
+
+def garbled_output(circuit: Circuit, x: list[int], scheme: str) -> list[int]:
+    gc, e, d = yao_garble(circuit, [], scheme)
+    return yao_de(yao_eval(yao_En(e, x), gc, circuit, verbose=False, scheme=scheme), d)
+
+
+class TestGarbling(unittest.TestCase):
+
+    def test_blood_type_all_inputs(self):
+        for scheme in SCHEMES:
+            for inputs in range(64):
+                x = [(inputs >> i) & 1 for i in range(6)]
+                assert garbled_output(blood_type_circuit(), x, scheme) == plain_eval(blood_type_circuit(), x)
+
+    def test_every_gate_type(self):
+        for func in ("AND", "OR", "A_OR_NOT_B", "XOR", "NOT"):
+            for scheme in SCHEMES:
+                for a in (0, 1):
+                    for b in (0, 1):
+                        circuit = Circuit(n=2, m=1, q=1, gates=[3], A=[1], B=[2], gate_func=[func])
+                        assert garbled_output(circuit, [a, b], scheme) == plain_eval(circuit, [a, b])
+
+    def test_comparison(self):
+        bits = 16
+        for scheme in SCHEMES:
+            for _ in range(10):
+                x, y = random.getrandbits(bits), random.getrandbits(bits)
+                inputs = [(x >> i) & 1 for i in range(bits)] + [(y >> i) & 1 for i in range(bits)]
+                assert plain_eval(comparison_circuit(bits), inputs) == [int(x > y)]
+                assert garbled_output(comparison_circuit(bits), inputs, scheme) == [int(x > y)]
+
+    def test_half_gates_size(self):
+        """XOR and NOT are free, every AND gate costs 2 x 16 bytes."""
+        bits = 32
+        gc, e, d = yao_garble(comparison_circuit(bits), [], "half_gates")
+        assert garbled_size(gc) == bits * 32
+        gc, e, d = yao_garble(comparison_circuit(bits), [], "classic")
+        assert garbled_size(gc) == (4 * bits - 2) * 4 * 32
+
+    def test_prf_backends(self):
+        for prf in PRFS:
+            for scheme in SCHEMES:
+                for inputs in (0, 21, 63):
+                    circuit = blood_type_circuit()
+                    x = [(inputs >> i) & 1 for i in range(6)]
+                    gc, e, d = yao_garble(circuit, [], scheme, prf)
+                    Y = yao_eval(yao_En(e, x), gc, circuit, verbose=False, scheme=scheme, prf=prf)
+                    assert yao_de(Y, d) == plain_eval(circuit, x)
+
+    def test_point_and_permute(self):
+        """16-byte rows and one row per gate: the colours of the input keys pick it."""
+        circuit = comparison_circuit(8)
+        gc, e, d = yao_garble(circuit, [], "point_and_permute")
+        assert garbled_size(gc) == circuit.q * 4 * 16
+        for k_0, k_1 in circuit.keys:
+            assert colour(k_0) != colour(k_1)
+
+    def test_packed(self):
+        """One bytearray laid out by garbled_layout, the list form is its split."""
+        for scheme in SCHEMES:
+            circuit = comparison_circuit(8)
+            data, e, d = yao_garble_packed(circuit, scheme)
+            assert isinstance(data, bytearray) and len(data) == garbled_layout(circuit, scheme)[-1]
+            gc = unpack_gc(data, circuit, scheme)
+            assert pack_gc(gc) == data
+            x = [random.getrandbits(1) for _ in range(circuit.n)]
+            Y = yao_eval_packed(yao_En(e, x), data, circuit, scheme)
+            assert Y == yao_eval(yao_En(e, x), gc, circuit, verbose=False, scheme=scheme)
+            assert yao_de(Y, d) == plain_eval(circuit, x)
+            with self.assertRaises(ValueError):
+                yao_eval_packed(yao_En(e, x), data[:-1], circuit, scheme)
+
+    def test_compact(self):
+        """CompactCircuit round trip, garble_compact buffers match the list API."""
+        circuit = blood_type_circuit()
+        compact = CompactCircuit.from_circuit(circuit)
+        assert list(compact.gates) == circuit.gates and compact.gate_func == circuit.gate_func
+        assert vars(compact.to_circuit()) == vars(circuit)
+        assert vars(comparison_circuit(6, compact=True).to_circuit()) == vars(comparison_circuit(6))
+        for scheme in SCHEMES:
+            compact = comparison_circuit(8, compact=True)
+            garbled = garble_compact(compact, scheme)
+            assert len(garbled.labels) == 32 * (compact.n + compact.q)
+            x = [random.getrandbits(1) for _ in range(compact.n)]
+            Y = yao_eval_packed(garbled.encode(x), memoryview(garbled.data), compact, scheme)
+            assert Y[0] == garbled.d()[0][plain_eval(compact, x)[0]]
+            assert garbled.encode(x) == yao_En(garbled.e(), x)
+        with self.assertRaises(ValueError):
+            compact.add("NAND", 1, 2)
+
+    def test_classic_wrong_key(self):
+        """A classic gate where no row decrypts is an error, not a missing output key."""
+        circuit = blood_type_circuit()
+        gc, e, d = yao_garble(circuit, [], "classic")
+        X = yao_En(e, [1, 0, 1, 1, 1, 0])
+        X[0] = bytes(32)
+        with self.assertRaisesRegex(ValueError, "no row decrypts"):
+            yao_eval(X, gc, circuit, verbose=False, scheme="classic")
+        with self.assertRaisesRegex(ValueError, "no row decrypts"):
+            yao_eval_packed(X, pack_gc(gc), circuit, "classic")
+
+    def test_plain_eval_input_length(self):
+        for x in ([1, 0, 1, 1, 1], [1, 0, 1, 1, 1, 0, 1]):
+            with self.assertRaises(ValueError):
+                plain_eval(blood_type_circuit(), x)
+
+    def test_eval_keeps_inputs(self):
+        for scheme in SCHEMES:
+            circuit = blood_type_circuit()
+            gc, e, d = yao_garble(circuit, [], scheme)
+            X = yao_En(e, [1, 0, 1, 1, 1, 0])
+            yao_eval(X, gc, circuit, verbose=False, scheme=scheme)
+            assert len(X) == 6
+
+    def test_free_xor_keys(self):
+        circuit = comparison_circuit(4)
+        yao_garble(circuit, [], "half_gates")
+        deltas = {bytes(a ^ b for a, b in zip(k0, k1)) for k0, k1 in circuit.keys}
+        assert len(deltas) == 1 and deltas.pop()[0] & 1
+
+    def test_unknown_scheme(self):
+        with self.assertRaises(ValueError):
+            yao_garble(blood_type_circuit(), [], "free")
+        with self.assertRaises(ValueError):
+            yao_garble(Circuit(2, 1, 1, [3], [1], [2], ["NAND"]), [], "half_gates")
+
+
+class TestDecoding(unittest.TestCase):
+
+    def test_all_outputs(self):
+        """Every output, decoded from the keys and from both kinds of table."""
+        circuit = chi_circuit(40, 2, compact=True)
+        for scheme in SCHEMES:
+            garbled = garble_compact(circuit, scheme)
+            x = [random.getrandbits(1) for _ in range(circuit.n)]
+            Y = yao_eval_packed(garbled.encode(x), garbled.data, circuit, scheme)
+            expected = plain_eval(circuit, x)
+            assert len(expected) == 40
+            assert yao_de(Y, garbled.d()) == expected
+            assert yao_de(Y, garbled.decoding_table(hashed=True)) == expected
+            if scheme != "classic":
+                table = garbled.decoding_table()
+                assert table[0] == DECODE_COLOUR and len(table) == 1 + circuit.m
+                assert yao_de(Y, table) == expected
+
+    def test_default_table(self):
+        _, _, d = yao_garble(blood_type_circuit(), [])
+        assert decoding_table(d)[0] == DECODE_HASH
+        with self.assertRaises(ValueError):
+            decoding_table(d, "classic", hashed=False)
+
+    def test_errors(self):
+        circuit = comparison_circuit(4)
+        for scheme in ("classic", "half_gates"):
+            gc, e, d = yao_garble(circuit, [], scheme)
+            Y = yao_eval(yao_En(e, [1] * 8), gc, circuit, verbose=False, scheme=scheme)
+            wrong = [bytes(16)]
+            for table in (d, decoding_table(d, scheme, hashed=True)):
+                with self.assertRaises(ValueError):
+                    yao_de(Y + Y, table)  # too many keys
+                with self.assertRaises(ValueError):
+                    yao_de(wrong, table)  # not a label
+            for table in (b'', b'\x07', bytes([DECODE_HASH]) + bytes(5)):
+                with self.assertRaises(ValueError):
+                    yao_de(Y, table)
+            with self.assertRaises(ValueError):
+                yao_de([b'short'], decoding_table(d, scheme, hashed=True))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+"""
+Tests for the circuit optimizer.
+Run with: pytest test_optimize.py
+"""
+import io
+import itertools
+import random
+import unittest
+
+from bristol import load_bristol
+from garbled_circuits import (GATE_TYPES, SCHEMES, Circuit, CompactCircuit, blood_type_circuit, comparison_circuit,
+                              garble_compact, plain_eval, yao_eval_packed)
+from optimize import gate_counts, non_free, optimize
+
+
+def same_function(circuit, optimized, inputs=None):
+    xs = itertools.product((0, 1), repeat=circuit.n) if inputs is None else inputs
+    for x in xs:
+        assert plain_eval(optimized, list(x)) == plain_eval(circuit, list(x))
+
+
+class TestOptimize(unittest.TestCase):
+
+    def test_blood_type(self):
+        """OR(10, 10) folds into its input and the unused gate 9 is dropped."""
+        circuit = blood_type_circuit()
+        optimized, stats = optimize(circuit)
+        assert isinstance(optimized, Circuit)
+        assert optimized.q == 3 and stats.before == gate_counts(circuit) and sum(stats.after.values()) == 3
+        same_function(circuit, optimized)
+
+    def test_constants_and_duplicates(self):
+        c = CompactCircuit(2, 2)
+        zero = c.add("XOR", 1, 1)
+        a = c.add("OR", 1, zero)        # x_1
+        b = c.add("AND", 1, 2)
+        d = c.add("AND", 2, a)          # the same as b
+        e = c.add("NOT", c.add("NOT", d, d), 0)
+        c.add("XOR", b, e)              # 0
+        c.add("A_OR_NOT_B", b, 2)       # x_1 or not x_2
+        optimized, stats = optimize(c)
+        assert isinstance(optimized, CompactCircuit)
+        same_function(c, optimized)
+        # x_1 & x_2 once, XOR(1, 1) for the constant output and the last gate
+        assert optimized.q == 3 and non_free(stats.after) == 2
+
+    def test_rewrite(self):
+        # (a & b) ^ (a & c) = a & (b ^ c)
+        c = CompactCircuit(3, 1)
+        c.add("XOR", c.add("AND", 1, 2), c.add("AND", 3, 1))
+        optimized, stats = optimize(c)
+        same_function(c, optimized)
+        assert stats.rewrites == 1 and non_free(stats.after) == 1
+
+    def test_outputs_last_in_order(self):
+        """Outputs that are inputs, repeated, negated or read by other gates."""
+        c = CompactCircuit(3, 4)
+        g = c.add("AND", 1, 2)
+        h = c.add("XOR", g, 3)
+        c.add("NOT", h, h)
+        c.add("XOR", 1, c.add("XOR", 3, 3))  # x_1
+        c.add("AND", g, g)                   # g again
+        c.add("OR", 1, 1)                    # x_1 again
+        optimized, _ = optimize(c)
+        assert list(optimized.gates) == list(range(4, 4 + optimized.q))
+        same_function(c, optimized)
+
+    def test_random_circuits(self):
+        rng = random.Random(1)
+        for _ in range(200):
+            n, q = rng.randint(1, 5), rng.randint(1, 30)
+            c = CompactCircuit(n, rng.randint(1, min(4, n + q)))
+            for i in range(q):
+                c.add(rng.choice(GATE_TYPES), rng.randint(1, n + i), rng.randint(1, n + i))
+            optimized, stats = optimize(c)
+            same_function(c, optimized)
+            assert non_free(stats.after) <= non_free(stats.before)
+
+    def test_garbled(self):
+        circuit = comparison_circuit(12)
+        optimized, _ = optimize(circuit)
+        for scheme in SCHEMES:
+            garbled = garble_compact(optimized, scheme)
+            x = [random.getrandbits(1) for _ in range(circuit.n)]
+            Y = yao_eval_packed(garbled.encode(x), garbled.data, optimized, scheme)
+            assert [d_j.index(Y_j) for Y_j, d_j in zip(Y, garbled.d())] == plain_eval(circuit, x)
+
+    def test_loaded(self):
+        # EQ and EQW of a Bristol file leave constants and copies behind
+        text = "4 7\n2 2 1\n1 2\n\n1 1 0 3 EQ\n2 1 0 3 4 AND\n2 1 4 1 5 XOR\n1 1 2 6 EQW\n"
+        circuit, _, _ = load_bristol(io.StringIO(text), compact=True)
+        optimized, _ = optimize(circuit)
+        same_function(circuit, optimized)
+        assert optimized.q < circuit.q
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+"""
+Tests for the IKNP OT extension.
+Run with: pytest test_ot_extension.py
+"""
+import secrets
+import unittest
+
+import ot_extension
+import yao_net
+from elgamal import elgamal_safe_GGen
+from ot_extension import ExtensionReceiver, ExtensionSender, transpose, xor_bytes
+
+TOY = elgamal_safe_GGen()  # fast base OTs, the extension itself does not depend on the group
+
+
+def setup_pair() -> tuple[ExtensionSender, ExtensionReceiver]:
+    S, R = ExtensionSender(TOY), ExtensionReceiver(TOY)
+    S.base_finish(R.base_send(S.base_choose()))
+    return S, R
+
+
+class TestOTExtension(unittest.TestCase):
+
+    def test_transpose(self):
+        m = 5000
+        columns = [secrets.randbits(m) for _ in range(7)]
+        rows = transpose(columns, m)
+        assert len(rows) == m
+        for j in (0, 1, 4095, 4096, m - 1):
+            assert rows[j] == sum(((c >> j) & 1) << i for i, c in enumerate(columns))
+
+    def test_base_ot(self):
+        choices = [secrets.randbits(1) for _ in range(20)]
+        pks, sks = ot_extension.base_choose(choices, TOY)
+        c1, seeds = ot_extension.base_send(pks, TOY)
+        assert ot_extension.base_receive(c1, choices, sks, TOY) == [pair[s] for pair, s in zip(seeds, choices)]
+
+    def test_modes_and_reuse(self):
+        """One base phase, several extensions of different sizes."""
+        S, R = setup_pair()
+        for m in (1, 300, 1000):
+            choices = [secrets.randbits(1) for _ in range(m)]
+
+            u, t = R.extend(choices)
+            pairs = S.random(S.extend(u, m))
+            assert R.random(t) == [pair[r] for pair, r in zip(pairs, choices)]
+
+            messages = [(secrets.token_bytes(16), secrets.token_bytes(16)) for _ in range(m)]
+            u, t = R.extend(choices)
+            data = S.send(S.extend(u, m), messages)
+            assert R.receive(t, choices, data) == [pair[r] for pair, r in zip(messages, choices)]
+
+            delta = secrets.token_bytes(16)
+            u, t = R.extend(choices)
+            x0, data = S.correlated(S.extend(u, m), delta)
+            assert R.correlated(t, choices, data) == [xor_bytes(x, delta) if r else x for x, r in zip(x0, choices)]
+
+    def test_run_over_transport(self):
+        m = 100
+        messages = [(secrets.token_bytes(16), secrets.token_bytes(16)) for _ in range(m)]
+        choices = [secrets.randbits(1) for _ in range(m)]
+        received, stats_s, stats_r = ot_extension.run(messages, choices, TOY)
+        assert received == [pair[r] for pair, r in zip(messages, choices)]
+        assert stats_s.rounds == 2 and stats_r.rounds == 1
+
+    def test_yao_with_extension(self):
+        output, _, _ = yao_net.run([1, 0, 1], [1, 1, 0], ot="extension")
+        assert output == yao_net.run([1, 0, 1], [1, 1, 0])[0]
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+"""
+Tests for garbling on a process pool.
+Run with: pytest test_parallel_garble.py
+"""
+import multiprocessing
+import random
+import unittest
+
+from garbled_circuits import SCHEMES, blood_type_circuit, chi_circuit, comparison_circuit, garble_compact, plain_eval, yao_eval_packed
+from parallel_garble import levelize, parallel_garble
+
+
+class TestParallelGarble(unittest.TestCase):
+
+    def test_same_bytes_as_sequential(self):
+        """With a seed the pool writes exactly the buffers of garble_compact, for any worker count and chunk."""
+        circuit = chi_circuit(8, 5, compact=True)
+        for scheme in SCHEMES:
+            expected = garble_compact(circuit, scheme, seed=b'seed')
+            for workers, chunk in ((1, 2048), (2, 3), (3, 1)):
+                garbled = parallel_garble(circuit, scheme, seed=b'seed', workers=workers, chunk=chunk)
+                assert garbled.data == expected.data
+                assert garbled.labels == expected.labels
+
+    def test_seed(self):
+        circuit = comparison_circuit(4)
+        assert garble_compact(circuit, "half_gates", seed=b'a').labels == garble_compact(circuit, "half_gates", seed=b'a').labels
+        assert garble_compact(circuit, "half_gates", seed=b'a').labels != garble_compact(circuit, "half_gates", seed=b'b').labels
+
+    def test_evaluates(self):
+        for scheme in SCHEMES:
+            for circuit in (blood_type_circuit(), comparison_circuit(10)):
+                garbled = parallel_garble(circuit, scheme, workers=2, chunk=4)
+                x = [random.getrandbits(1) for _ in range(circuit.n)]
+                Y = yao_eval_packed(garbled.encode(x), garbled.data, circuit, scheme)
+                assert [d_j.index(Y_j) for Y_j, d_j in zip(Y, garbled.d())] == plain_eval(circuit, x)
+
+    def test_spawn(self):
+        # workers that do not inherit the parent's memory
+        circuit = comparison_circuit(6)
+        garbled = parallel_garble(circuit, "half_gates", seed=b'seed', workers=2, mp_context=multiprocessing.get_context("spawn"))
+        assert garbled.data == garble_compact(circuit, "half_gates", seed=b'seed').data
+
+    def test_levelize(self):
+        circuit = comparison_circuit(8, compact=True)
+        layers = levelize(circuit)
+        assert sorted(i for layer in layers for i in layer) == list(range(circuit.q))
+        level = {w: 0 for w in range(1, circuit.n + 1)}
+        for depth, layer in enumerate(layers):
+            for i in layer:
+                assert max(level[circuit.A[i]], level[circuit.B[i]]) == depth
+                level[circuit.gates[i]] = depth + 1
+
+    def test_bad_arguments(self):
+        with self.assertRaises(ValueError):
+            parallel_garble(blood_type_circuit(), "unknown")
+        with self.assertRaises(ValueError):
+            parallel_garble(blood_type_circuit(), chunk=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
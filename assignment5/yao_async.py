@@ -0,0 +1,83 @@
+import asyncio
+import os
+import random
+import sys
+
+from garbled_circuits import blood_type_circuit, yao_garble, yao_En, yao_eval, yao_de
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import async_runtime
+
+# Yao's protocol from garbled_circuits.py as asyncio coroutines, so that many
+# sessions can run over one event loop and one connection (see async_runtime.py).
+# Messages are the same as in yao_net.py, Bob's input keys come from IdealOT.
+# Run the load generator with: python yao_async.py [sessions] [concurrency]
+
+KEY_BYTES = 16
+CIPHERTEXT_BYTES = 32
+
+
+class IdealOT:
+    """Stands in for the 1-out-of-2 OTs of Bob's input keys, matched by session id."""
+
+    def __init__(self):
+        self.keys = {}
+
+    def _future(self, session_id: int) -> asyncio.Future:
+        return self.keys.setdefault(session_id, asyncio.get_running_loop().create_future())
+
+    def send(self, session_id: int, e_bob: list[list[bytes]]):
+        # Alice's side: both keys of each of Bob's input wires
+        self._future(session_id).set_result(e_bob)
+
+    async def receive(self, session_id: int, y: list[int]) -> list[bytes]:
+        # Bob's side: the key for his bit on each wire
+        e_bob = await self._future(session_id)
+        del self.keys[session_id]
+        return yao_En(e_bob, y)
+
+
+async def alice(channel: async_runtime.SessionChannel, ot: IdealOT, x: list[int]) -> int:
+    circuit = blood_type_circuit()
+    gc, e, d = yao_garble(circuit, [])
+    ot.send(channel.session_id, e[len(x):])
+
+    await channel.send(b''.join(C for row in gc for C in row))
+    await channel.send(b''.join(yao_En(e[:len(x)], x)))
+
+    data = await channel.recv()
+    Y = [data[i:i + KEY_BYTES] for i in range(0, len(data), KEY_BYTES)]
+    return yao_de(Y, d)[0]  # the blood type circuit has one output
+
+
+async def bob(channel: async_runtime.SessionChannel, ot: IdealOT, y: list[int]):
+    circuit = blood_type_circuit()
+    data = await channel.recv()
+    gc = [[data[i + j * CIPHERTEXT_BYTES:i + (j + 1) * CIPHERTEXT_BYTES] for j in range(4)]
+          for i in range(0, len(data), 4 * CIPHERTEXT_BYTES)]
+    data = await channel.recv()
+    X_alice = [data[i:i + KEY_BYTES] for i in range(0, len(data), KEY_BYTES)]
+    X_bob = await ot.receive(channel.session_id, y)
+
+    Y = yao_eval(X_alice + X_bob, gc, circuit, verbose=False)
+    await channel.send(b''.join(Y))
+
+
+async def main(sessions: int, concurrency: int):
+    # Bob serves every session with his bits, Alice's differ per session
+    y = [0, 0, 0]  # o-, compatible with every recipient
+    inputs = [[random.randint(0, 1) for _ in range(3)] for _ in range(sessions)]
+    for link in async_runtime.LINKS:
+        ot = IdealOT()
+        report = await async_runtime.load_test(
+            lambda channel, i: alice(channel, ot, inputs[i]),
+            lambda channel: bob(channel, ot, y),
+            sessions, concurrency, link,
+            check=lambda i, output: output == 1)
+        async_runtime.print_report("Yao", link, concurrency, report)
+
+
+if __name__ == "__main__":
+    sessions = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    asyncio.run(main(sessions, concurrency))
@@ -0,0 +1,116 @@
+import os
+import sys
+import time
+
+from garbled_circuits import blood_type_circuit, yao_garble_packed, yao_En, yao_eval_packed, yao_de
+from garble_stream import StreamGarbler, eval_stream
+import ot_extension
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import transport
+
+# Yao's protocol from garbled_circuits.py with Alice (garbler) and Bob
+# (evaluator) talking over a transport.Channel.
+#
+# Messages:  Alice -> Bob  gc, the bytearray of yao_garble_packed (4 x 32 bytes per gate)
+#            Alice -> Bob  X_alice, her input keys (16 bytes each)
+#            Bob -> Alice  Y, the garbled output keys
+#
+# Bob's input keys come from an ideal OT (ot_functionality below), as in
+# garbled_circuits.py where the OT step is not implemented either, or with
+# ot="extension" from real OTs (ot_extension.py) run over the same channel
+# before the garbled circuit is sent.
+
+#
+# Streaming (stream_alice / stream_bob, any circuit): Alice sends her input keys,
+# then the garbled circuit as one message per chunk of gates and an empty message
+# at the end, Bob evaluates each chunk as it arrives (garble_stream.py).
+
+OT_MODES = ("ideal", "extension")
+
+KEY_BYTES = 16
+
+
+def ot_functionality(e_bob: list[list[bytes]], y: list[int]) -> list[bytes]:
+    # stands in for one 1-out-of-2 OT per input bit of Bob: he learns e_bob[i][y_i] and nothing else
+    return yao_En(e_bob, y)
+
+
+def alice(channel: transport.Channel, x: list[int], garbled, ot: str = "ideal") -> int:
+    data, e, d = garbled
+    if ot == "extension":
+        ot_extension.sender(channel, [tuple(keys) for keys in e[len(x):]])
+    channel.send(data)
+    channel.send(b''.join(yao_En(e[:len(x)], x)))
+
+    data = channel.recv()
+    Y = [data[i:i + KEY_BYTES] for i in range(0, len(data), KEY_BYTES)]
+    return yao_de(Y, d)[0]  # the blood type circuit has one output
+
+
+def bob(channel: transport.Channel, circuit, X_bob: list[bytes] = None, y: list[int] = None) -> list[bytes]:
+    if X_bob is None:
+        X_bob = ot_extension.receiver(channel, y)  # alice(..., ot="extension")
+    gc = channel.recv()
+    data = channel.recv()
+    X_alice = [data[i:i + KEY_BYTES] for i in range(0, len(data), KEY_BYTES)]
+
+    Y = yao_eval_packed(X_alice + X_bob, gc, circuit)
+    channel.send(b''.join(Y))
+    return Y
+
+
+def run(x: list[int], y: list[int], backend: str = "queue", ot: str = "ideal") -> tuple[int, transport.ChannelStats, transport.ChannelStats]:
+    """Yao over the given transport backend on the blood type circuit, x is Alice's bits and y Bob's."""
+    if ot not in OT_MODES:
+        raise ValueError(f"Unsupported OT {ot}, use one of {OT_MODES}")
+    circuit = blood_type_circuit()
+    # Alice garbles before the protocol starts so the OT step can hand Bob his keys
+    garbled = yao_garble_packed(circuit)
+    X_bob = ot_functionality(garbled[1][len(x):], y) if ot == "ideal" else None
+
+    output, _, stats_a, stats_b = transport.run_parties(
+        lambda channel: alice(channel, x, garbled, ot),
+        lambda channel: bob(channel, circuit, X_bob, y),
+        backend)
+    return output, stats_a, stats_b
+
+
+def stream_alice(channel: transport.Channel, x: list[int], garbler: StreamGarbler, chunk: int = 4096) -> list[int]:
+    channel.send(b''.join(yao_En(garbler.e[:len(x)], x)))
+    for data in garbler.chunks(chunk):
+        channel.send(data)
+    channel.send(b'')
+
+    data = channel.recv()
+    Y = [data[i:i + KEY_BYTES] for i in range(0, len(data), KEY_BYTES)]
+    return yao_de(Y, garbler.d)
+
+
+def stream_bob(channel: transport.Channel, circuit, X_bob: list[bytes], scheme: str = "half_gates") -> list[bytes]:
+    data = channel.recv()
+    X_alice = [data[i:i + KEY_BYTES] for i in range(0, len(data), KEY_BYTES)]
+    Y = eval_stream(X_alice + X_bob, iter(channel.recv, b''), circuit, scheme)
+    channel.send(b''.join(Y))
+    return Y
+
+
+def run_stream(circuit, x: list[int], y: list[int], scheme: str = "half_gates", backend: str = "queue",
+               chunk: int = 4096) -> tuple[list[int], transport.ChannelStats, transport.ChannelStats]:
+    """Streaming Yao on any circuit whose first len(x) inputs are Alice's and the rest Bob's, returns the output bits."""
+    garbler = StreamGarbler(circuit, scheme)
+    X_bob = ot_functionality(garbler.e[len(x):], y)
+    output, _, stats_a, stats_b = transport.run_parties(
+        lambda channel: stream_alice(channel, x, garbler, chunk),
+        lambda channel: stream_bob(channel, circuit, X_bob, scheme),
+        backend)
+    return output, stats_a, stats_b
+
+
+if __name__ == "__main__":
+    for ot in OT_MODES:
+        for backend in transport.BACKENDS:
+            start = time.perf_counter()
+            output, stats_a, stats_b = run([1, 0, 1], [1, 1, 0], backend, ot)
+            seconds = time.perf_counter() - start
+            transport.report(f"Yao {ot}", backend, stats_a, stats_b, seconds)
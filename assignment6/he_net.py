@@ -0,0 +1,60 @@
+import os
+import sys
+import tempfile
+import time
+
+from d_fhe_scheme import FHE_keygen, FHE_enc, FHE_dec
+from HE import blood_type_encoding_HE, bloodtype_compatability_depth3, can_donate
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import transport
+
+# The d-HE blood type protocol from blood_test_compatibility.py with the donor
+# and the recipient talking over a transport.Channel. The donor owns the secret
+# key, the public key file is readable by both.
+#
+# Messages:  donor -> recipient  Enc(donor's 3 bits)
+#            recipient -> donor  Enc(compatibility), computed homomorphically
+#
+# Ciphertexts are gmpy2 integers sent with send_obj.
+
+# Smaller than blood_test_compatibility.py (q_bits = 10**7) so that a run
+# takes seconds, the noise is still far below p for the depth 3 circuit.
+p_bits = 2000
+q_bits = 10**5
+r_bits = 60
+n = 200
+
+
+def donor(channel: transport.Channel, blood_type: str, secret_key, pub_key_file: str) -> int:
+    channel.send_obj([FHE_enc(m, pub_key_file, n) for m in blood_type_encoding_HE[blood_type]])
+    compat = channel.recv_obj()
+    return int(FHE_dec(compat, secret_key))
+
+
+def recipient(channel: transport.Channel, blood_type: str, pub_key_file: str):
+    donorblood_enc = tuple(channel.recv_obj())
+    recipientblood_enc = tuple(FHE_enc(m, pub_key_file, n) for m in blood_type_encoding_HE[blood_type])
+    channel.send_obj(bloodtype_compatability_depth3(donorblood_enc, recipientblood_enc))
+
+
+def run(donor_type: str, recipient_type: str, secret_key, pub_key_file: str, backend: str = "queue") -> tuple[int, transport.ChannelStats, transport.ChannelStats]:
+    """d-HE over the given transport backend, returns the donor's decrypted result (1 = compatible)."""
+    compat, _, stats_donor, stats_recipient = transport.run_parties(
+        lambda channel: donor(channel, donor_type, secret_key, pub_key_file),
+        lambda channel: recipient(channel, recipient_type, pub_key_file),
+        backend)
+    return compat, stats_donor, stats_recipient
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as d:
+        pub_key_file = os.path.join(d, "FHE_pubkey.pkl")
+        secret_key = FHE_keygen(p_bits, q_bits, r_bits, n, pub_key_file)
+
+        for backend in transport.BACKENDS:
+            start = time.perf_counter()
+            compat, stats_donor, stats_recipient = run('a-', 'ab+', secret_key, pub_key_file, backend)
+            seconds = time.perf_counter() - start
+            assert compat == can_donate('a-', 'ab+')
+            transport.report("d-HE", backend, stats_donor, stats_recipient, seconds)
@@ -0,0 +1,316 @@
+"""
+asyncio runtime for running many two-party protocol sessions at once.
+
+Alice and Bob are coroutines that talk through a SessionChannel. Many sessions
+share one link (an in-memory queue pair or one localhost TCP connection), every
+frame on the link carries the session id:
+
+    frame = session id (4 bytes) | length (4 bytes) | payload
+
+A frame with length CLOSED and no payload aborts its session: the party whose
+handler failed (or gave up) sends it and a recv waiting on the other end raises
+ConnectionError instead of waiting forever.
+
+A Mux sits on each end of the link. Alice's side opens sessions with
+mux.open(), Bob's side gets a new SessionChannel whenever a frame for an unknown
+session id arrives and runs handler(channel) for it as a task.
+
+load_test(alice, bob, sessions, concurrency) drives `sessions` sessions with at
+most `concurrency` in flight and reports sessions/second and p50/p99 latency of
+the sessions that succeeded, failures are only counted.
+
+SessionChannel counts bytes, messages and rounds like transport.Channel, and
+send_obj / recv_obj pickle objects, so only use them between parties you run
+yourself.
+"""
+import asyncio
+import math
+import pickle
+import struct
+import time
+from typing import Any, Awaitable, Callable
+
+from transport import ChannelStats
+
+FRAME = struct.Struct('>II')  # session id, payload length
+CLOSED = 0xFFFFFFFF  # length of an abort frame
+LINKS = ("memory", "tcp")
+
+
+class QueueLink:
+    """One end of an in-memory link."""
+
+    def __init__(self, inbox: asyncio.Queue, outbox: asyncio.Queue):
+        self.inbox = inbox
+        self.outbox = outbox
+
+    async def send_frame(self, session_id: int, data: bytes):
+        # data None aborts the session
+        self.outbox.put_nowait((session_id, data))
+
+    async def recv_frame(self):
+        # (session id, data or None for an abort), or None once the other end closed
+        return await self.inbox.get()
+
+    async def close(self):
+        self.outbox.put_nowait(None)
+
+
+class StreamLink:
+    """One end of a TCP link, frames as described above."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+
+    async def send_frame(self, session_id: int, data: bytes):
+        if data is None:
+            self.writer.write(FRAME.pack(session_id, CLOSED))
+        else:
+            self.writer.write(FRAME.pack(session_id, len(data)) + data)
+        await self.writer.drain()
+
+    async def recv_frame(self):
+        try:
+            session_id, n = FRAME.unpack(await self.reader.readexactly(FRAME.size))
+            if n == CLOSED:
+                return session_id, None
+            return session_id, await self.reader.readexactly(n)
+        except asyncio.IncompleteReadError:
+            return None
+
+    async def close(self):
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except ConnectionError:
+            pass
+
+
+class SessionChannel:
+    """One party's end of one session."""
+
+    def __init__(self, mux: "Mux", session_id: int):
+        self.mux = mux
+        self.session_id = session_id
+        self.inbox = asyncio.Queue()
+        self.stats = ChannelStats()
+        self.last_was_send = False
+
+    def __repr__(self):
+        return f"SessionChannel(session_id={self.session_id}, {self.stats})"
+
+    async def send(self, data: bytes):
+        if not self.last_was_send:
+            self.stats.rounds += 1
+            self.last_was_send = True
+        self.stats.bytes_sent += len(data)
+        self.stats.messages_sent += 1
+        await self.mux.link.send_frame(self.session_id, bytes(data))
+
+    async def recv(self) -> bytes:
+        data = await self.inbox.get()
+        if isinstance(data, Exception):
+            self.inbox.put_nowait(data)  # every later recv fails too
+            raise data
+        self.last_was_send = False
+        self.stats.bytes_received += len(data)
+        self.stats.messages_received += 1
+        return data
+
+    async def send_obj(self, obj: Any):
+        await self.send(pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL))
+
+    async def recv_obj(self) -> Any:
+        return pickle.loads(await self.recv())
+
+    async def abort(self):
+        # tell the other end this session failed
+        await self.mux.link.send_frame(self.session_id, None)
+
+
+class Mux:
+    def __init__(self, link, handler: Callable[[SessionChannel], Awaitable[Any]] = None):
+        self.link = link
+        self.handler = handler  # runs for sessions opened by the other end
+        self.sessions = {}
+        self.next_id = 0
+        self.tasks = set()
+        self.errors = []  # exceptions raised by handler tasks
+        self.reader = asyncio.get_running_loop().create_task(self._read())
+
+    def open(self) -> SessionChannel:
+        channel = SessionChannel(self, self.next_id)
+        self.sessions[self.next_id] = channel
+        self.next_id += 1
+        return channel
+
+    def release(self, channel: SessionChannel):
+        self.sessions.pop(channel.session_id, None)
+
+    async def _serve(self, channel: SessionChannel):
+        try:
+            await self.handler(channel)
+        except Exception as e:
+            self.errors.append(e)
+            try:
+                await channel.abort()
+            except ConnectionError:
+                pass  # the link is gone already
+        finally:
+            self.release(channel)
+
+    async def _read(self):
+        while True:
+            frame = await self.link.recv_frame()
+            if frame is None:
+                for channel in self.sessions.values():
+                    channel.inbox.put_nowait(ConnectionError(f"link closed during session {channel.session_id}"))
+                return
+            session_id, data = frame
+            channel = self.sessions.get(session_id)
+            if data is None:
+                if channel is not None:
+                    channel.inbox.put_nowait(ConnectionError(f"session {session_id} aborted by the other end"))
+                continue
+            if channel is None:
+                if self.handler is None:
+                    continue  # late frame for a session we already released
+                channel = SessionChannel(self, session_id)
+                self.sessions[session_id] = channel
+                task = asyncio.get_running_loop().create_task(self._serve(channel))
+                self.tasks.add(task)
+                task.add_done_callback(self.tasks.discard)
+            channel.inbox.put_nowait(data)
+
+    async def close(self):
+        await self.link.close()
+
+    async def wait_closed(self):
+        # returns once the other end closed too and all handler tasks finished
+        await self.reader
+        if self.tasks:
+            await asyncio.gather(*self.tasks, return_exceptions=True)
+
+
+async def close_pair(mux_a: Mux, mux_b: Mux):
+    await mux_a.close()
+    await mux_b.close()
+    await mux_a.wait_closed()
+    await mux_b.wait_closed()
+
+
+async def memory_pair(handler) -> tuple[Mux, Mux, Callable[[], Awaitable[None]]]:
+    """(Alice's mux, Bob's mux, close) over an in-memory link, Bob runs handler per session."""
+    a_to_b, b_to_a = asyncio.Queue(), asyncio.Queue()
+    mux_a = Mux(QueueLink(b_to_a, a_to_b))
+    mux_b = Mux(QueueLink(a_to_b, b_to_a), handler)
+
+    async def close():
+        await close_pair(mux_a, mux_b)
+    return mux_a, mux_b, close
+
+
+async def tcp_pair(handler) -> tuple[Mux, Mux, Callable[[], Awaitable[None]]]:
+    """(Alice's mux, Bob's mux, close) over one localhost TCP connection, Bob runs handler per session."""
+    accepted = asyncio.get_running_loop().create_future()
+
+    async def on_connect(reader, writer):
+        accepted.set_result(Mux(StreamLink(reader, writer), handler))
+
+    server = await asyncio.start_server(on_connect, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    mux_a = Mux(StreamLink(reader, writer))
+    mux_b = await accepted
+
+    async def close():
+        await close_pair(mux_a, mux_b)
+        server.close()
+        await server.wait_closed()
+    return mux_a, mux_b, close
+
+
+async def make_pair(link: str, handler):
+    if link == "memory":
+        return await memory_pair(handler)
+    elif link == "tcp":
+        return await tcp_pair(handler)
+    raise ValueError(f"Unsupported link {link}, use one of {LINKS}")
+
+
+def percentile(sorted_values: list[float], p: float) -> float:
+    # nearest-rank percentile of an already sorted list
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, math.ceil(p / 100 * len(sorted_values)) - 1))
+    return sorted_values[k]
+
+
+class LoadReport:
+    def __init__(self, sessions: int, seconds: float, latencies: list[float], bytes_total: int, failures: int):
+        # latencies of the successful sessions only
+        self.sessions = sessions
+        self.seconds = seconds
+        self.latencies = sorted(latencies)
+        self.bytes_total = bytes_total
+        self.failures = failures
+
+    def __repr__(self):
+        return (f"LoadReport(sessions={self.sessions}, sessions_per_second={self.sessions_per_second():.0f}, "
+                f"p50={self.p50() * 1e3:.2f}ms, p99={self.p99() * 1e3:.2f}ms, failures={self.failures})")
+
+    def sessions_per_second(self) -> float:
+        return self.sessions / self.seconds if self.seconds else 0.0
+
+    def p50(self) -> float:
+        return percentile(self.latencies, 50)
+
+    def p99(self) -> float:
+        return percentile(self.latencies, 99)
+
+
+async def load_test(alice: Callable[[SessionChannel, int], Awaitable[Any]], bob: Callable[[SessionChannel], Awaitable[Any]],
+                    sessions: int, concurrency: int = 100, link: str = "memory", check: Callable[[int, Any], bool] = None,
+                    timeout: float = 30.0) -> LoadReport:
+    """
+    Run `sessions` sessions of alice(channel, i) against bob(channel), at most `concurrency`
+    at a time over one link. check(i, alice's result) can flag wrong results as failures,
+    a session that raises or takes longer than `timeout` seconds is a failure too.
+    """
+    mux_a, mux_b, close = await make_pair(link, bob)
+    limit = asyncio.Semaphore(concurrency)
+    latencies = []
+    totals = {"bytes": 0, "failures": 0}
+
+    async def session(i: int):
+        async with limit:
+            channel = mux_a.open()
+            start = time.perf_counter()
+            try:
+                result = await asyncio.wait_for(alice(channel, i), timeout)
+                if check is not None and not check(i, result):
+                    totals["failures"] += 1
+                else:
+                    latencies.append(time.perf_counter() - start)
+            except Exception:  # TimeoutError included
+                totals["failures"] += 1
+                try:
+                    await channel.abort()  # Bob's handler stops waiting
+                except ConnectionError:
+                    pass
+            totals["bytes"] += channel.stats.bytes_sent + channel.stats.bytes_received
+            mux_a.release(channel)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(session(i) for i in range(sessions)))
+    seconds = time.perf_counter() - start
+    await close()
+    return LoadReport(sessions, seconds, latencies, totals["bytes"], totals["failures"])
+
+
+def print_report(name: str, link: str, concurrency: int, report: LoadReport):
+    print(f"{name:<6} {link:<6} concurrency={concurrency:<5} {report.sessions} sessions  "
+          f"{report.sessions_per_second():10.0f} sessions/s  p50={report.p50() * 1e3:8.2f}ms  "
+          f"p99={report.p99() * 1e3:8.2f}ms  {report.bytes_total / max(report.sessions, 1):.0f} B/session  "
+          f"failures={report.failures}")
@@ -0,0 +1,71 @@
+"""
+Tests for the asyncio session runtime.
+Run with: pytest test_async_runtime.py
+"""
+import asyncio
+import unittest
+import async_runtime
+
+
+async def alice(channel: async_runtime.SessionChannel, i: int) -> int:
+    await channel.send_obj(i)
+    await asyncio.sleep(0)  # let other sessions interleave
+    await channel.send(b'x' * i)
+    return await channel.recv_obj()
+
+
+async def bob(channel: async_runtime.SessionChannel):
+    i = await channel.recv_obj()
+    data = await channel.recv()
+    await channel.send_obj((channel.session_id, i, len(data)))
+
+
+class TestRuntime(unittest.TestCase):
+
+    def test_many_sessions(self):
+        """Interleaved sessions each get their own messages back, on both links."""
+        for link in async_runtime.LINKS:
+            report = asyncio.run(async_runtime.load_test(
+                alice, bob, sessions=300, concurrency=50, link=link,
+                check=lambda i, result: result == (i, i, i)))
+            assert report.sessions == 300
+            assert report.failures == 0
+            assert len(report.latencies) == 300
+            assert 0 < report.p50() <= report.p99()
+
+    def test_failures_are_counted(self):
+        async def broken_bob(channel):
+            await channel.recv_obj()
+            await channel.recv()
+            await channel.send_obj("wrong")
+        report = asyncio.run(async_runtime.load_test(alice, broken_bob, sessions=10, check=lambda i, result: result == (i, i, i)))
+        assert report.failures == 10
+
+    def test_bob_raises(self):
+        """Bob failing while Alice waits in recv is a failure, not a hang."""
+        async def raising_bob(channel):
+            await channel.recv_obj()
+            raise ValueError("bob broke")
+        for link in async_runtime.LINKS:
+            report = asyncio.run(asyncio.wait_for(async_runtime.load_test(alice, raising_bob, sessions=5, link=link), 10))
+            assert report.failures == 5
+            assert report.latencies == []  # failed sessions do not count towards p50/p99
+
+    def test_timeout(self):
+        async def silent_bob(channel):
+            await channel.recv()
+            await channel.recv()
+            await channel.recv()  # Alice never sends a third message
+        report = asyncio.run(asyncio.wait_for(async_runtime.load_test(alice, silent_bob, sessions=3, timeout=0.2), 10))
+        assert report.failures == 3
+
+    def test_percentile(self):
+        values = [float(v) for v in range(1, 101)]
+        assert async_runtime.percentile(values, 50) == 50.0
+        assert async_runtime.percentile(values, 99) == 99.0
+        assert async_runtime.percentile([], 50) == 0.0
+        assert async_runtime.percentile([1.0, 2.0, 3.0, 4.0, 5.0], 50) == 3.0  # the median, not the 2nd value
+
+
+if __name__ == '__main__':
+    unittest.main()
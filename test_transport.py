@@ -0,0 +1,94 @@
+"""
+Tests for the transport layer.
+Run with: pytest test_transport.py
+"""
+import multiprocessing
+import unittest
+import transport
+
+
+def ping_pong(channel: transport.Channel) -> list:
+    channel.send(b'ping')
+    channel.send(b'')
+    channel.send_obj({'x': [1, 2, 3]})
+    return [channel.recv(), channel.recv_obj()]
+
+
+def pong_ping(channel: transport.Channel) -> list:
+    got = [channel.recv(), channel.recv(), channel.recv_obj()]
+    channel.send(b'pong' * 100000)
+    channel.send_obj((7, b'\x00'))
+    return got
+
+
+class TestTransport(unittest.TestCase):
+
+    def test_backends(self):
+        """Messages arrive unchanged and in order, bytes and rounds are counted on both ends."""
+        for backend in transport.BACKENDS:
+            result_a, result_b, stats_a, stats_b = transport.run_parties(ping_pong, pong_ping, backend)
+            assert result_a == [b'pong' * 100000, (7, b'\x00')]
+            assert result_b == [b'ping', b'', {'x': [1, 2, 3]}]
+            assert stats_a.messages_sent == stats_b.messages_received == 3
+            assert stats_b.messages_sent == stats_a.messages_received == 2
+            assert stats_a.bytes_sent == stats_b.bytes_received
+            assert stats_b.bytes_sent == stats_a.bytes_received > 400000
+            assert stats_a.rounds == stats_b.rounds == 1
+
+    def test_buffers(self):
+        """bytearray and memoryview messages arrive as bytes, the queue backend copies them."""
+        data = bytearray(range(256)) * 1000
+        for backend in transport.BACKENDS:
+            got, _, _, _ = transport.run_parties(lambda channel: channel.recv(),
+                                                 lambda channel: channel.send(memoryview(data)[1:]), backend)
+            assert got == bytes(data[1:])
+
+    def test_rounds(self):
+        a, b = transport.queue_pair()
+        for _ in range(3):
+            a.send(b'x')
+            b.recv()
+            b.send(b'y')
+            a.recv()
+        assert a.stats.rounds == b.stats.rounds == 3
+
+    def test_bob_failure(self):
+        """Bob raising while Alice waits in recv ends the run with Bob's error instead of a hang."""
+        def broken(channel):
+            channel.recv()
+            raise ValueError("bob broke")
+
+        def alice(channel):
+            channel.send(b'x')
+            return channel.recv()
+        for backend, error in (("queue", ValueError), ("tcp", ValueError), ("pipe", RuntimeError)):
+            with self.assertRaises(error):
+                transport.run_parties(alice, broken, backend)
+
+    def test_alice_failure_reaps_child(self):
+        """Alice raising on the pipe backend leaves no child process behind."""
+        def alice(channel):
+            raise ValueError("alice broke")
+
+        def bob(channel):
+            return channel.recv()
+
+        with self.assertRaises(ValueError):
+            transport.run_parties(alice, bob, "pipe")
+        assert multiprocessing.active_children() == []
+
+    def test_closed_channel(self):
+        for backend in transport.BACKENDS:
+            a, b = transport.make_pair(backend)
+            b.close()
+            with self.assertRaises(ConnectionError):
+                a.recv()
+            a.close()
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            transport.make_pair("carrier-pigeon")
+
+
+if __name__ == '__main__':
+    unittest.main()
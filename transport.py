@@ -0,0 +1,293 @@
+"""
+Message-passing transport shared by the protocols in assignment2..assignment6.
+
+A Channel is one party's end of a two-party connection. It sends and receives
+whole byte messages and counts what goes over it:
+    bytes_sent / bytes_received        payload bytes
+    messages_sent / messages_received  number of messages
+    rounds                             number of flights sent, consecutive sends
+                                       without a receive in between count once
+
+Backends:
+    queue_pair()  in-memory queues, for parties running as threads
+    pipe_pair()   multiprocessing pipes, for parties in separate processes
+    tcp_pair()    localhost TCP sockets, length-prefixed frames
+
+send_obj / recv_obj pickle Python objects (ints, bytes, lists of group elements,
+...) on top of send / recv. Only use them between parties you run yourself,
+unpickling data from an untrusted peer is not safe.
+
+run_parties(alice, bob, backend) runs alice(channel) and bob(channel) against
+each other and returns both results and both channels' stats.
+
+Closing a channel ends the connection: a recv waiting on the other end raises
+ConnectionError instead of blocking forever, that is how run_parties stops Alice
+when Bob fails.
+
+The protocol folders import this file with
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+"""
+import multiprocessing
+import pickle
+import queue
+import socket
+import struct
+import threading
+from typing import Any, Callable
+
+FRAME = struct.Struct('>I')  # length prefix of a TCP frame
+BACKENDS = ("queue", "pipe", "tcp")
+
+
+class ChannelStats:
+    def __init__(self, bytes_sent=0, bytes_received=0, messages_sent=0, messages_received=0, rounds=0):
+        self.bytes_sent = bytes_sent
+        self.bytes_received = bytes_received
+        self.messages_sent = messages_sent
+        self.messages_received = messages_received
+        self.rounds = rounds
+
+    def __repr__(self):
+        return (f"ChannelStats(bytes_sent={self.bytes_sent}, bytes_received={self.bytes_received}, "
+                f"messages_sent={self.messages_sent}, messages_received={self.messages_received}, rounds={self.rounds})")
+
+
+class Channel:
+    """One end of a two-party connection, subclasses implement _send and _recv."""
+
+    def __init__(self):
+        self.stats = ChannelStats()
+        self.last_was_send = False
+
+    def _send(self, data: bytes):
+        raise NotImplementedError
+
+    def _recv(self) -> bytes:
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def send(self, data: bytes):
+        if not self.last_was_send:
+            self.stats.rounds += 1
+            self.last_was_send = True
+        self.stats.bytes_sent += len(data)
+        self.stats.messages_sent += 1
+        self._send(data)  # bytes, or a bytearray/memoryview sent without a copy where the backend allows
+
+    def recv(self) -> bytes:
+        data = self._recv()
+        self.last_was_send = False
+        self.stats.bytes_received += len(data)
+        self.stats.messages_received += 1
+        return data
+
+    def send_obj(self, obj: Any):
+        self.send(pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL))
+
+    def recv_obj(self) -> Any:
+        return pickle.loads(self.recv())
+
+
+class QueueChannel(Channel):
+    def __init__(self, inbox: queue.Queue, outbox: queue.Queue):
+        super().__init__()
+        self.inbox = inbox
+        self.outbox = outbox
+        self.closed = False
+
+    def _send(self, data: bytes):
+        self.outbox.put(bytes(data))  # the receiver must not see later changes to a buffer
+
+    def _recv(self) -> bytes:
+        data = self.inbox.get()
+        if data is None:
+            self.inbox.put(None)  # every later recv fails too
+            raise ConnectionError("connection closed by peer")
+        return data
+
+    def close(self):
+        # None in the peer's inbox marks the end of the connection
+        if not self.closed:
+            self.closed = True
+            self.outbox.put(None)
+
+
+class PipeChannel(Channel):
+    def __init__(self, conn):
+        super().__init__()
+        self.conn = conn  # multiprocessing.connection.Connection
+
+    def _send(self, data: bytes):
+        self.conn.send_bytes(data)
+
+    def _recv(self) -> bytes:
+        try:
+            return self.conn.recv_bytes()
+        except EOFError:
+            raise ConnectionError("connection closed by peer") from None
+
+    def close(self):
+        self.conn.close()
+
+
+class TCPChannel(Channel):
+    def __init__(self, sock: socket.socket):
+        super().__init__()
+        self.sock = sock
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def _send(self, data: bytes):
+        if len(data) < 1 << 16:
+            self.sock.sendall(FRAME.pack(len(data)) + data)
+        else:
+            # large buffers go out as they are instead of being copied behind the header
+            self.sock.sendall(FRAME.pack(len(data)))
+            self.sock.sendall(data)
+
+    def _recv_exactly(self, n: int) -> bytes:
+        buf = bytearray(n)
+        view = memoryview(buf)
+        got = 0
+        while got < n:
+            k = self.sock.recv_into(view[got:], n - got)
+            if k == 0:
+                raise ConnectionError("connection closed by peer")
+            got += k
+        return bytes(buf)
+
+    def _recv(self) -> bytes:
+        (n,) = FRAME.unpack(self._recv_exactly(FRAME.size))
+        return self._recv_exactly(n)
+
+    def close(self):
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)  # wakes up a recv on the other end
+        except OSError:
+            pass  # already disconnected
+        self.sock.close()
+
+
+def queue_pair() -> tuple[QueueChannel, QueueChannel]:
+    a_to_b, b_to_a = queue.Queue(), queue.Queue()
+    return QueueChannel(b_to_a, a_to_b), QueueChannel(a_to_b, b_to_a)
+
+
+def pipe_pair() -> tuple[PipeChannel, PipeChannel]:
+    conn_a, conn_b = multiprocessing.Pipe(duplex=True)
+    return PipeChannel(conn_a), PipeChannel(conn_b)
+
+
+def tcp_listen(port: int = 0) -> socket.socket:
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    server.bind(("127.0.0.1", port))
+    server.listen(1)
+    return server
+
+
+def tcp_connect(port: int, host: str = "127.0.0.1") -> TCPChannel:
+    return TCPChannel(socket.create_connection((host, port)))
+
+
+def tcp_pair() -> tuple[TCPChannel, TCPChannel]:
+    server = tcp_listen()
+    client = tcp_connect(server.getsockname()[1])
+    conn, _ = server.accept()
+    server.close()
+    return client, TCPChannel(conn)
+
+
+def make_pair(backend: str) -> tuple[Channel, Channel]:
+    if backend == "queue":
+        return queue_pair()
+    elif backend == "pipe":
+        return pipe_pair()
+    elif backend == "tcp":
+        return tcp_pair()
+    raise ValueError(f"Unsupported backend {backend}, use one of {BACKENDS}")
+
+
+def _run_in_child(fn, channel: PipeChannel, results, peer: PipeChannel):
+    peer.close()  # the forked copy of Alice's end, Bob sees EOF once the parent closes it
+    try:
+        results.send((True, fn(channel), channel.stats))
+    except BaseException as e:
+        results.send((False, repr(e), channel.stats))
+        channel.close()
+        raise
+
+
+def run_parties(alice: Callable[[Channel], Any], bob: Callable[[Channel], Any], backend: str = "queue") -> tuple[Any, Any, ChannelStats, ChannelStats]:
+    """
+    Run alice(channel) and bob(channel) against each other over the given backend.
+    Returns (alice's result, bob's result, alice's stats, bob's stats).
+
+    With "queue" and "tcp" Bob runs in a thread, with "pipe" he runs in a child
+    process (forked, so alice and bob may be closures).
+    """
+    channel_a, channel_b = make_pair(backend)
+    try:
+        if backend == "pipe":
+            ctx = multiprocessing.get_context("fork")
+            results_recv, results_send = ctx.Pipe(duplex=False)
+            child = ctx.Process(target=_run_in_child, args=(bob, channel_b, results_send, channel_a))
+            child.start()
+            results_send.close()
+            channel_b.close()  # the child's copy is the only one left, Alice sees EOF when it ends
+            try:
+                try:
+                    result_a = alice(channel_a)
+                except ConnectionError:
+                    # Bob's failure is the more useful error
+                    if results_recv.poll(5):
+                        ok, result_b, _ = results_recv.recv()
+                        if not ok:
+                            raise RuntimeError(f"bob failed: {result_b}") from None
+                    raise
+                ok, result_b, stats_b = results_recv.recv()
+                if not ok:
+                    raise RuntimeError(f"bob failed: {result_b}")
+            finally:
+                channel_a.close()  # if Alice failed, Bob's recv raises and the child ends
+                child.join(5)
+                if child.is_alive():
+                    child.terminate()
+                    child.join()
+                results_recv.close()
+        else:
+            box = {}
+
+            def run_bob():
+                try:
+                    box["result"] = bob(channel_b)
+                except BaseException as e:
+                    box["error"] = e
+                    channel_b.close()  # Alice's recv raises instead of waiting forever
+
+            thread = threading.Thread(target=run_bob, name="bob", daemon=True)
+            thread.start()
+            try:
+                result_a = alice(channel_a)
+            except ConnectionError:
+                thread.join(5)
+                if "error" in box:
+                    raise box["error"] from None
+                raise
+            thread.join()
+            if "error" in box:
+                raise box["error"]
+            result_b, stats_b = box["result"], channel_b.stats
+        return result_a, result_b, channel_a.stats, stats_b
+    finally:
+        channel_a.close()
+        channel_b.close()
+
+
+def report(name: str, backend: str, stats_a: ChannelStats, stats_b: ChannelStats, seconds: float):
+    total = stats_a.bytes_sent + stats_b.bytes_sent
+    rounds = stats_a.rounds + stats_b.rounds
+    print(f"{name:<8} {backend:<6} {total:>10} bytes  {rounds:>4} rounds  "
+          f"alice->bob {stats_a.bytes_sent} B / {stats_a.messages_sent} msgs  "
+          f"bob->alice {stats_b.bytes_sent} B / {stats_b.messages_sent} msgs  {seconds * 1e3:8.2f} ms")